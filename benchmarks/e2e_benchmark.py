@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of CLI actions against local mock of Github API
+
+Every action is executed in-process the same way as from command line (controller, requests, output rendering), but
+against 'mock_github_server' with configurable latency, repository count, page size and failure rate. Caches are
+bypassed with '--refresh' unless '--use_cache' is provided. For each action latency percentiles, number of requests,
+transferred bytes and throughput are reported and the results can be stored as JSON baseline. The script fails if p50
+latency or number of requests of any action is higher than in baseline by more than threshold.
+
+Usage: python benchmarks/e2e_benchmark.py [--runs N] [--latency 0.02] [--repositories 500] [--page_size 50]
+                                          [--failure_rate 0.0] [--threshold 0.25] [--baseline FILE] [--output FILE]
+                                          [--update_baseline]
+"""
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from io import StringIO
+from json import load, dump
+from os import environ
+from os.path import dirname, join, abspath
+from statistics import quantiles, median
+from sys import exit, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+PROJECT_ROOT = abspath(join(dirname(__file__), '..'))
+path.insert(0, PROJECT_ROOT)
+path.insert(0, dirname(abspath(__file__)))
+
+from mock_github_server import MockGithubServer  # noqa: E402
+from github.argparser import arg_parser  # noqa: E402
+from github.github_controller import GithubController  # noqa: E402
+from github.queries.graphQL_query import BaseQueryClass  # noqa: E402
+
+API_KEY = '0' * 40
+MULTI_USERS = [f'user{i}' for i in range(25)]
+
+
+def benchmarked_actions(manifest_path: str) -> {str: [str]}:
+    """
+    Returns command lines of benchmarked actions
+    :param manifest_path: path to batch manifest
+    :return: dictionary name of the benchmark: command line arguments
+    """
+    return {
+        'list-my-repositories': ['list-my-repositories', '--both_urls'],
+        'list-my-repositories --fields': ['list-my-repositories', '--fields', 'stars,updated_at', '--format', 'json'],
+        'list-user-repositories': ['list-user-repositories', 'octocat'],
+        'list-user-repositories (multi)': ['list-user-repositories'] + MULTI_USERS,
+        'create-repository': ['create-repository', 'benchmark_repo'],
+        'delete-repository': ['delete-repository', 'benchmark_repo', '--no_confirm'],
+        'create-project': ['create-project', 'benchmark_repo', 'benchmark_project'],
+        'create-project (multi)': ['create-project', 'repo1', 'repo2', 'repo3', 'benchmark_project'],
+        'create-pull-request': ['create-pull-request', 'benchmark_repo', 'title', 'feature', 'master'],
+        'create-pull-requests': ['create-pull-requests', 'repo1*', '--title', 'Bump', '--head', 'bump', '--base',
+                                 'master', '--workers', '8'],
+        'batch': ['batch', manifest_path, '--no_confirm'],
+        'sync': ['sync', 'octocat'],
+        'list-my-repositories --offline': ['list-my-repositories', '--offline'],
+        'find-repository': ['find-repository', 'repo1*'],
+    }
+
+
+def percentile(values: [float], fraction: float) -> float:
+    if len(values) < 2:
+        return values[0]
+    return quantiles(values, n=100, method='inclusive')[round(fraction * 100) - 1]
+
+
+def measure(server: MockGithubServer, controller_class, argv: [str], runs: int, use_cache: bool) -> dict:
+    """
+    Executes action repeatedly and collects its statistics
+    :param server: running mock server
+    :param controller_class: controller sending requests to the mock server
+    :param argv: command line arguments of the action
+    :param runs: number of measured runs
+    :param use_cache: whether caches may be used, otherwise '--refresh' is added
+    :return: dictionary of statistics
+    """
+    args = arg_parser.parse_args(argv + ([] if use_cache else ['--refresh']))
+    times, errors, output_bytes = [], 0, 0
+    server.reset_stats()
+    for _ in range(runs):
+        output = StringIO()
+        start = perf_counter()
+        try:
+            with redirect_stdout(output):
+                controller_class(args, API_KEY).process_args()
+        except Exception:
+            errors += 1
+        times.append(perf_counter() - start)
+        output_bytes += len(output.getvalue())
+    stats = dict(server.stats)
+    return {'p50_ms': median(times) * 1000,
+            'p90_ms': percentile(times, 0.9) * 1000,
+            'p99_ms': percentile(times, 0.99) * 1000,
+            'requests': stats['requests'] / runs,
+            'bytes_sent': stats['bytes_in'] / runs,
+            'bytes_received': stats['bytes_out'] / runs,
+            'output_bytes': output_bytes / runs,
+            'injected_failures': stats['failures'],
+            'errors': errors,
+            'actions_per_s': runs / sum(times)}
+
+
+def main():
+    parser = ArgumentParser(description="End-to-end benchmark of github CLI against mock Github API")
+    parser.add_argument("--runs", type=int, default=20, help="Number of runs per action")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency of every mock response in seconds")
+    parser.add_argument("--repositories", type=int, default=500, help="Number of repositories of every owner")
+    parser.add_argument("--page_size", type=int, default=BaseQueryClass.MAX_RESULTS,
+                        help="Number of repositories requested per page")
+    parser.add_argument("--max_page_size", type=int, default=100, help="Page size limit of mock server")
+    parser.add_argument("--failure_rate", type=float, default=0.0, help="Probability of 502 mock response")
+    parser.add_argument("--use_cache", action="store_true", help="Don't bypass viewer and response caches")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative regression compared to baseline")
+    parser.add_argument("--baseline", default=join(PROJECT_ROOT, 'benchmarks', 'e2e_baseline.json'),
+                        help="Baseline file")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--update_baseline", action="store_true", help="Store measured results as new baseline")
+    args = parser.parse_args()
+
+    server = MockGithubServer(repositories=args.repositories, latency=args.latency,
+                              failure_rate=args.failure_rate, max_page_size=args.max_page_size).start()
+    controller_class = type('MockGithubController', (GithubController,),
+                            {'__slots__': (), 'graphql_api_endpoint': f'{server.url}/graphql',
+                             'rest_api_endpoint': server.url})
+    BaseQueryClass.MAX_RESULTS = args.page_size
+
+    with TemporaryDirectory() as temp_dir:
+        environ['GITHUB_CLI_CACHE_DIR'] = join(temp_dir, 'cache')
+        manifest_path = join(temp_dir, 'manifest.ndjson')
+        with open(manifest_path, 'w') as manifest_file:
+            for i in range(20):
+                manifest_file.write(f'{{"action": "create-repository", "parameters": ["benchmark_repo_{i}"]}}\n')
+        results = {name: measure(server, controller_class, argv, args.runs, args.use_cache)
+                   for name, argv in benchmarked_actions(manifest_path).items()}
+    server.stop()
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = load(baseline_file)
+    except FileNotFoundError:
+        baseline = {}
+
+    print(f"{'action':<32} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'req':>6} {'KiB in':>8} {'actions/s':>10}")
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference and (result['p50_ms'] > reference['p50_ms'] * (1 + args.threshold) or
+                          result['requests'] > reference['requests'] * (1 + args.threshold)):
+            regressions.append(name)
+        print(f"{name:<32} {result['p50_ms']:8.1f} {result['p90_ms']:8.1f} {result['p99_ms']:8.1f} "
+              f"{result['requests']:6.1f} {result['bytes_received'] / 1024:8.1f} {result['actions_per_s']:10.1f}"
+              + (f"  ({result['errors']} errors)" if result['errors'] else "")
+              + (f"  (baseline p50 {reference['p50_ms']:.1f} ms)" if reference else ""))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            dump(results, output_file, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            dump(results, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"Regression over {args.threshold:.0%} in: {', '.join(regressions)}")
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
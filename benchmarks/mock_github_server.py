@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Github API used by end-to-end benchmarks
+
+Implements GraphQL 'viewer' and 'user' repositories (with cursor pagination and aliased users), sync queries of viewer
+and 'repositoryOwner', viewer login/id, repository ids (aliased as well), 'createProject' mutation and dry run of query
+cost, and REST endpoints 'user/repos', 'repos/{owner}/{repo}' and 'repos/{owner}/{repo}/pulls'. Latency, page size
+limit and failure rate are configurable. Server counts requests and transferred bytes, so the harness can attribute
+them to actions.
+
+Usage: python benchmarks/mock_github_server.py [--port 8000] [--repositories 500] [--latency 0.05]
+"""
+from argparse import ArgumentParser
+from base64 import b64encode, b64decode
+from hashlib import sha256
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from json import loads, dumps
+from random import Random
+from re import search, findall
+from threading import Thread, Lock
+from time import sleep, time, strftime, gmtime
+from urllib.parse import urlsplit, parse_qs
+
+REPOSITORY_FIELDS = ('name', 'url', 'sshUrl', 'stargazerCount', 'forkCount', 'updatedAt', 'createdAt', 'pushedAt',
+                     'diskUsage', 'visibility', 'description', 'isPrivate', 'isArchived', 'isFork')
+
+
+def encode_cursor(offset: int) -> str:
+    return b64encode(f'cursor:{offset}'.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    return int(b64decode(cursor.encode()).decode().split(':')[1]) if cursor else 0
+
+
+class MockGithubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), repositories: int = 200, latency: float = 0.0,
+                 failure_rate: float = 0.0, max_page_size: int = 100, seed: int = 0):
+        super().__init__(address, MockGithubHandler)
+        self.repositories = repositories
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_page_size = max_page_size
+        self.random = Random(seed)
+        self.lock = Lock()
+        self.thread = None
+        self.stats = {}
+        self.reset_stats()
+
+    @property
+    def url(self) -> str:
+        return f'http://{self.server_address[0]}:{self.server_address[1]}'
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'requests': 0, 'bytes_in': 0, 'bytes_out': 0, 'failures': 0}
+
+    def record(self, bytes_in: int, bytes_out: int, failure: bool = False):
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_in'] += bytes_in
+            self.stats['bytes_out'] += bytes_out
+            self.stats['failures'] += failure
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.failure_rate
+
+    def start(self):
+        self.thread = Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def repository(self, owner: str, index: int) -> dict:
+        return {'id': f'R_repo{index}',
+                'name': f'repo{index}',
+                'url': f'{self.url}/{owner}/repo{index}',
+                'sshUrl': f'git@localhost:{owner}/repo{index}.git',
+                'stargazerCount': index % 100,
+                'forkCount': index % 7,
+                'updatedAt': '2019-01-01T00:00:00Z',
+                'createdAt': '2018-01-01T00:00:00Z',
+                'pushedAt': '2019-01-01T00:00:00Z',
+                'diskUsage': index * 10,
+                'visibility': 'PUBLIC',
+                'description': f'Repository number {index} of {owner}',
+                'isPrivate': False,
+                'isArchived': False,
+                'isFork': False}
+
+    def repositories_page(self, owner: str, fields: [str], first: int, after: str) -> dict:
+        offset = decode_cursor(after)
+        end = min(offset + min(first or self.max_page_size, self.max_page_size), self.repositories)
+        edges = [{'node': {field: value for field, value in self.repository(owner, index).items() if field in fields}}
+                 for index in range(offset, end)]
+        return {'totalCount': self.repositories,
+                'pageInfo': {'endCursor': encode_cursor(end) if edges else None,
+                             'hasNextPage': end < self.repositories},
+                'edges': edges}
+
+
+class MockGithubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately, Nagle's algorithm would delay the body until ACK of headers
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length') or 0))
+
+    def respond(self, status: int, payload=None, bytes_in: int = 0, headers: dict = None):
+        body = dumps(payload).encode() if payload is not None else b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-RateLimit-Limit', '5000')
+        self.send_header('X-RateLimit-Remaining', '4999')
+        self.send_header('X-RateLimit-Reset', str(int(time()) + 3600))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record(bytes_in + len(self.requestline) + len(str(self.headers)), len(body),
+                           failure=status >= 500)
+
+    def handle_request(self, method: str):
+        body = self.read_body()
+        if self.server.latency:
+            sleep(self.server.latency)
+        if self.server.should_fail():
+            self.respond(502, {'message': 'Server Error'}, len(body))
+            return
+        path = urlsplit(self.path).path.rstrip('/')
+        if method == 'POST' and path == '/graphql':
+            self.respond(200, self.graphql(loads(body or b'{}')), len(body))
+        elif method == 'GET' and path == '/user/repos':
+            query = parse_qs(urlsplit(self.path).query)
+            per_page = int(query.get('per_page', ['30'])[0])
+            page = int(query.get('page', ['1'])[0])
+            start = (page - 1) * per_page
+            self.respond(200, [self.rest_repository('viewer', index)
+                               for index in range(start, min(start + per_page, self.server.repositories))], len(body))
+        elif method == 'POST' and path == '/user/repos':
+            name = loads(body)['name']
+            self.respond(201, {'name': name, 'node_id': f'R_{name}', 'ssh_url': f'git@localhost:viewer/{name}.git',
+                               'git_url': f'git://localhost/viewer/{name}.git'}, len(body))
+        elif method == 'POST' and search(r'^/repos/[^/]+/[^/]+/pulls$', path):
+            self.respond(201, {'url': f'{self.server.url}{path}/1', 'html_url': f'{self.server.url}{path[6:]}/1',
+                               'number': 1}, len(body))
+        elif search(r'^/repos/[^/]+/[^/]+$', path):
+            if method == 'DELETE':
+                self.respond(204, None, len(body))
+            elif method == 'GET':
+                owner, name = path.split('/')[2:4]
+                payload = dict(self.rest_repository(owner, 0), name=name)
+                etag = f'"{sha256(dumps(payload).encode()).hexdigest()}"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.respond(304, None, len(body), {'ETag': etag})
+                else:
+                    self.respond(200, payload, len(body), {'ETag': etag})
+            else:
+                self.respond(405, {'message': 'Method not allowed'}, len(body))
+        else:
+            self.respond(404, {'message': 'Not Found'}, len(body))
+
+    def rest_repository(self, owner: str, index: int) -> dict:
+        repository = self.server.repository(owner, index)
+        return {'name': repository['name'], 'html_url': repository['url'], 'ssh_url': repository['sshUrl'],
+                'git_url': f"git://localhost/{owner}/{repository['name']}.git",
+                'stargazers_count': repository['stargazerCount'], 'size': repository['diskUsage']}
+
+    @staticmethod
+    def cost(query: str, variables: dict) -> int:
+        # Cost as computed by Github: requested nodes of all connections divided by 100, at least 1
+        nodes = len(findall(r'\(first: \$first', query)) * (variables.get('first') or 0)
+        return max(1, -(-nodes // 100))
+
+    def graphql(self, request: dict) -> dict:
+        query = request.get('query', '')
+        variables = request.get('variables') or {}
+        response = self.graphql_data(query, variables)
+        if 'rateLimit { cost }' in query and isinstance(response.get('data'), dict):
+            response['data']['rateLimit'] = {'cost': self.cost(query, variables)}
+        return response
+
+    def graphql_data(self, query: str, variables: dict) -> dict:
+        node_fields = search(r'node \{ ([^}]*) \}', query)
+        fields = node_fields.group(1).split() if node_fields else REPOSITORY_FIELDS
+        if 'rateLimit(dryRun: true)' in query:
+            return {'data': {'rateLimit': {'cost': self.cost(query, variables)}}}
+        if query.lstrip().startswith('mutation'):
+            action = search(r'\{ (\w+)\(input', query).group(1)
+            return {'data': {action: {'clientMutationId': None}}}
+        if 'projects(search:' in query:
+            # Project lookup used to verify failed createProject, every project exists (was just created)
+            return {'data': {'viewer': {'repository': {'projects': {'nodes': [
+                {'name': variables.get('project'), 'createdAt': strftime('%Y-%m-%dT%H:%M:%SZ', gmtime())}]}}}}}
+        if 'orderBy' in query:
+            # Sync of repository index, repositories of viewer or of user/organization from the most recently updated
+            owner = variables.get('login', 'viewer')
+            key = 'repositoryOwner' if 'repositoryOwner(login:' in query else 'viewer'
+            if owner.startswith('unknown'):
+                return {'data': {key: None},
+                        'errors': [{'message': f"Could not resolve to a RepositoryOwner with the login of '{owner}'."}]}
+            return {'data': {key: {'login': owner, 'repositories': self.server.repositories_page(
+                owner, fields, variables.get('first'), variables.get('after'))}}}
+        repository_aliases = findall(r'(r\d+): repository', query)
+        if repository_aliases:
+            return {'data': {'viewer': {alias: {'id': f"R_{variables.get(f'name{alias[1:]}')}",
+                                                'name': variables.get(f'name{alias[1:]}')}
+                                        for alias in repository_aliases}}}
+        if 'repository(name:' in query:
+            return {'data': {'viewer': {'repository': {'id': f"R_{variables.get('name')}"}}}}
+        aliases = findall(r'(u\d+): user', query)
+        if aliases:
+            data, errors = {}, []
+            for alias in aliases:
+                index = alias[1:]
+                login = variables.get(f'login{index}', '')
+                if login.startswith('unknown'):
+                    data[alias] = None
+                    errors.append({'message': f"Could not resolve to a User with the login of '{login}'."})
+                else:
+                    data[alias] = {'repositories': self.server.repositories_page(
+                        login, fields, variables.get('first'), variables.get(f'after{index}'))}
+            return dict({'data': data}, **({'errors': errors} if errors else {}))
+        if 'user(login:' in query:
+            return {'data': {'user': {'repositories': self.server.repositories_page(
+                variables.get('login', ''), fields, variables.get('first'), variables.get('after'))}}}
+        if 'repositories' in query:
+            return {'data': {'viewer': {'repositories': self.server.repositories_page(
+                'viewer', fields, variables.get('first'), variables.get('after'))}}}
+        if 'viewer' in query:
+            return {'data': {'viewer': {'login': 'viewer', 'id': 'U_viewer'}}}
+        return {'errors': [{'message': 'Unsupported query'}]}
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+
+def main():
+    parser = ArgumentParser(description="Mock Github API server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--repositories", type=int, default=200, help="Number of repositories of every owner")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latency of every response in seconds")
+    parser.add_argument("--failure_rate", type=float, default=0.0, help="Probability of 502 response")
+    parser.add_argument("--max_page_size", type=int, default=100, help="Maximal number of nodes in one page")
+    args = parser.parse_args()
+    server = MockGithubServer(('127.0.0.1', args.port), repositories=args.repositories, latency=args.latency,
+                              failure_rate=args.failure_rate, max_page_size=args.max_page_size)
+    print(f"Mock Github API listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Measures cold-start wall time of the CLI for each action
+
+Every action is executed in fresh interpreter with invalid API key, so the whole start-up path (imports, argument
+parsing, controller creation, API key loading) is measured, but no request is ever sent and running daemon is never
+used. Median times are compared against baseline file and the script fails if any action is slower than baseline by
+more than threshold.
+
+Usage: python benchmarks/startup_benchmark.py [--runs N] [--threshold 0.25] [--baseline FILE] [--update_baseline]
+"""
+from argparse import ArgumentParser
+from json import load, dump
+from os import environ
+from os.path import dirname, join, abspath
+from statistics import median
+from subprocess import run, DEVNULL
+from sys import executable, exit, path
+from time import perf_counter
+
+PROJECT_ROOT = abspath(join(dirname(__file__), '..'))
+path.insert(0, PROJECT_ROOT)
+
+from github.argparser import actions  # noqa: E402
+
+# 'register' is interactive, '--help' exits right after argument parsing
+BENCHMARKED_ACTIONS = ['--help'] + [action for action in actions if action != 'register']
+
+
+def measure(action: str, runs: int) -> float:
+    """
+    Measures median cold-start time of action
+    :param action: action to be measured
+    :param runs: number of measured runs
+    :return: median wall time in milliseconds
+    """
+    # Running daemon must not serve the action, start-up of fresh interpreter is measured
+    env = dict(environ, GITHUB_API_KEY='invalid', PYTHONDONTWRITEBYTECODE='1', GITHUB_CLI_NO_DAEMON='1')
+    times = []
+    for _ in range(runs):
+        start = perf_counter()
+        run([executable, '-m', 'github', action], cwd=PROJECT_ROOT, env=env, stdout=DEVNULL, stderr=DEVNULL)
+        times.append((perf_counter() - start) * 1000)
+    return median(times)
+
+
+def main():
+    parser = ArgumentParser(description="Cold-start benchmark of github CLI")
+    parser.add_argument("--runs", type=int, default=10, help="Number of runs per action")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative slowdown compared to baseline")
+    parser.add_argument("--baseline", default=join(PROJECT_ROOT, 'benchmarks', 'startup_baseline.json'),
+                        help="Baseline file")
+    parser.add_argument("--update_baseline", action="store_true", help="Store measured times as new baseline")
+    args = parser.parse_args()
+
+    results = {action: measure(action, args.runs) for action in BENCHMARKED_ACTIONS}
+
+    try:
+        with open(args.baseline) as baseline_file:
+            baseline = load(baseline_file)
+    except FileNotFoundError:
+        baseline = {}
+
+    regressions = []
+    for action, result in results.items():
+        reference = baseline.get(action)
+        if reference and result > reference * (1 + args.threshold):
+            regressions.append(action)
+        print(f"{action:<25} {result:8.1f} ms" + (f"  (baseline {reference:.1f} ms)" if reference else ""))
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            dump(results, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"Start-up regression over {args.threshold:.0%} in: {', '.join(regressions)}")
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
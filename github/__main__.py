@@ -1,15 +1,28 @@
 from github.cli_handler import CLIHandler
 from .argparser import init_args
-from .github_controller import GithubController
-from .logger import logger
+from .logger import logger, configure_logging_from_environment
 
 
 def main():
     try:
+        configure_logging_from_environment()
         logger.debug("Obtaining arguments from CLI")
         args = init_args()
         logger.debug(args)
+        if args.action[0] == 'completion':
+            # Completion script is generated without the controller, its repository names are read from cache
+            from .completion import completion_script, default_shell
+            CLIHandler.out(completion_script(args.parameters[0] if args.parameters else default_shell()), None)
+            return
+        # Running daemon executes the command with warm connection pool, output is only relayed
+        from .daemon import forward
+        exit_code = forward(args)
+        if exit_code is not None:
+            exit(exit_code)
         logger.debug("Spawning github ctl")
+        # Controller (and thus network dependencies) is imported only after arguments are parsed, so e.g. '--help'
+        # does not pay for it
+        from .github_controller import GithubController
         github_ctl = GithubController(args)
         github_ctl()
     except KeyboardInterrupt:
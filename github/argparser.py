@@ -2,14 +2,21 @@ from argparse import ArgumentParser
 
 arg_parser = ArgumentParser()
 
-actions = ['register',
-           'list-my-repositories',
-           'list-user-repositories',
-           'create-repository',
-           'create-new-repository',
-           'delete-repository',
-           'create-project',
-           'create-pull-request']
+# Actions and whether they can be executed from batch manifest, every new action has to be classified here
+actions = {'register': False,
+           'list-my-repositories': True,
+           'list-user-repositories': True,
+           'create-repository': True,
+           'create-new-repository': True,
+           'delete-repository': True,
+           'create-project': True,
+           'create-pull-request': True,
+           'create-pull-requests': True,
+           'batch': False,
+           'daemon': False,
+           'sync': True,
+           'find-repository': True,
+           'completion': False}
 
 arg_parser.add_argument("action",
                         nargs=1,
@@ -29,9 +36,28 @@ arg_parser.add_argument("--both_urls",
 arg_parser.add_argument("--https",
                         help="Show HTTPS URL instead of SSH",
                         action="store_true")
+arg_parser.add_argument("--fields",
+                        type=str,
+                        help="Comma separated extra repository fields to show in listings: stars, forks, updated_at, "
+                             "created_at, pushed_at, disk_usage, visibility, description, private, archived, fork")
+arg_parser.add_argument("--sort",
+                        type=str,
+                        help="Comma separated fields to sort listings by, prefix field with '-' for descending order, "
+                             "e.g. --sort=-stars,name")
+arg_parser.add_argument("--filter",
+                        action="append",
+                        help="Show only repositories whose field matches pattern (wildcards allowed), "
+                             "e.g. --filter visibility=PUBLIC, may be repeated")
+arg_parser.add_argument("--unique",
+                        type=str,
+                        help="Show only the first repository with each value of the field")
 arg_parser.add_argument("--no_numbers",
                         help="Disable number printing in lists",
                         action="store_true")
+arg_parser.add_argument("--format",
+                        help="Output format",
+                        choices=['text', 'json', 'ndjson', 'tsv', 'csv'],
+                        default='text')
 arg_parser.add_argument("--description",
                         nargs=1,
                         type=str,
@@ -44,6 +70,63 @@ arg_parser.add_argument("--no_confirm",
                         help="Disable confirmation dialogs",
                         action="store_true",
                         default=False)
+arg_parser.add_argument("--users_file",
+                        type=str,
+                        help="File with usernames (one per line) for list-user-repositories")
+arg_parser.add_argument("--repositories_file",
+                        type=str,
+                        help="File with repository names or patterns (one per line) for create-pull-requests")
+arg_parser.add_argument("--title",
+                        type=str,
+                        help="Title of pull requests created by create-pull-requests")
+arg_parser.add_argument("--head",
+                        type=str,
+                        help="Head branch of pull requests created by create-pull-requests")
+arg_parser.add_argument("--base",
+                        type=str,
+                        help="Base branch of pull requests created by create-pull-requests")
+arg_parser.add_argument("--body",
+                        type=str,
+                        help="Body of pull requests created by create-pull-requests")
+arg_parser.add_argument("--refresh",
+                        help="Ignore cached data and obtain them from Github again",
+                        action="store_true",
+                        default=False)
+arg_parser.add_argument("--offline",
+                        help="Answer listings from local repository index (see 'sync') without any request",
+                        action="store_true",
+                        default=False)
+arg_parser.add_argument("--dry_run",
+                        help="Print requests the action would send and rate limit budget they'd use (cost of GraphQL "
+                             "queries is obtained from Github, pages are estimated), nothing is changed",
+                        action="store_true")
+arg_parser.add_argument("--rate_limit",
+                        help="Show rate limit budget used by the command",
+                        action="store_true",
+                        default=False)
+arg_parser.add_argument("--profile",
+                        help="Print timing summary of requests, JSON decoding and rendering to standard error",
+                        action="store_true",
+                        default=False)
+arg_parser.add_argument("--trace_file",
+                        type=str,
+                        help="Write Chrome trace-event file (chrome://tracing, Perfetto) of the command")
+arg_parser.add_argument("--retries",
+                        type=int,
+                        default=3,
+                        help="Number of retries of transient failures (connection errors, 5xx responses)")
+arg_parser.add_argument("--timeout",
+                        type=float,
+                        default=30,
+                        help="Seconds to wait for Github API response before the request is retried")
+arg_parser.add_argument("--cache_ttl",
+                        type=int,
+                        default=60,
+                        help="Seconds for which cached GraphQL responses are used without asking Github API")
+arg_parser.add_argument("--workers",
+                        type=int,
+                        default=4,
+                        help="Number of actions executed concurrently in batch mode")
 
 
 def init_args():
@@ -1,5 +1,6 @@
+from functools import lru_cache
 from getpass import getpass
-from os import environ
+from os import environ, stat
 from os.path import dirname
 
 import github
@@ -7,41 +8,90 @@ from github.common import InvalidAPIKeyException
 from github.logger import logger
 
 
-def load_api_key():
+# Classic tokens have exactly 40 characters, fine-grained personal access tokens are longer and prefixed
+CLASSIC_API_KEY_LENGTH = 40
+FINE_GRAINED_API_KEY_PREFIX = 'github_pat_'
+# File with API keys in project's root, used when environmental variable 'GITHUB_API_KEY' isn't set
+API_KEY_FILE = f'{dirname(github.__file__)}/../api_key'
+
+
+def is_valid_api_key(api_key: str) -> bool:
+    """
+    Checks whether API key looks like Github token, either classic one or fine-grained one ('github_pat_...')
+    :param api_key: API key
+    :return: True if the key is well-formed, False otherwise
+    """
+    if not api_key or not api_key.replace('_', '').isalnum():
+        return False
+    if api_key.startswith(FINE_GRAINED_API_KEY_PREFIX):
+        return len(api_key) > len(FINE_GRAINED_API_KEY_PREFIX)
+    return len(api_key) == CLASSIC_API_KEY_LENGTH
+
+
+def load_api_keys() -> [str]:
     """
-    Function loads Github API key either from environmental variable 'GITHUB_API_KEY' or from file 'api_key' in
+    Function loads Github API keys either from environmental variable 'GITHUB_API_KEY' or from file 'api_key' in
     project's root.
 
-    Functions checks for system environmental variable called 'GITHUB_API_KEY' and if it exists, it checks whether this
-    variable is correct. If so, it's returned. If no 'GITHUB_AIP_KEY' variable is found, function looks for file
-    'api_key' in the project's root directory. In case it's found, its content is loaded anc checked. If everything is
-    all-right, value is returned. If not, exception is raised.
-    :return: API key, if it was successfully obtained
+    Environmental variable may contain several keys separated by commas or whitespace, the file may contain one key per
+    line (empty lines and lines starting with '#' are skipped). All keys must be well-formed, see is_valid_api_key.
+    Keys are read once per process (e.g. batch or daemon creates controller per item or command), they are read again
+    only when the variable or the file changes.
+    :return: list of API keys, if they were successfully obtained
     :raise: FileNotFoundError in case the 'api_key' file is missing completely
-    :raise: InvalidAPIKeyException in case the 'api_key' file exist, but is either missing the API key
+    :raise: InvalidAPIKeyException in case the variable or the 'api_key' file is either missing the API key or any of
+    the keys is malformed
     """
-    # First try, whether environmental variable 'GITHUB_API_KEY' exists
     try:
-        api_key = environ['GITHUB_API_KEY']
-        if len(api_key) != 40:
-            raise InvalidAPIKeyException
-    except KeyError:
+        status = stat(API_KEY_FILE)
+        key_file_version = (status.st_mtime_ns, status.st_size)
+    except OSError:
+        key_file_version = None
+    return list(read_api_keys(environ.get('GITHUB_API_KEY'), key_file_version))
+
+
+@lru_cache(maxsize=4)
+def read_api_keys(environment_value: str, key_file_version: tuple) -> (str,):
+    """
+    Reads API keys, see load_api_keys. Result is memoized, failures are not.
+    :param environment_value: value of environmental variable 'GITHUB_API_KEY', None if it isn't set
+    :param key_file_version: modification time and size of 'api_key' file, None if it's missing
+    :return: tuple of API keys
+    :raise: FileNotFoundError in case the 'api_key' file is missing completely
+    :raise: InvalidAPIKeyException in case the variable or the file is missing the API key or any of them is malformed
+    """
+    del key_file_version
+    # First try, whether environmental variable 'GITHUB_API_KEY' exists
+    if environment_value is None:
         # If it doesn't exist, however, it's not big deal
         logger.debug("No environ variable GITHUB_API_KEY")
     else:
-        return api_key
+        api_keys = environment_value.replace(',', ' ').split()
+        if not api_keys or not all(map(is_valid_api_key, api_keys)):
+            raise InvalidAPIKeyException
+        return tuple(api_keys)
     try:
-        with open(f'{dirname(github.__file__)}/../api_key') as key_file:
-            api_key = key_file.readline().strip()
-            if not api_key or len(api_key) != 40:
+        with open(API_KEY_FILE) as key_file:
+            api_keys = [line.strip() for line in key_file if line.strip() and not line.lstrip().startswith('#')]
+            if not api_keys or not all(map(is_valid_api_key, api_keys)):
                 raise InvalidAPIKeyException
-            logger.debug("Obtained API key from file")
-            return api_key
+            logger.debug("Obtained %d API key(s) from file", len(api_keys))
+            return tuple(api_keys)
     except FileNotFoundError:
         logger.error("API key file not found")
         raise
 
 
+def load_api_key() -> str:
+    """
+    Function loads Github API key, the first one in case several keys are provided, see load_api_keys
+    :return: API key, if it was successfully obtained
+    :raise: FileNotFoundError in case the 'api_key' file is missing completely
+    :raise: InvalidAPIKeyException in case the 'api_key' file exist, but is either missing the API key
+    """
+    return load_api_keys()[0]
+
+
 def register_api_key():
     """
     Registers API KEY and stores it in API KEY file located in application's root
@@ -53,15 +103,16 @@ def register_api_key():
 
     def register_the_key():
         _api_key = getpass("Please copy-paste (or type) you API KEY and press return. Characters will not be shown: ")
-        if len(_api_key) != 40:
-            raise InvalidAPIKeyException("Invalid length of API KEY (should be 40 characters)")
+        if not is_valid_api_key(_api_key):
+            raise InvalidAPIKeyException("Malformed API KEY (should be either 40 characters long or fine-grained token "
+                                         "starting with 'github_pat_')")
         try:
-            with open(f'{dirname(github.__file__)}/../api_key', "w") as key_file:
+            with open(API_KEY_FILE, "w") as key_file:
                 key_file.write(_api_key)
                 logger.info("API KEY written to api_key file")
                 return "API KEY successfully written to api_key file"
         except PermissionError as e:
-            logger.error(str(e))
+            logger.error("%s", e)
             return f"Error occurred: {str(e)}, key not written"
 
     try:
@@ -0,0 +1,76 @@
+from argparse import Namespace
+from json import loads
+from os.path import splitext
+
+from .argparser import actions
+
+# Actions which make no sense or are unsafe to be executed from manifest (e.g. blocking daemon), see actions
+FORBIDDEN_BATCH_ACTIONS = tuple(action for action, batchable in actions.items() if not batchable)
+
+
+def load_manifest(manifest_path: str) -> [dict]:
+    """
+    Loads batch manifest from JSON, NDJSON or YAML file
+
+    Manifest is a list of items, each of them describing one action, e.g.:
+    [{"action": "create-repository", "parameters": ["repo_name"], "private": true}]
+    JSON and YAML manifests may also wrap the list in dictionary under key 'actions'. NDJSON manifest contains one
+    item per line.
+    :param manifest_path: path to manifest file
+    :return: list of manifest items
+    :raise: ValueError in case the manifest is malformed
+    :raise: ImportError in case YAML manifest is provided, but PyYAML is not installed
+    """
+    extension = splitext(manifest_path)[1].lower()
+    with open(manifest_path) as manifest_file:
+        if extension in ('.ndjson', '.jsonl'):
+            items = [loads(line) for line in manifest_file if line.strip()]
+        elif extension in ('.yaml', '.yml'):
+            try:
+                from yaml import safe_load
+            except ImportError:
+                raise ImportError("PyYAML is required for YAML manifests, install it or use JSON/NDJSON manifest")
+            items = safe_load(manifest_file)
+        else:
+            items = loads(manifest_file.read())
+    if isinstance(items, dict):
+        items = items.get('actions')
+    if not isinstance(items, list) or not all(isinstance(item, dict) and 'action' in item for item in items):
+        raise ValueError("Manifest must be a list of items, each with 'action' key")
+    return items
+
+
+def manifest_item_args(item: dict, defaults: Namespace) -> Namespace:
+    """
+    Creates arguments namespace for one manifest item, values not provided in item are taken from defaults
+
+    :param item: manifest item, e.g. {"action": "delete-repository", "parameters": ["repo_name"]}
+    :param defaults: arguments of batch invocation
+    :return: namespace usable as GithubController arguments
+    :raise: ValueError in case the action is not allowed in batch
+    """
+    if item['action'] in FORBIDDEN_BATCH_ACTIONS:
+        raise ValueError(f"Action {item['action']} can not be used in batch")
+    item_args = Namespace(**vars(defaults))
+    for key, value in item.items():
+        setattr(item_args, key.replace('-', '_'), value)
+    item_args.action = [item['action']]
+    parameters = item.get('parameters', [])
+    item_args.parameters = [str(parameter) for parameter in
+                            (parameters if isinstance(parameters, list) else [parameters])]
+    if isinstance(item_args.description, str):
+        item_args.description = [item_args.description]
+    # Confirmation is asked once for the whole batch
+    item_args.no_confirm = True
+    return item_args
+
+
+def describe_item(item: dict) -> str:
+    """
+    Creates short human readable description of manifest item
+    :param item: manifest item
+    :return: description string
+    """
+    parameters = item.get('parameters', [])
+    parameters = parameters if isinstance(parameters, list) else [parameters]
+    return " ".join([item['action']] + [str(parameter) for parameter in parameters])
@@ -0,0 +1,4 @@
+from .cache_utils import cache_directory, api_key_hash
+from .viewer_cache import ViewerCache
+from .response_cache import ResponseCache
+from .repository_index import RepositoryIndex
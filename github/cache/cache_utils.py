@@ -0,0 +1,39 @@
+from hashlib import sha256
+from os import environ, makedirs, getpid
+from os.path import expanduser, join
+from threading import get_ident
+
+
+def cache_directory(*subdirectories: str) -> str:
+    """
+    Returns directory for application's cache files, creating it if necessary
+
+    Directory can be set using environmental variable 'GITHUB_CLI_CACHE_DIR', otherwise 'github_cli_app' directory in
+    'XDG_CACHE_HOME' (or '~/.cache') is used.
+    :param subdirectories: optional subdirectories of cache directory
+    :return: path to cache directory
+    """
+    directory = environ.get('GITHUB_CLI_CACHE_DIR') or join(environ.get('XDG_CACHE_HOME') or expanduser('~/.cache'),
+                                                            'github_cli_app')
+    directory = join(directory, *subdirectories)
+    makedirs(directory, exist_ok=True)
+    return directory
+
+
+def temporary_path(path: str) -> str:
+    """
+    Returns path of temporary file replacing provided file once it's written, unique per process and thread, so
+    concurrent writers (e.g. threads of different processes sharing thread id) never write into the same file
+    :param path: path of the file
+    :return: path of temporary file, ending with '.tmp'
+    """
+    return f'{path}.{getpid()}.{get_ident()}.tmp'
+
+
+def api_key_hash(api_key: str) -> str:
+    """
+    Hashes API key, so it can be used as cache key without storing the key itself
+    :param api_key: API key
+    :return: hex digest of the key
+    """
+    return sha256(str(api_key).encode()).hexdigest()
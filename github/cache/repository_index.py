@@ -0,0 +1,243 @@
+from contextlib import closing
+from json import dumps, loads
+from os import replace
+from os.path import dirname, join
+from time import time
+
+from .cache_utils import cache_directory, temporary_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    owner TEXT NOT NULL COLLATE NOCASE,
+    name TEXT NOT NULL COLLATE NOCASE,
+    updated_at TEXT,
+    node TEXT NOT NULL,
+    PRIMARY KEY (owner, name)
+);
+CREATE INDEX IF NOT EXISTS repositories_updated_at ON repositories (owner, updated_at);
+CREATE TABLE IF NOT EXISTS owners (
+    login TEXT PRIMARY KEY COLLATE NOCASE,
+    viewer_key TEXT,
+    synced_at REAL,
+    watermark TEXT
+);
+CREATE TABLE IF NOT EXISTS repository_ids (
+    viewer_key TEXT NOT NULL,
+    name TEXT NOT NULL COLLATE NOCASE,
+    id TEXT NOT NULL,
+    PRIMARY KEY (viewer_key, name)
+);
+CREATE INDEX IF NOT EXISTS repository_ids_id ON repository_ids (viewer_key, id);
+"""
+# Version of the schema stored as 'user_version' of the database, older databases are migrated by _connect
+SCHEMA_VERSION = 1
+# Plain text list of viewer's repository names next to the index, read directly by shell completion scripts
+REPOSITORY_NAMES_FILE = 'repository_names'
+
+
+class RepositoryIndex:
+    """
+    Local SQLite mirror of repositories, filled by 'sync' action and used by offline listings and 'find-repository'
+
+    Every repository is stored as GraphQL node (dictionary of its fields), so it can be packed the same way as
+    repositories obtained from Github. Viewer's login is stored with hash of API key, so viewer's repositories can be
+    listed without any request.
+
+    Node IDs of viewer's repositories (needed e.g. by 'createProject') are kept in separate map filled by any listing
+    of viewer's repositories, so they don't have to be resolved before every mutation. Names from the map are
+    exported into REPOSITORY_NAMES_FILE only when the map changes, so shell completion needs neither Python nor SQLite.
+    IDs are meant to be stored once per listing, not per page, as every call writes whole names file.
+    """
+    __slots__ = 'path',
+
+    def __init__(self, path: str = None):
+        self.path = path
+
+    def _index_path(self) -> str:
+        # Resolved lazily, so cache directory is created only when the index is actually used
+        return self.path if self.path else join(cache_directory(), 'repositories.sqlite')
+
+    def _connect(self):
+        from sqlite3 import connect
+        connection = connect(self._index_path())
+        connection.executescript(SCHEMA)
+        if connection.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Index created before sync watermark was stored, its owners are synced fully once again
+            if 'watermark' not in [column for _, column, *_ in connection.execute("PRAGMA table_info(owners)")]:
+                connection.execute("ALTER TABLE owners ADD COLUMN watermark TEXT")
+            connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            connection.commit()
+        return connection
+
+    def watermark(self, owner: str) -> str:
+        """
+        Returns the most recent 'updatedAt' of owner's repositories recorded by the last completed sync, repositories
+        stored by interrupted sync don't move it
+        :param owner: login of the owner
+        :return: ISO 8601 timestamp or None if the owner was never completely synced
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT watermark FROM owners WHERE login = ?", (owner,)).fetchone()
+        return row[0] if row else None
+
+    def store(self, owner: str, nodes: [dict]):
+        """
+        Inserts or updates repositories of the owner
+        :param owner: login of the owner
+        :param nodes: repository nodes, each containing at least 'name'
+        :return: None
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR REPLACE INTO repositories (owner, name, updated_at, node) "
+                                   "VALUES (?, ?, ?, ?)",
+                                   [(owner, node['name'], node.get('updatedAt'), dumps(node)) for node in nodes])
+
+    def prune(self, owner: str, names: [str]):
+        """
+        Removes repositories of the owner which are not among provided names, i.e. which were deleted or renamed
+        :param owner: login of the owner
+        :param names: names of all existing repositories of the owner
+        :return: number of removed repositories
+        """
+        existing = {name.lower() for name in names}
+        with closing(self._connect()) as connection, connection:
+            stale = [(owner, name) for name, in connection.execute("SELECT name FROM repositories WHERE owner = ?",
+                                                                   (owner,)) if name.lower() not in existing]
+            connection.executemany("DELETE FROM repositories WHERE owner = ? AND name = ?", stale)
+        return len(stale)
+
+    def remove(self, owner: str, name: str, viewer_key: str = None):
+        """
+        Removes single repository, e.g. after it was deleted
+        :param owner: login of the owner
+        :param name: name of the repository
+        :param viewer_key: hash of API key if the owner is viewer of the key, node ID of the repository is removed in
+        the same transaction, see remove_id
+        :return: None
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM repositories WHERE owner = ? AND name = ?", (owner, name))
+            if viewer_key:
+                self._remove_id(connection, viewer_key, name)
+
+    def mark_synced(self, owner: str, viewer_key: str = None, watermark: str = None):
+        """
+        Records time of the last completed sync of the owner
+        :param owner: login of the owner
+        :param viewer_key: hash of API key if the owner is viewer of the key
+        :param watermark: the most recent 'updatedAt' of owner's repositories, the next sync is incremental from it
+        :return: None
+        """
+        with closing(self._connect()) as connection, connection:
+            if viewer_key:
+                connection.execute("UPDATE owners SET viewer_key = NULL WHERE viewer_key = ?", (viewer_key,))
+            previous = connection.execute("SELECT viewer_key, watermark FROM owners WHERE login = ?",
+                                          (owner,)).fetchone() or (None, None)
+            connection.execute("INSERT OR REPLACE INTO owners (login, viewer_key, synced_at, watermark) "
+                               "VALUES (?, ?, ?, ?)",
+                               (owner, viewer_key or previous[0], time(), watermark or previous[1]))
+
+    def viewer_login(self, viewer_key: str) -> str:
+        """
+        Returns login of the viewer of API key, as stored by the last sync
+        :param viewer_key: hash of API key
+        :return: login or None if viewer's repositories were never synced
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT login FROM owners WHERE viewer_key = ?", (viewer_key,)).fetchone()
+        return row[0] if row else None
+
+    def store_ids(self, viewer_key: str, ids: {str: str}) -> bool:
+        """
+        Stores node IDs of viewer's repositories, name previously mapped to the same ID (i.e. repository was renamed)
+        is removed. Only changed IDs are written and names are exported only if any of them changed.
+        :param viewer_key: hash of API key
+        :param ids: dictionary of repository names and their node IDs
+        :return: True if the map changed
+        """
+        if not ids:
+            return False
+        with closing(self._connect()) as connection, connection:
+            stored = {name.lower(): (name, node_id) for name, node_id in connection.execute(
+                "SELECT name, id FROM repository_ids WHERE viewer_key = ?", (viewer_key,))}
+            changed = [(name, node_id) for name, node_id in ids.items() if stored.get(name.lower()) != (name, node_id)]
+            if not changed:
+                return False
+            connection.executemany("DELETE FROM repository_ids WHERE viewer_key = ? AND id = ? AND name != ?",
+                                   [(viewer_key, node_id, name) for name, node_id in changed])
+            connection.executemany("INSERT OR REPLACE INTO repository_ids (viewer_key, name, id) VALUES (?, ?, ?)",
+                                   [(viewer_key, name, node_id) for name, node_id in changed])
+            self._export_names(connection, viewer_key)
+        return True
+
+    def repository_ids(self, viewer_key: str, names: [str]) -> {str: str}:
+        """
+        Returns stored node IDs of viewer's repositories
+        :param viewer_key: hash of API key
+        :param names: names of the repositories
+        :return: dictionary of lowercase names and node IDs, names without stored ID are missing
+        """
+        with closing(self._connect()) as connection:
+            return {name.lower(): node_id for name, node_id in connection.execute(
+                f"SELECT name, id FROM repository_ids WHERE viewer_key = ? AND name IN "
+                f"({', '.join('?' * len(names))})", (viewer_key, *names))}
+
+    def remove_id(self, viewer_key: str, name: str):
+        """
+        Removes node ID of viewer's repository, e.g. after it was deleted
+        :param viewer_key: hash of API key
+        :param name: name of the repository
+        :return: None
+        """
+        with closing(self._connect()) as connection, connection:
+            self._remove_id(connection, viewer_key, name)
+
+    def _remove_id(self, connection, viewer_key: str, name: str):
+        if connection.execute("DELETE FROM repository_ids WHERE viewer_key = ? AND name = ?",
+                              (viewer_key, name)).rowcount:
+            self._export_names(connection, viewer_key)
+
+    def names_path(self) -> str:
+        return join(dirname(self._index_path()), REPOSITORY_NAMES_FILE)
+
+    def _export_names(self, connection, viewer_key: str):
+        names = [name for name, in connection.execute(
+            "SELECT name FROM repository_ids WHERE viewer_key = ? ORDER BY name", (viewer_key,))]
+        path = self.names_path()
+        temporary = temporary_path(path)
+        try:
+            with open(temporary, 'w') as names_file:
+                names_file.writelines(f'{name}\n' for name in names)
+            replace(temporary, path)
+        except OSError:
+            # Completion of repository names is only a convenience
+            pass
+
+    def count(self, owner: str) -> int:
+        with closing(self._connect()) as connection:
+            return connection.execute("SELECT COUNT(*) FROM repositories WHERE owner = ?", (owner,)).fetchone()[0]
+
+    def repositories(self, owner: str) -> [dict]:
+        """
+        Returns stored repositories of the owner ordered by name
+        :param owner: login of the owner
+        :return: list of repository nodes
+        """
+        with closing(self._connect()) as connection:
+            return [loads(node) for node, in connection.execute(
+                "SELECT node FROM repositories WHERE owner = ? ORDER BY name", (owner,))]
+
+    def find(self, pattern: str) -> [(str, dict)]:
+        """
+        Finds repositories whose name (or 'owner/name' if the pattern contains '/') matches the pattern, case
+        insensitive. Pattern may contain shell wildcards (*, ?, [...]), otherwise it matches any part of the name.
+        :param pattern: pattern, e.g. 'cli', 'github_*' or 'miskopo/*'
+        :return: list of tuples (owner, repository node) ordered by owner and name
+        """
+        pattern = pattern.lower()
+        if not any(wildcard in pattern for wildcard in '*?['):
+            pattern = f'*{pattern}*'
+        column = "lower(owner || '/' || name)" if '/' in pattern else "lower(name)"
+        with closing(self._connect()) as connection:
+            return [(owner, loads(node)) for owner, node in connection.execute(
+                f"SELECT owner, node FROM repositories WHERE {column} GLOB ? ORDER BY owner, name", (pattern,))]
@@ -0,0 +1,251 @@
+from hashlib import sha256
+from json import load, dump, dumps
+from os import listdir, remove, replace, stat, utime
+from os.path import join
+from threading import Lock
+from time import time
+
+from .cache_utils import cache_directory, api_key_hash, temporary_path
+from ..common import APIResponse
+from ..logger import logger
+
+
+class ResponseCache:
+    """
+    On-disk cache of API responses with size-bounded LRU eviction
+
+    REST responses are stored together with their ETag/Last-Modified headers, so they can be revalidated using
+    conditional requests. GraphQL responses are stored by hash of the query and are considered fresh for TTL seconds.
+    Entries are stored as files '<kind>-<hash>.json', last access is tracked by modification time of the file.
+
+    Size of the cache is counted once by listing the directory and then it's updated by every stored entry, the entries
+    are evicted only when the count exceeds MAX_SIZE. Entries written by other processes aren't counted until the next
+    eviction, so the limit is approximate.
+    """
+    __slots__ = 'directory', 'max_size', 'ttl', 'size', 'lock'
+    MAX_SIZE = 50 * 1024 * 1024
+    # Eviction removes entries until the cache fits into this fraction of MAX_SIZE, so it isn't repeated on every store
+    EVICTED_SIZE_RATIO = 0.8
+    TTL = 60
+    STORED_HEADERS = ('ETag', 'Last-Modified', 'Content-Type')
+
+    def __init__(self, directory: str = None, max_size: int = MAX_SIZE, ttl: int = TTL):
+        self.directory = directory
+        self.max_size = max_size
+        self.ttl = ttl
+        # Total size of entries, None until the directory is listed
+        self.size = None
+        self.lock = Lock()
+
+    def _cache_directory(self) -> str:
+        # Resolved lazily, so cache directory is created only when the cache is actually used
+        return self.directory if self.directory else cache_directory('responses')
+
+    @staticmethod
+    def key(kind: str, api_key: str, *parts: str) -> str:
+        """
+        Creates cache key for request, responses are never shared between different API keys
+        :param kind: kind of the request, e.g. 'rest' or 'graphql'
+        :param api_key: API key used for the request
+        :param parts: parts identifying the request, e.g. endpoint or query
+        :return: cache key
+        """
+        return f"{kind}-{sha256(chr(0).join((api_key_hash(api_key),) + parts).encode()).hexdigest()}"
+
+    def get(self, key: str) -> dict:
+        """
+        Returns cached entry and marks it as recently used
+        :param key: cache key
+        :return: entry dictionary with 'status_code', 'headers', 'text' and 'stored_at' keys or None if not cached
+        """
+        path = join(self._cache_directory(), f'{key}.json')
+        try:
+            with open(path) as entry_file:
+                entry = load(entry_file)
+            utime(path)
+        except (OSError, ValueError):
+            return None
+        logger.debug("Response cache hit: %s", key)
+        return entry
+
+    def is_fresh(self, entry: dict) -> bool:
+        """
+        Checks whether entry is younger than TTL
+        :param entry: cached entry
+        :return: True if the entry can be used without revalidation, False otherwise
+        """
+        return bool(entry) and time() - entry.get('stored_at', 0) <= self.ttl
+
+    def store(self, key: str, response: APIResponse):
+        """
+        Stores response in the cache and evicts least recently used entries if the cache is over its size limit
+        :param key: cache key
+        :param response: response to be stored
+        :return: None
+        """
+        entry = {'status_code': response.status_code,
+                 'headers': {header: response.headers[header] for header in self.STORED_HEADERS
+                             if header in response.headers},
+                 'text': response.text,
+                 'stored_at': time()}
+        path = join(self._cache_directory(), f'{key}.json')
+        previous_size = self.entry_size(path)
+        temporary = temporary_path(path)
+        try:
+            with open(temporary, 'w') as entry_file:
+                dump(entry, entry_file)
+                size = entry_file.tell()
+            replace(temporary, path)
+        except OSError as e:
+            logger.warning("Unable to write response cache: %s", e)
+            return
+        self.stored(size - previous_size)
+
+    @staticmethod
+    def entry_size(path: str) -> int:
+        """
+        :param path: path of cache entry
+        :return: size of the entry in bytes, 0 if it doesn't exist
+        """
+        try:
+            return stat(path).st_size
+        except OSError:
+            return 0
+
+    def stored(self, size_change: int):
+        """
+        Updates size of the cache after entry was stored and evicts least recently used entries if it's over its limit
+        :param size_change: number of bytes the cache grew by
+        :return: None
+        """
+        with self.lock:
+            if self.size is not None:
+                self.size += size_change
+            if self.size is None or self.size > self.max_size:
+                self.size = self.evict()
+
+    def writer(self, key: str, response: APIResponse):
+        """
+        Creates writer storing text of streamed response in the cache chunk by chunk
+        :param key: cache key
+        :param response: response whose text is going to be written
+        :return: ResponseCacheWriter
+        """
+        return ResponseCacheWriter(self, join(self._cache_directory(), f'{key}.json'), response)
+
+    def refresh(self, key: str, entry: dict):
+        """
+        Marks entry as revalidated, e.g. after server responded with 304 Not Modified
+        :param key: cache key
+        :param entry: cached entry
+        :return: None
+        """
+        self.store(key, self.to_response(entry))
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries if the cache is over its size limit, until it fits EVICTED_SIZE_RATIO of the
+        limit. Temporary files of entries being written aren't touched.
+        :return: total size of remaining entries
+        """
+        directory = self._cache_directory()
+        entries = []
+        for file_name in listdir(directory):
+            if not file_name.endswith('.json'):
+                continue
+            try:
+                file_stat = stat(join(directory, file_name))
+            except FileNotFoundError:
+                # Removed by another thread or process in the meantime
+                continue
+            entries.append((file_stat.st_mtime, file_stat.st_size, file_name))
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self.max_size:
+            return total_size
+        for _, size, file_name in sorted(entries):
+            if total_size <= self.max_size * self.EVICTED_SIZE_RATIO:
+                break
+            try:
+                remove(join(directory, file_name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+            logger.debug("Evicted %s from response cache", file_name)
+        return total_size
+
+    def invalidate(self, kind: str):
+        """
+        Removes all entries of provided kind, e.g. GraphQL queries after a mutation
+        :param kind: kind of the entries
+        :return: None
+        """
+        directory = self._cache_directory()
+        for file_name in listdir(directory):
+            if file_name.startswith(f'{kind}-') and file_name.endswith('.json'):
+                try:
+                    remove(join(directory, file_name))
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def to_response(entry: dict) -> APIResponse:
+        """
+        Creates response object from cached entry
+        :param entry: cached entry
+        :return: response equivalent to the cached one
+        """
+        return APIResponse(status_code=entry['status_code'], text=entry['text'], headers=entry['headers'])
+
+
+class ResponseCacheWriter:
+    """
+    Writes cache entry of streamed response, text is escaped and appended to the entry as it arrives, so the entry is
+    never held in memory. Entry is written into temporary file which replaces the cached one on commit.
+    """
+    __slots__ = 'cache', 'path', 'temporary', 'entry_file'
+
+    def __init__(self, cache: ResponseCache, path: str, response: APIResponse):
+        self.cache = cache
+        self.path = path
+        self.temporary = temporary_path(path)
+        entry = {'status_code': response.status_code,
+                 'headers': {header: response.headers[header] for header in cache.STORED_HEADERS
+                             if header in response.headers},
+                 'stored_at': time()}
+        try:
+            self.entry_file = open(self.temporary, 'w')
+            self.entry_file.write(f'{dumps(entry)[:-1]}, "text": "')
+        except OSError as e:
+            logger.warning("Unable to write response cache: %s", e)
+            self.entry_file = None
+
+    def write(self, text: str):
+        if self.entry_file:
+            # Escaped chunks joined together are the same as the whole escaped text
+            self.entry_file.write(dumps(text)[1:-1])
+
+    def commit(self):
+        if not self.entry_file:
+            return
+        previous_size = self.cache.entry_size(self.path)
+        try:
+            self.entry_file.write('"}')
+            size = self.entry_file.tell()
+            self.entry_file.close()
+            replace(self.temporary, self.path)
+        except OSError as e:
+            logger.warning("Unable to write response cache: %s", e)
+            self.discard()
+            return
+        self.entry_file = None
+        self.cache.stored(size - previous_size)
+
+    def discard(self):
+        if not self.entry_file:
+            return
+        self.entry_file.close()
+        self.entry_file = None
+        try:
+            remove(self.temporary)
+        except OSError:
+            pass
@@ -0,0 +1,61 @@
+from json import load, dump
+from os import replace
+from os.path import join
+from time import time
+
+from .cache_utils import cache_directory, api_key_hash, temporary_path
+from ..logger import logger
+
+
+class ViewerCache:
+    """
+    On-disk cache of viewer's login and id, entries are keyed by hash of API key and expire after TTL seconds
+    """
+    __slots__ = 'path', 'ttl'
+    TTL = 24 * 60 * 60
+
+    def __init__(self, path: str = None, ttl: int = TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def _cache_path(self) -> str:
+        # Resolved lazily, so cache directory is created only when the cache is actually used
+        return self.path if self.path else join(cache_directory(), 'viewer.json')
+
+    def _load(self) -> dict:
+        try:
+            with open(self._cache_path()) as cache_file:
+                return load(cache_file)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def get(self, api_key: str) -> dict:
+        """
+        Returns cached viewer of provided API key
+        :param api_key: API key
+        :return: dictionary with 'login' and 'id' keys or None if entry is missing or stale
+        """
+        entry = self._load().get(api_key_hash(api_key))
+        if not entry or time() - entry.get('stored_at', 0) > self.ttl:
+            logger.debug("Viewer cache miss")
+            return None
+        return entry
+
+    def store(self, api_key: str, login: str, viewer_id: str = None):
+        """
+        Stores viewer of provided API key
+        :param api_key: API key
+        :param login: viewer's login
+        :param viewer_id: viewer's node id
+        :return: None
+        """
+        entries = self._load()
+        entries[api_key_hash(api_key)] = {'login': login, 'id': viewer_id, 'stored_at': time()}
+        try:
+            cache_path = self._cache_path()
+            temporary = temporary_path(cache_path)
+            with open(temporary, 'w') as cache_file:
+                dump(entries, cache_file)
+            replace(temporary, cache_path)
+        except OSError as e:
+            logger.warning("Unable to write viewer cache: %s", e)
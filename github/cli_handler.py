@@ -1,4 +1,9 @@
-from colorama import Fore
+from collections.abc import Iterator
+import sys
+
+from .output_writer import create_writer
+from .repository_table import RepositoryTable
+from .tracing import tracer
 
 
 class CLIHandler:
@@ -8,20 +13,23 @@ class CLIHandler:
 
     @staticmethod
     def out(data_to_print, args):
-        if isinstance(data_to_print, list):
-            for i, list_item in enumerate(data_to_print):
-                if not args.no_numbers:
-                    print(f"{Fore.GREEN}{i+1}.{Fore.RESET}")
-                if isinstance(list_item, list) or isinstance(list_item, tuple):
-                    for list_item_sub_item in list_item:
-                        if list_item_sub_item:
-                            print(list_item_sub_item)
-                else:
-                    print(list_item)
-        elif isinstance(data_to_print, Exception):
-            print(str(data_to_print))
-        else:
-            print(data_to_print)
+        """
+        Writes data to standard output in format selected by '--format' (text by default)
+        :param data_to_print: list or iterator of items (written as they are produced), RepositoryTable, exception or
+        message
+        :param args: CLI arguments
+        :return: None
+        """
+        output_format = getattr(args, 'format', None) or 'text'
+        with tracer.span('render', 'render', format=output_format):
+            output_writer = create_writer(output_format, sys.stdout, args)
+            if isinstance(data_to_print, RepositoryTable):
+                output_writer.write_table(data_to_print)
+            elif isinstance(data_to_print, (list, Iterator)):
+                output_writer.write_list(data_to_print)
+            else:
+                output_writer.message(str(data_to_print))
+            output_writer.flush()
 
     @staticmethod
     def confirm_action(text_query: str = "This action is irreversible, are you sure to continue?") -> bool:
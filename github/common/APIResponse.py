@@ -0,0 +1,129 @@
+from codecs import getincrementaldecoder
+from json import loads
+
+from ..tracing import tracer
+
+
+class APIResponse:
+    """
+    Response of Github API whose body is decoded at most once, no matter how many times its content is accessed
+    """
+    __slots__ = 'status_code', 'headers', 'text', '_json', '_decoded'
+
+    def __init__(self, status_code: int = 200, text: str = '', headers: dict = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers if headers is not None else {}
+        self._json = None
+        self._decoded = False
+
+    @classmethod
+    def from_response(cls, response):
+        """
+        Creates APIResponse from HTTP response (e.g. requests.Response)
+        :param response: HTTP response
+        :return: APIResponse carrying status code, headers and body of the response
+        """
+        return cls(status_code=response.status_code, text=response.text, headers=response.headers)
+
+    def iter_text(self):
+        """
+        Iterates text of the response in chunks, see StreamedAPIResponse
+        :return: text chunks
+        """
+        if self.text:
+            yield self.text
+
+    def complete(self, valid: bool = True):
+        """
+        Called once the response was processed, see StreamedAPIResponse
+        :param valid: whether the response was valid, e.g. it contained no GraphQL errors
+        :return: None
+        """
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 400
+
+    @property
+    def json(self):
+        """
+        Decoded body of the response, None if the body is empty or not valid JSON
+        """
+        if not self._decoded:
+            with tracer.span('json decode', 'decode', characters=len(self.text)):
+                try:
+                    self._json = loads(self.text) if self.text else None
+                except ValueError:
+                    self._json = None
+            self._decoded = True
+        return self._json
+
+    @property
+    def data(self):
+        """
+        'data' of GraphQL response
+        """
+        return self.json.get('data') if isinstance(self.json, dict) else None
+
+    @property
+    def errors(self):
+        """
+        'errors' of GraphQL or REST response, None if there are none
+        """
+        return self.json.get('errors') if isinstance(self.json, dict) else None
+
+    @property
+    def message(self) -> str:
+        """
+        'message' of REST error response
+        """
+        return self.json.get('message', '') if isinstance(self.json, dict) else ''
+
+
+class StreamedAPIResponse(APIResponse):
+    """
+    Response whose body is not read in advance, it's decoded from the connection chunk by chunk while iterating
+    iter_text, so the whole body is never held in memory. The body can be iterated only once, the connection is
+    released when the iteration ends.
+
+    Chunks may be written into response cache while they're passed through, the cache entry is committed by complete.
+    """
+    __slots__ = 'http_response', 'cache_writer'
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, http_response, cache_writer=None):
+        super().__init__(status_code=http_response.status_code, headers=http_response.headers)
+        self.http_response = http_response
+        self.cache_writer = cache_writer
+
+    @classmethod
+    def from_response(cls, response):
+        return cls(response)
+
+    def iter_text(self):
+        decoder = getincrementaldecoder(self.http_response.encoding or 'utf-8')('replace')
+        try:
+            with self.http_response:
+                for chunk in self.http_response.iter_content(self.CHUNK_SIZE):
+                    text = decoder.decode(chunk)
+                    if text:
+                        if self.cache_writer:
+                            self.cache_writer.write(text)
+                        yield text
+                text = decoder.decode(b'', final=True)
+                if text:
+                    if self.cache_writer:
+                        self.cache_writer.write(text)
+                    yield text
+        except BaseException:
+            self.complete(False)
+            raise
+
+    def complete(self, valid: bool = True):
+        if self.cache_writer:
+            if valid:
+                self.cache_writer.commit()
+            else:
+                self.cache_writer.discard()
+            self.cache_writer = None
@@ -0,0 +1,3 @@
+class CircuitOpenException(Exception):
+    def __init__(self, *args):
+        super(CircuitOpenException, self).__init__(*args)
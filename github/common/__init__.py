@@ -1,5 +1,8 @@
 from .deprecated_decorator import deprecated
+from .APIResponse import APIResponse, StreamedAPIResponse
+from .CircuitOpenException import CircuitOpenException
 from .InvalidAPIKeyException import InvalidAPIKeyException
 from .InvalidNumberOfArgumentsException import InvalidNumberOfArgumentsException
+from .json_stream import EdgesStream
 from .graphql_utils import check_qraphql_response
 from .rest_utils import check_restful_response
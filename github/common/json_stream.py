@@ -0,0 +1,133 @@
+from json import JSONDecoder
+
+WHITESPACE = ' \t\n\r'
+
+
+class EdgesStream:
+    """
+    Incremental decoder of edges of GraphQL connection, e.g. 'data.viewer.repositories.edges'
+
+    Response text is consumed chunk by chunk and edges are yielded one at a time as soon as they are complete, so only
+    a single edge and unparsed rest of the current chunk are held in memory, no matter how large the page is. Values
+    outside of the path to edges (e.g. 'totalCount', 'pageInfo' or 'errors') are decoded as usual and once all edges
+    were yielded, they're available in 'document' (with edges replaced by empty list).
+    """
+    __slots__ = 'chunks', 'path', 'document', 'count', 'buffer', 'position', 'exhausted'
+    decoder = JSONDecoder()
+
+    def __init__(self, chunks, path: tuple):
+        """
+        :param chunks: iterable of text chunks of the response
+        :param path: keys leading to the list of edges, None matches any key, e.g. ('data', None, 'repositories',
+        'edges')
+        """
+        self.chunks = iter(chunks)
+        self.path = path
+        self.document = None
+        self.count = 0
+        self.buffer = ''
+        self.position = 0
+        self.exhausted = False
+
+    @property
+    def errors(self):
+        """
+        'errors' of GraphQL response, available after all edges were yielded
+        """
+        return self.document.get('errors') if isinstance(self.document, dict) else None
+
+    def __iter__(self):
+        if self._peek() == '{':
+            self.document = {}
+            yield from self._walk(0, self.document)
+        else:
+            self.document = self._decode()
+        if self._peek():
+            raise ValueError(f"Extra data at position {self.position} of the response")
+
+    def _fill(self) -> bool:
+        # Consumed part of the buffer is dropped, so the buffer never grows beyond unparsed data and one chunk
+        if self.exhausted:
+            return False
+        for chunk in self.chunks:
+            if chunk:
+                self.buffer = self.buffer[self.position:] + chunk
+                self.position = 0
+                return True
+        self.exhausted = True
+        return False
+
+    def _peek(self) -> str:
+        """
+        Skips whitespace and returns next character without consuming it, empty string at the end of the response
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer) or not self._fill():
+                return self.buffer[self.position:self.position + 1]
+
+    def _expect(self, characters: str) -> str:
+        character = self._peek()
+        if not character or character not in characters:
+            raise ValueError(f"Expected one of '{characters}' at position {self.position} of the response, "
+                             f"got '{character}'")
+        self.position += 1
+        return character
+
+    def _decode(self):
+        """
+        Decodes complete JSON value at current position, more chunks are read until the value is complete
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # Number at the end of the buffer may continue in next chunk
+                if end < len(self.buffer) or self.exhausted:
+                    self.position = end
+                    return value
+            except ValueError:
+                if self.exhausted:
+                    raise
+            self._fill()
+
+    def _walk(self, depth: int, container: dict):
+        """
+        Walks members of object at given depth of the path, descending into members on the path to edges
+        :param depth: index of the path's key matched by members of the object
+        :param container: dictionary collecting members outside of the path
+        :return: edges one at a time
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.position += 1
+            return
+        while True:
+            key = self._decode()
+            self._expect(':')
+            step = self.path[depth]
+            last = depth == len(self.path) - 1
+            if (step is None or step == key) and self._peek() == ('[' if last else '{'):
+                if last:
+                    container[key] = []
+                    yield from self._elements()
+                else:
+                    container[key] = {}
+                    yield from self._walk(depth + 1, container[key])
+            else:
+                container[key] = self._decode()
+            if self._expect(',}') == '}':
+                return
+
+    def _elements(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self.position += 1
+            return
+        while True:
+            edge = self._decode()
+            self.count += 1
+            yield edge
+            if self._expect(',]') == ']':
+                return
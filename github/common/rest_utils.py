@@ -1,18 +1,12 @@
-from json import loads
-
-
 def check_restful_response(response) -> (bool, str):
     """
     Method checks response from REST API requests
-    :param response: response to be checked
+    :param response: APIResponse to be checked
     :return: True if there is no error in response, False otherwise
     """
     if response and response.ok:
-        try:
-            error_message = loads(response.text)['errors']
-        except (TypeError, KeyError):
+        if response.errors is None:
             return True, None
-        else:
-            return False, error_message
+        return False, response.errors
     else:
         return False, "No response"
@@ -0,0 +1,207 @@
+"""
+Generator of shell completion scripts (bash, zsh, fish)
+
+Actions and options are taken from the argument parser, so the scripts never get out of date. Repository names are
+read by the scripts from plain text file exported by repository index (see REPOSITORY_NAMES_FILE), completion thus
+doesn't start Python at all and never sends any request.
+"""
+from os import environ
+from os.path import basename
+
+from .argparser import arg_parser, actions
+from .cache.repository_index import REPOSITORY_NAMES_FILE
+
+SHELLS = ('bash', 'zsh', 'fish')
+# Actions whose first parameter is viewer's repository
+REPOSITORY_ACTIONS = ('delete-repository', 'create-pull-request')
+# Actions whose parameters are viewer's repositories (create-project: all but the last one)
+REPOSITORIES_ACTIONS = ('create-project', 'create-pull-requests')
+# Actions and options whose value is a file
+FILE_ACTIONS = ('batch',)
+FILE_OPTIONS = ('--users_file', '--repositories_file', '--trace_file')
+
+# Cache directory resolved the same way as by cache_directory()
+SHELL_CACHE_DIRECTORY = '${GITHUB_CLI_CACHE_DIR:-${XDG_CACHE_HOME:-$HOME/.cache}/github_cli_app}'
+
+# Case branch completing choices of an option
+BASH_CHOICES = '''        %s)
+            COMPREPLY=( $(compgen -W "%s" -- "${cur}") )
+            return 0 ;;'''
+ZSH_CHOICES = '''        %s)
+            compadd -- %s
+            return ;;'''
+
+BASH_TEMPLATE = '''# bash completion of github, generated by 'github completion bash'
+_github_repositories()
+{
+    local names="%(cache)s/%(names_file)s"
+    [[ -r ${names} ]] && echo $(< "${names}")
+}
+
+_github()
+{
+    local cur prev word action i position=0
+    COMPREPLY=()
+    cur="${COMP_WORDS[COMP_CWORD]}"
+    prev="${COMP_WORDS[COMP_CWORD-1]}"
+    case "${prev}" in
+%(choices)s
+        %(file_options)s)
+            COMPREPLY=( $(compgen -f -- "${cur}") )
+            return 0 ;;
+        %(value_options)s)
+            return 0 ;;
+    esac
+    if [[ ${cur} == -* ]] ; then
+        COMPREPLY=( $(compgen -W "%(options)s" -- "${cur}") )
+        return 0
+    fi
+    for (( i=1; i < COMP_CWORD; i++ )); do
+        word="${COMP_WORDS[i]}"
+        if [[ ${word} == -* ]] ; then
+            [[ " %(all_value_options)s " == *" ${word} "* ]] && (( i++ ))
+        elif [[ -z ${action} ]] ; then
+            action="${word}"
+        else
+            (( position++ ))
+        fi
+    done
+    case "${action}" in
+        "")
+            COMPREPLY=( $(compgen -W "%(actions)s" -- "${cur}") ) ;;
+        %(repository_actions)s)
+            (( position == 0 )) && COMPREPLY=( $(compgen -W "$(_github_repositories)" -- "${cur}") ) ;;
+        %(repositories_actions)s)
+            COMPREPLY=( $(compgen -W "$(_github_repositories)" -- "${cur}") ) ;;
+        %(file_actions)s)
+            COMPREPLY=( $(compgen -f -- "${cur}") ) ;;
+    esac
+    return 0
+}
+complete -F _github github
+'''
+
+ZSH_TEMPLATE = '''#compdef github
+# zsh completion of github, generated by 'github completion zsh'
+_github() {
+    local names="%(cache)s/%(names_file)s"
+    local word action i position=0
+    local -a value_options
+    value_options=(%(all_value_options)s)
+    case $words[CURRENT-1] in
+%(choices)s
+        %(file_options)s)
+            _files
+            return ;;
+        %(value_options)s)
+            return ;;
+    esac
+    if [[ $PREFIX == -* ]]; then
+        compadd -- %(options)s
+        return
+    fi
+    for (( i = 2; i < CURRENT; i++ )); do
+        word=$words[i]
+        if [[ $word == -* ]]; then
+            (( ${value_options[(Ie)$word]} )) && (( i++ ))
+        elif [[ -z $action ]]; then
+            action=$word
+        else
+            (( position++ ))
+        fi
+    done
+    case $action in
+        "")
+            compadd -- %(actions)s ;;
+        %(repository_actions)s)
+            (( position == 0 )) && [[ -r $names ]] && compadd -- ${(f)"$(<$names)"} ;;
+        %(repositories_actions)s)
+            [[ -r $names ]] && compadd -- ${(f)"$(<$names)"} ;;
+        %(file_actions)s)
+            _files ;;
+    esac
+}
+compdef _github github
+'''
+
+FISH_TEMPLATE = '''# fish completion of github, generated by 'github completion fish'
+function __github_repositories
+    set -l directory $GITHUB_CLI_CACHE_DIR
+    if test -z "$directory"
+        set directory $XDG_CACHE_HOME
+        test -z "$directory"; and set directory $HOME/.cache
+        set directory $directory/github_cli_app
+    end
+    test -r $directory/%(names_file)s; and cat $directory/%(names_file)s
+end
+
+complete -c github -f
+complete -c github -n __fish_use_subcommand -a '%(actions)s'
+complete -c github -n '__fish_seen_subcommand_from %(all_repository_actions)s' -a '(__github_repositories)'
+complete -c github -n '__fish_seen_subcommand_from %(file_actions)s' -F
+%(options)s
+'''
+
+
+def parser_options(parser=arg_parser) -> [(str, bool, list, str)]:
+    """
+    Lists long options of the parser
+    :param parser: argument parser
+    :return: list of tuples (option, whether it takes value, choices, help)
+    """
+    return [(option, action.nargs != 0, list(action.choices or []), action.help or '')
+            for action in parser._actions for option in action.option_strings if option.startswith('--')]
+
+
+def fish_quote(text: str) -> str:
+    return "'" + text.replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def completion_script(shell: str, parser=arg_parser) -> str:
+    """
+    Generates completion script of the shell
+    :param shell: one of SHELLS
+    :param parser: argument parser whose actions and options are completed
+    :return: script to be sourced by the shell
+    :raise: ValueError in case of unsupported shell
+    """
+    options = parser_options(parser)
+    fragments = {
+        'cache': SHELL_CACHE_DIRECTORY,
+        'names_file': REPOSITORY_NAMES_FILE,
+        'actions': ' '.join(actions),
+        'options': ' '.join(option for option, _, _, _ in options),
+        'all_value_options': ' '.join(option for option, takes_value, _, _ in options if takes_value),
+        'value_options': '|'.join(option for option, takes_value, choices, _ in options
+                                  if takes_value and not choices and option not in FILE_OPTIONS),
+        'file_options': '|'.join(FILE_OPTIONS),
+        'repository_actions': '|'.join(REPOSITORY_ACTIONS),
+        'repositories_actions': '|'.join(REPOSITORIES_ACTIONS),
+        'file_actions': '|'.join(FILE_ACTIONS),
+    }
+    if shell == 'bash':
+        fragments['choices'] = '\n'.join(BASH_CHOICES % (option, ' '.join(choices))
+                                         for option, _, choices, _ in options if choices)
+        return BASH_TEMPLATE % fragments
+    if shell == 'zsh':
+        fragments['choices'] = '\n'.join(ZSH_CHOICES % (option, ' '.join(choices))
+                                         for option, _, choices, _ in options if choices)
+        return ZSH_TEMPLATE % fragments
+    if shell == 'fish':
+        fragments['all_repository_actions'] = ' '.join(REPOSITORY_ACTIONS + REPOSITORIES_ACTIONS)
+        fragments['file_actions'] = ' '.join(FILE_ACTIONS)
+        fragments['options'] = '\n'.join(
+            f"complete -c github -l {option[2:]}" +
+            (' -r -F' if option in FILE_OPTIONS else
+             f" -x -a {fish_quote(' '.join(choices))}" if choices else ' -x' if takes_value else '') +
+            f" -d {fish_quote(help_text)}" for option, takes_value, choices, help_text in options)
+        return FISH_TEMPLATE % fragments
+    raise ValueError(f"Unsupported shell {shell}, supported shells: {', '.join(SHELLS)}")
+
+
+def default_shell() -> str:
+    """
+    :return: name of user's shell if it's supported, bash otherwise
+    """
+    shell = basename(environ.get('SHELL', ''))
+    return shell if shell in SHELLS else 'bash'
@@ -0,0 +1,251 @@
+"""
+Resident daemon keeping warm GithubController (connection pool, caches, API key, rate limit budget) between commands
+
+'github daemon' listens on Unix domain socket, regular 'github' invocations forward parsed arguments to it and only
+relay its output, so they don't pay for imports of network stack, API key loading and new TLS connections. When no
+daemon is running (or the command needs terminal, e.g. confirmation prompt), command is executed in-process as usual.
+
+Protocol: client sends one JSON line {"args": {...}, "cwd": "...", "stdout_tty": bool, "stderr_tty": bool,
+"environment": "..."}, daemon replies with JSON lines {"out": "..."} / {"err": "..."} and finally {"exit": code}.
+Commands are executed one at a time with their own retry policy, cache TTL and profiling. Daemon replies
+{"refused": "..."} to client whose API key or environment differs from daemon's (see environment_fingerprint), such
+command is executed in-process.
+"""
+from argparse import Namespace
+from contextlib import redirect_stdout, redirect_stderr
+from json import dumps, loads
+import os
+import socket
+import stat
+import sys
+from tempfile import gettempdir
+
+SOCKET_ENV = 'GITHUB_CLI_SOCKET'
+DISABLE_ENV = 'GITHUB_CLI_NO_DAEMON'
+# Environmental variables changing behaviour of commands (API key, cache directory, logging), daemon executes only
+# commands of clients with the same values
+FINGERPRINT_ENV = ('GITHUB_API_KEY', 'GITHUB_CLI_CACHE_DIR', 'XDG_CACHE_HOME', 'HOME', 'GITHUB_CLI_LOG_FILE',
+                   'GITHUB_CLI_LOG_LEVEL', 'GITHUB_CLI_LOG_FORMAT')
+
+
+def socket_path() -> str:
+    """
+    Returns path of daemon's socket, it can be set using environmental variable 'GITHUB_CLI_SOCKET', otherwise it's
+    placed in 'XDG_RUNTIME_DIR' (or user's private directory in temp)
+    :return: path to socket
+    :raise: ValueError in case the directory in temp isn't private, see private_directory
+    """
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.path.join(os.environ['XDG_RUNTIME_DIR'], 'github_cli_app.sock')
+    return os.path.join(private_directory(os.path.join(gettempdir(), f'github_cli_app-{os.getuid()}')),
+                        'github_cli_app.sock')
+
+
+def private_directory(directory: str) -> str:
+    """
+    Creates directory accessible only by the user. Directory in shared location (e.g. temp) may have been created by
+    another user to hijack the socket, so existing directory is accepted only if it's owned by the user and private.
+    :param directory: path to directory
+    :return: the path
+    :raise: ValueError in case the directory is owned by another user, accessible by others or isn't directory
+    """
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    status = os.lstat(directory)
+    if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid() or stat.S_IMODE(status.st_mode) != 0o700:
+        raise ValueError(f"Directory {directory} isn't private, it must be owned by the user and have mode 700")
+    return directory
+
+
+def environment_fingerprint() -> str:
+    """
+    Hashes API key and environment the command would be executed with, see FINGERPRINT_ENV. Modification time of API
+    key file is included as well, so key registered after daemon was started isn't silently replaced by the old one.
+    :return: hex digest
+    """
+    from hashlib import sha256
+    from .authentication import API_KEY_FILE
+
+    try:
+        key_file_modified = os.stat(API_KEY_FILE).st_mtime_ns
+    except OSError:
+        key_file_modified = None
+    values = [os.environ.get(name) for name in FINGERPRINT_ENV] + [key_file_modified]
+    return sha256(dumps(values).encode()).hexdigest()
+
+
+def requires_terminal(args) -> bool:
+    """
+    Checks whether the command may ask user for input, such commands are never forwarded to daemon
+    :param args: CLI arguments
+    :return: True if the command has to be executed in-process
+    """
+    action = args.action[0]
+    return action in ('register', 'daemon') or (action in ('delete-repository', 'batch') and not args.no_confirm)
+
+
+def forward(args, path: str = None):
+    """
+    Forwards command to running daemon and relays its output to standard output and error
+    :param args: CLI arguments
+    :param path: path to daemon's socket, default socket_path()
+    :return: exit code of the command, None if no daemon is available (or it refused the command due to different
+    environment) and command has to be executed in-process
+    """
+    if os.environ.get(DISABLE_ENV) or not hasattr(socket, 'AF_UNIX') or requires_terminal(args):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path or socket_path())
+    except (OSError, ValueError):
+        connection.close()
+        return None
+    with connection, connection.makefile('rwb') as stream:
+        request = {'args': vars(args), 'cwd': os.getcwd(), 'stdout_tty': sys.stdout.isatty(),
+                   'stderr_tty': sys.stderr.isatty(), 'environment': environment_fingerprint()}
+        stream.write(f"{dumps(request)}\n".encode())
+        stream.flush()
+        for line in stream:
+            message = loads(line)
+            if 'out' in message:
+                sys.stdout.write(message['out'])
+                sys.stdout.flush()
+            elif 'err' in message:
+                sys.stderr.write(message['err'])
+                sys.stderr.flush()
+            elif 'exit' in message:
+                return message['exit']
+            elif 'refused' in message:
+                return None
+    sys.stderr.write("Connection to daemon was lost\n")
+    return 1
+
+
+class ForwardedStream:
+    """
+    File-like object standing for client's standard output or error inside daemon
+    """
+    __slots__ = 'connection', 'key', 'tty'
+
+    def __init__(self, connection, key: str, tty: bool):
+        self.connection = connection
+        self.key = key
+        self.tty = tty
+
+    def write(self, text: str) -> int:
+        if text:
+            self.connection.write(f"{dumps({self.key: text})}\n".encode())
+        return len(text)
+
+    def flush(self):
+        self.connection.flush()
+
+    def isatty(self) -> bool:
+        return self.tty
+
+
+def create_server(path: str, controller):
+    """
+    Creates daemon server bound to provided socket, stale socket of dead daemon is replaced
+    :param path: path to socket
+    :param controller: GithubController with loaded API key, it's reused by all commands
+    :return: server, not yet serving
+    :raise: ValueError in case another daemon is already listening on the socket
+    """
+    from socketserver import UnixStreamServer, StreamRequestHandler
+    from .cli_handler import CLIHandler
+    from .traced_adapter import TracedHTTPAdapter
+    from .tracing import tracer
+
+    fingerprint = environment_fingerprint()
+
+    class DaemonRequestHandler(StreamRequestHandler):
+        def handle(self):
+            request = loads(self.rfile.readline())
+            if request.get('environment') != fingerprint:
+                # Command would be executed with daemon's API key and settings instead of client's
+                self.wfile.write(f"{dumps({'refused': 'API key or environment differs from daemon'})}\n".encode())
+                return
+            args = Namespace(**request['args'])
+            daemon_settings = (controller.args, controller.retry_policy, controller.session,
+                               controller.response_cache.ttl)
+            daemon_cwd = os.getcwd()
+            exit_code = 0
+            try:
+                with redirect_stdout(ForwardedStream(self.wfile, 'out', request.get('stdout_tty', False))), \
+                        redirect_stderr(ForwardedStream(self.wfile, 'err', request.get('stderr_tty', False))):
+                    try:
+                        os.chdir(request.get('cwd') or os.getcwd())
+                        if args.profile or args.trace_file:
+                            tracer.enable()
+                            if not isinstance(controller.session.get_adapter('https://'), TracedHTTPAdapter):
+                                # Connections of daemon's pool aren't traced, profiled command opens its own
+                                controller.session = controller.create_session(traced=True)
+                        controller.args = args
+                        # Retries, timeout and cache TTL of the client, failures are counted by daemon's circuit breaker
+                        controller.retry_policy = controller.create_retry_policy(
+                            args, daemon_settings[1].circuit_breaker)
+                        if getattr(args, 'cache_ttl', None) is not None:
+                            controller.response_cache.ttl = args.cache_ttl
+                        if not controller.process_args():
+                            exit_code = 1
+                    except Exception as e:
+                        # Same top level handling as in-process execution
+                        CLIHandler.out(str(e), None)
+                        exit_code = 1
+                    finally:
+                        if controller.session is not daemon_settings[2]:
+                            controller.session.close()
+                        controller.args, controller.retry_policy, controller.session, controller.response_cache.ttl = \
+                            daemon_settings
+                        os.chdir(daemon_cwd)
+                        tracer.disable()
+                self.wfile.write(f"{dumps({'exit': exit_code})}\n".encode())
+            except (BrokenPipeError, ConnectionResetError):
+                # Client went away, e.g. interrupted by user
+                pass
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            raise ValueError(f"Daemon is already running on {path}")
+        except ConnectionRefusedError:
+            os.unlink(path)
+        finally:
+            probe.close()
+    # Socket is accessible only by its owner, as the daemon acts with owner's API key
+    old_umask = os.umask(0o177)
+    try:
+        return UnixStreamServer(path, DaemonRequestHandler)
+    finally:
+        os.umask(old_umask)
+
+
+def serve(controller, path: str = None) -> str:
+    """
+    Runs daemon in foreground until interrupted
+    :param controller: GithubController with loaded API key, it's reused by all forwarded commands
+    :param path: path to socket, default socket_path()
+    :return: message describing why the daemon ended
+    """
+    from .cli_handler import CLIHandler
+
+    path = path or socket_path()
+    server = create_server(path, controller)
+    CLIHandler.out(f"Daemon listening on {path}", None)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.unlink(path)
+    return "Daemon stopped"
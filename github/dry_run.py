@@ -0,0 +1,165 @@
+from json import dumps
+from math import ceil
+from threading import Lock
+
+from .common import APIResponse
+from .queries.graphQL_query import RATE_LIMIT
+
+# Top level field whose cost is computed by Github without evaluating the rest of the query
+DRY_RUN_FIELD = 'rateLimit(dryRun: true) { cost }'
+
+
+class PlannedRequest:
+    """
+    Request which would be sent by the action, possibly paginated
+    """
+    __slots__ = 'kind', 'description', 'pages', 'cost', 'estimated'
+
+    def __init__(self, kind: str, description: str, pages: int = 1, cost: int = 1, estimated: bool = False):
+        """
+        :param kind: rate limit budget used by the request, 'rest' or 'graphql'
+        :param description: e.g. 'query viewer.repositories' or 'POST https://api.github.com/user/repos'
+        :param pages: number of pages (requests) estimated from 'totalCount'
+        :param cost: cost of one page, in points for GraphQL and in requests for REST
+        :param estimated: cost isn't reported by Github (e.g. of mutation), it's only estimated
+        """
+        self.kind = kind
+        self.description = description
+        self.pages = pages
+        self.cost = cost
+        self.estimated = estimated
+
+    def __str__(self):
+        if self.kind == 'rest':
+            return f"REST {self.description}"
+        cost = f"cost {self.cost}{' (estimated)' if self.estimated else ''}"
+        if self.pages > 1:
+            return f"GraphQL {self.description}: {self.pages} pages x {cost} = {self.pages * self.cost} points"
+        return f"GraphQL {self.description}: {cost}"
+
+
+class DryRunPlanner:
+    """
+    Collects requests planned by action run with '--dry_run', nothing is changed by the run
+
+    Mutations (GraphQL mutations, REST POST and DELETE) are only recorded, GraphQL queries are sent because later
+    requests depend on them (e.g. node IDs), but only their first page is fetched and number of pages is estimated
+    from 'totalCount'. Cost of every distinct query is obtained from Github by dry run of the query, see
+    DRY_RUN_FIELD. Requests sent by the planner itself are counted separately.
+    """
+    __slots__ = 'requests', 'costs', 'sent', 'lock'
+    # Github doesn't compute cost of mutations in advance, single mutation costs one point
+    MUTATION_COST = 1
+
+    def __init__(self):
+        self.requests = []
+        self.costs = {}
+        self.sent = 0
+        self.lock = Lock()
+
+    def record(self, kind: str, description: str, pages: int = 1, cost: int = 1, estimated: bool = False):
+        """
+        Records planned request, see PlannedRequest
+        :return: None
+        """
+        with self.lock:
+            self.requests.append(PlannedRequest(kind, description, pages, cost, estimated))
+
+    def record_sent(self):
+        """
+        Counts request sent by the planner itself
+        :return: None
+        """
+        with self.lock:
+            self.sent += 1
+
+    @staticmethod
+    def cost_query(json_data: dict) -> dict:
+        """
+        Creates dry run of GraphQL query, DRY_RUN_FIELD is added to top level selection of the document instead of
+        'rateLimit' selected by paginated queries
+        :param json_data: payload of the query
+        :return: payload of the dry run
+        """
+        document = json_data['query'].replace(RATE_LIMIT.format(), '')
+        start = document.index('{') + 1
+        return dict(json_data, query=f"{document[:start]} {DRY_RUN_FIELD} {document[start:]}")
+
+    def query_cost(self, json_data: dict, send) -> (int, bool):
+        """
+        Obtains cost of GraphQL query, cost of each distinct document (and page size) is obtained only once
+        :param json_data: payload of the query
+        :param send: function sending payload, it returns API response
+        :return: tuple (cost, whether the cost is only estimated, i.e. Github didn't report it)
+        """
+        key = (json_data['query'], (json_data.get('variables') or {}).get('first'))
+        with self.lock:
+            if key in self.costs:
+                return self.costs[key]
+        response = send(self.cost_query(json_data))
+        self.record_sent()
+        data = response.data if isinstance(response.data, dict) else {}
+        cost = (data.get('rateLimit') or {}).get('cost')
+        result = (cost, False) if isinstance(cost, int) else (1, True)
+        with self.lock:
+            self.costs[key] = result
+        return result
+
+    @staticmethod
+    def first_page(json_data: dict, response: APIResponse) -> (int, APIResponse):
+        """
+        Estimates number of pages of paginated query from 'totalCount' of its connections and removes their cursors,
+        so pagination ends with the first page
+        :param json_data: payload of the query
+        :param response: response to the first page
+        :return: tuple (number of pages, response without cursors)
+        """
+        page_size = (json_data.get('variables') or {}).get('first')
+        document = response.json
+        if not page_size or not isinstance(document, dict):
+            return 1, response
+        pages = 1
+        nodes = [document.get('data')]
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, list):
+                nodes.extend(node)
+            elif isinstance(node, dict):
+                if isinstance(node.get('totalCount'), int) and isinstance(node.get('pageInfo'), dict):
+                    pages = max(pages, ceil(node['totalCount'] / page_size))
+                    node['pageInfo']['endCursor'] = None
+                nodes.extend(node.values())
+        return pages, APIResponse(response.status_code, dumps(document), response.headers)
+
+    @staticmethod
+    def planned_response(kind: str) -> APIResponse:
+        """
+        Creates response standing for request which wasn't sent
+        :param kind: 'rest' or 'graphql'
+        :return: successful empty GraphQL response or REST response with status 0
+        """
+        if kind == 'graphql':
+            return APIResponse(text='{"data": {}}')
+        return APIResponse(status_code=0, text='{"message": "Not sent, dry run"}')
+
+    def report(self, scheduler=None) -> str:
+        """
+        Lists planned requests followed by estimated rate limit budget they use
+        :param scheduler: RateLimitScheduler, its remaining budget is reported if known
+        :return: human readable report, one line per planned request
+        """
+        lines = [f"{index}. {request}" for index, request in enumerate(self.requests, start=1)]
+        if not lines:
+            lines.append("No request is planned")
+        graphql = sum(request.pages * request.cost for request in self.requests if request.kind == 'graphql')
+        rest = sum(request.pages for request in self.requests if request.kind == 'rest')
+        pages = sum(request.pages for request in self.requests)
+        summary = f"Dry run, nothing was changed. Planned {pages} request(s) using {graphql} GraphQL point(s) and " \
+                  f"{rest} REST request(s)"
+        if scheduler:
+            remaining = [f"{bucket.remaining} {kind_name} remaining" for kind, kind_name in
+                         (('graphql', 'GraphQL points'), ('rest', 'REST requests'))
+                         for bucket in (scheduler.buckets[kind],) if bucket.remaining is not None]
+            summary += f" ({', '.join(remaining)})" if remaining else ""
+        lines.append(f"{summary}, the dry run itself sent {self.sent} request(s)")
+        return "\n".join(lines)
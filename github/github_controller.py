@@ -1,39 +1,129 @@
-from json import loads
+from calendar import timegm
+from functools import partial
+from collections.abc import Iterator
+from itertools import chain, count
+from json import dumps
+from logging import DEBUG
+import sys
+from time import time, strptime, perf_counter
+from urllib.parse import urlsplit
 
-from requests import post, get, delete, Response
+from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout, ChunkedEncodingError
 
-from .authentication import load_api_key, register_api_key
+from .authentication import load_api_keys, register_api_key
+from .cache import ViewerCache, ResponseCache, RepositoryIndex, api_key_hash
 from .cli_handler import CLIHandler
-from .common import InvalidAPIKeyException, InvalidNumberOfArgumentsException, check_qraphql_response
+from .common import APIResponse, StreamedAPIResponse, EdgesStream, InvalidAPIKeyException, \
+    InvalidNumberOfArgumentsException, check_qraphql_response
+from .dry_run import DryRunPlanner
 from .logger import logger
 from .queries.graphQL_mutation import ViewerMutation
-from .queries.graphQL_query import ViewerQuery, UserQuery
+from .queries.graphQL_document import operation_name
+from .queries.graphQL_query import ViewerQuery, UserQuery, MultiUserQuery, SyncQuery
+from .queries.repository_fields import query_fields, extra_fields, output_fields, selected_base_fields, sort_fields, \
+    filter_patterns, unique_field, EXTRA_FIELDS, INDEXED_FIELDS
+from .rate_limiter import RateLimitScheduler, graphql_cost
+from .repository_table import RepositoryTable
+from .retry_policy import RetryPolicy
+from .token_pool import TokenPool
+from .tracing import tracer
 
 
 class GithubController:
-    __slots__ = 'api_key', 'args'
+    __slots__ = 'api_key', 'token_pool', 'args', 'session', 'viewer_cache', 'response_cache', 'repository_index', \
+        'scheduler', 'retry_policy', 'planner'
     graphql_api_endpoint = 'https://api.github.com/graphql'
     rest_api_endpoint = 'https://api.github.com'
+    default_headers = {'Accept': 'application/json', 'User-Agent': 'github_cli_app'}
+    POOL_SIZE = 10
+    # Maximal number of repositories whose IDs are resolved by single aliased query
+    REPOSITORY_IDS_BATCH = 100
+    # Sequence of ids of sent requests, they identify requests (and their retries) in log records
+    request_ids = count(1)
 
-    def __init__(self, args, api_key=None):
+    # Failures of the connection itself, the request may succeed when retried
+    TRANSIENT_ERRORS = (ConnectionError, Timeout, ChunkedEncodingError)
+    # Actions which send no request and can't be run with '--dry_run'
+    UNPLANNED_ACTIONS = ('register', 'daemon')
+
+    def __init__(self, args, api_key=None, pool_size=POOL_SIZE, session=None, scheduler=None, retry_policy=None,
+                 token_pool=None, planner=None):
+        # The first key identifies viewer (e.g. in caches), requests are sent with keys picked from the pool
         self.api_key = api_key
+        self.token_pool = token_pool if token_pool else TokenPool([api_key])
         self.args = args
+        if args and (getattr(args, 'profile', False) or getattr(args, 'trace_file', None)):
+            tracer.enable()
+        self.session = session if session else self.create_session(pool_size, traced=tracer.enabled)
+        self.scheduler = scheduler if scheduler else RateLimitScheduler()
+        if retry_policy:
+            self.retry_policy = retry_policy
+        else:
+            self.retry_policy = self.create_retry_policy(args)
+        self.viewer_cache = ViewerCache()
+        cache_ttl = getattr(args, 'cache_ttl', None)
+        self.response_cache = ResponseCache(ttl=cache_ttl) if cache_ttl is not None else ResponseCache()
+        self.repository_index = RepositoryIndex()
+        # Planner of '--dry_run', requests are only planned while it's set
+        self.planner = planner
 
     def __call__(self, *args, **kwargs):
-        if self.args and self.args.action and self.args.action[0] == 'register':
+        if self.args and self.args.action and self.args.action[0] == 'register' and not self.dry_run():
             register_api_key()
         elif not self.api_key and not self.obtain_api_key():
             return False
         return self.process_args()
 
+    @classmethod
+    def create_session(cls, pool_size: int = POOL_SIZE, traced: bool = False) -> Session:
+        """
+        Creates HTTP session with keep-alive connection pool shared by all requests of the controller
+
+        :param pool_size: maximal number of connections kept alive in the pool
+        :param traced: record DNS, TCP and TLS times of new connections into request spans
+        :return: configured session
+        """
+        session = Session()
+        if traced:
+            from .traced_adapter import TracedHTTPAdapter
+            adapter = TracedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(cls.default_headers)
+        return session
+
+    @staticmethod
+    def create_retry_policy(args, circuit_breaker=None) -> RetryPolicy:
+        """
+        Creates retry policy of the command from '--retries' and '--timeout' arguments
+
+        :param args: parsed arguments, missing ones are replaced by defaults of RetryPolicy
+        :param circuit_breaker: circuit breaker shared with other commands (e.g. of daemon), new one by default
+        :return: configured retry policy
+        """
+        options = {'circuit_breaker': circuit_breaker}
+        retries = getattr(args, 'retries', None)
+        if retries is not None:
+            options['max_retries'] = retries
+        timeout = getattr(args, 'timeout', None)
+        if timeout is not None:
+            options['timeout'] = (min(RetryPolicy.CONNECT_TIMEOUT, timeout), timeout)
+        return RetryPolicy(**options)
+
     def obtain_api_key(self) -> bool:
         """
-        Method invokes 'load_api_key' function and saves obtained API key into class attribute
+        Method invokes 'load_api_keys' function and saves obtained API keys into pool of keys, the first key is saved
+        into class attribute
 
         :return: True, if the API key was successfully saved into class attribute, False otherwise
         """
         try:
-            self.api_key = load_api_key()
+            self.token_pool = TokenPool(load_api_keys())
+            self.api_key = self.token_pool.tokens[0]
             return True
         except FileNotFoundError:
             logger.warning("'api_key' file missing in project root. Please, create the file and add your API key to it")
@@ -43,13 +133,13 @@ class GithubController:
                            "but it's either missing the key or the key is malformed")
             return False
 
-    def process_args(self) -> bool:
+    def actions_dict(self) -> dict:
         """
-        Method invokes execution of function assigned to argument provided by user
+        Method maps actions to functions implementing them
 
-        :return: True if the execution was successful, False otherwise
+        :return: dictionary of action names and functions
         """
-        actions_dict = {
+        return {
             'register': register_api_key,
             'list-my-repositories': self.list_my_repositories,
             'list-user-repositories': self.list_user_repositories,
@@ -57,9 +147,22 @@ class GithubController:
             'create-new-repository': self.create_new_repository,
             'delete-repository': self.delete_repository,
             'create-project': self.create_new_project,
-            'create-pull-request': self.create_pull_request
+            'create-pull-request': self.create_pull_request,
+            'create-pull-requests': self.create_pull_requests,
+            'batch': self.run_batch,
+            'daemon': self.run_daemon,
+            'sync': self.sync_repositories,
+            'find-repository': self.find_repository
         }
 
+    def process_args(self) -> bool:
+        """
+        Method invokes execution of function assigned to argument provided by user
+
+        :return: True if the execution was successful, False otherwise
+        """
+        actions_dict = self.actions_dict()
+
         if self.args and self.args.action and self.args.action[0] in actions_dict.keys():
             self.execute_arg(actions_dict[self.args.action[0]])
             return True
@@ -71,60 +174,441 @@ class GithubController:
         :param func: function to be executed
         :return: None, CLIPrinter is invoked with provided function
         """
-        CLIHandler.out(func(), self.args)
+        if self.dry_run():
+            self.execute_dry_run(func)
+        else:
+            with tracer.span(self.args.action[0], 'action'):
+                CLIHandler.out(func(), self.args)
+        if self.args.rate_limit:
+            CLIHandler.out(self.scheduler.report(), self.args)
+            if len(self.token_pool) > 1 or self.token_pool.revoked:
+                CLIHandler.out(self.token_pool.report(), self.args)
+        if self.args.profile or self.args.trace_file:
+            self.report_profile()
+
+    def dry_run(self) -> bool:
+        """
+        Checks whether actions are only planned, i.e. '--dry_run' flag was provided
+        :return: True in case of dry run, False otherwise
+        """
+        return bool(getattr(self.args, 'dry_run', False))
+
+    def execute_dry_run(self, func):
+        """
+        Executes function with DryRunPlanner set, so requests which would change anything are only planned, and prints
+        planned requests with their estimated cost instead of output of the function
+        :param func: function to be executed
+        :return: None
+        """
+        if self.args.action[0] in self.UNPLANNED_ACTIONS:
+            CLIHandler.out(f"Action {self.args.action[0]} sends no request, there's nothing to plan", self.args)
+            return
+        self.planner = DryRunPlanner()
+        try:
+            with tracer.span(self.args.action[0], 'action'):
+                output = func()
+                # Lazy outputs (e.g. paginated listings) send their requests while they're consumed
+                if isinstance(output, Iterator):
+                    list(output)
+            CLIHandler.out(self.planner.report(self.scheduler), self.args)
+        finally:
+            self.planner = None
+
+    def report_profile(self):
+        """
+        Writes timing summary to standard error ('--profile') and/or Chrome trace to file ('--trace_file'), standard
+        output is left to the output of the action
+        :return: None
+        """
+        if self.args.trace_file:
+            tracer.write_chrome_trace(self.args.trace_file)
+            sys.stderr.write(f"Trace written to {self.args.trace_file}\n")
+        if self.args.profile:
+            sys.stderr.write(f"{tracer.summary()}\n")
+
+    def repository_packer(self):
+        """
+        Creates function packing single edge of repository listing into tuple (name, sshUrl, url) respecting provided
+        flags, values of extra fields selected by '--fields' are appended to the tuple
+        :return: function packing edge into tuple (name, sshUrl, url[, extra fields])
+        """
+        extra_graphql_fields = [EXTRA_FIELDS[field] for field in extra_fields(self.args)]
+        name = not self.args.url_only
+        ssh_url = not self.args.https or self.args.both_urls
+        url = self.args.https or self.args.both_urls
+
+        def pack(edge) -> tuple:
+            node = edge['node']
+            return (node['name'] if name else "", node['sshUrl'] if ssh_url else "", node['url'] if url else "") + \
+                tuple(node.get(field) for field in extra_graphql_fields)
+        return pack
 
     def repositories_output_list_packer(self, repositories_dict) -> [(str, str, str)]:
         """
-        Method packs output from repository listing into list of tuples (name, sshUrl, url) respecting provided flags
+        Method packs output from repository listing into list of tuples (name, sshUrl, url) respecting provided flags,
+        values of extra fields selected by '--fields' are appended to the tuple
         :param repositories_dict: dictionary of edges from response
-        :return: list of tuples (name, sshUrl, url) for each repository
+        :return: list of tuples (name, sshUrl, url[, extra fields]) for each repository
+        """
+        return list(map(self.repository_packer(), repositories_dict))
+
+    def graphql_edges(self, json_data, path: tuple, complete: bool = False):
         """
-        return [
-            (
-                edge['node']['name'] if not self.args.url_only else "",
-                edge['node']['sshUrl'] if (not self.args.https or self.args.both_urls) else "",
-                edge['node']['url'] if self.args.https or self.args.both_urls else "")
-            for edge in repositories_dict
-        ]
+        Generator sending GraphQL query whose response is decoded incrementally, edges of the connection are yielded
+        as soon as they arrive, so memory use doesn't grow with the size of the page
+        :param json_data: json to be sent
+        :param path: keys leading to the list of edges, see EdgesStream
+        :param complete: see send_graphql_request
+        :return: edges one at a time, return value of the generator is the rest of the response without the edges
+        :raise: ValueError in case of error response
+        """
+        response = self.send_graphql_request(json_data, stream=True, complete=complete)
+        edges = EdgesStream(response.iter_text(), path)
+        yield from edges
+        if isinstance(response, StreamedAPIResponse):
+            self.scheduler.count_cost('graphql', graphql_cost(edges.document))
+        response.complete(not edges.errors)
+        if edges.errors:
+            raise ValueError(f"{edges.errors}")
+        return edges.document
+
+    def repositories_pages(self, query, owner: str, pack=None, complete: bool = False):
+        """
+        Generator walking all pages of repository listing using cursor from previous page, each page is decoded and
+        packed while it's being received
+        :param query: ViewerQuery or UserQuery to be paginated
+        :param owner: key of repositories owner in response data, e.g. 'viewer' or 'user'
+        :param pack: function packing edge, repository_packer by default
+        :param complete: see send_graphql_request
+        :return: packed repositories, one at a time. Node IDs of viewer's repositories, if requested, are stored into
+        repository index once the listing ends (or is abandoned)
+        """
+        pack = pack if pack else self.repository_packer()
+        fetched = 0
+        ids = {}
+        try:
+            while True:
+                query.construct_query()
+                edges = self.graphql_edges(query.__dict__(), ('data', owner, 'repositories', 'edges'), complete)
+                page_size = 0
+                try:
+                    while True:
+                        edge = next(edges)
+                        page_size += 1
+                        if 'id' in edge['node'] and 'name' in edge['node']:
+                            ids[edge['node']['name']] = edge['node']['id']
+                        yield pack(edge)
+                except StopIteration as stop:
+                    repositories = stop.value['data'][owner]['repositories']
+                fetched += page_size
+                logger.debug("Fetched %d of %s repositories", fetched, repositories['totalCount'])
+                end_cursor = repositories.get('pageInfo', {}).get('endCursor')
+                if not page_size or not end_cursor or fetched >= repositories['totalCount']:
+                    return
+                query.cursor = end_cursor
+        finally:
+            if owner == 'viewer':
+                self.repository_index.store_ids(api_key_hash(self.api_key), ids)
+
+    def stream_repositories(self, query, owner: str):
+        """
+        Fetches first repository of the listing eagerly, so errors are reported right away, remaining repositories
+        are fetched and decoded lazily while iterating
+        :param query: ViewerQuery or UserQuery to be paginated
+        :param owner: key of repositories owner in response data, e.g. 'viewer' or 'user'
+        :return: iterator over packed repositories
+        :raise: ValueError in case the first page could not be obtained
+        """
+        repositories = self.repositories_pages(query, owner)
+        first = next(repositories, None)
+        return chain([first] if first is not None else [], repositories)
+
+    def arrange_repositories(self, repositories):
+        """
+        Collects listing into RepositoryTable and filters, sorts and deduplicates it according to '--filter', '--sort'
+        and '--unique'. Listing is returned unchanged (and streamed) if none of them was provided.
+        :param repositories: packed repositories and messages, or error message
+        :return: RepositoryTable, provided listing or error message
+        :raise: ValueError in case of unknown field or field which is not printed
+        """
+        sort, patterns, unique = sort_fields(self.args), filter_patterns(self.args), unique_field(self.args)
+        if isinstance(repositories, str) or not (sort or patterns or unique):
+            return repositories
+        table = RepositoryTable(output_fields(self.args), selected_base_fields(self.args))
+        table.extend(repositories)
+        for field, pattern in patterns:
+            table.filter(field, pattern)
+        for field, descending in reversed(sort):
+            table.sort(field, descending)
+        if unique:
+            table.unique(unique)
+        return table
+
+    def use_cache(self) -> bool:
+        """
+        Checks whether cached responses may be used, i.e. '--refresh' flag was not provided
+        :return: True if cache may be used, False otherwise
+        """
+        return not (self.args and self.args.refresh)
+
+    def send_request(self, kind: str, method: str, url: str, name: str = None, idempotent: bool = True,
+                     stream: bool = False, auth_scheme: str = None, **kwargs) -> APIResponse:
+        """
+        Sends HTTP request through rate limit scheduler, requests rejected by rate limit are retried after waiting.
+        Transient failures (connection errors, timeouts, 5xx responses) of idempotent requests are retried according to
+        retry policy, requests are rejected right away while circuit breaker is open.
+        :param kind: rate limit budget used by the request, 'rest' or 'graphql'
+        :param method: HTTP method of the session, e.g. 'get' or 'post'
+        :param url: URL of the request
+        :param name: name of GraphQL operation, recorded in request span
+        :param idempotent: whether transient failure may be retried blindly, mutations are retried by send_mutation
+        :param stream: successful response is returned as StreamedAPIResponse, its body is not read in advance
+        :param auth_scheme: 'bearer' or 'token', every attempt is authorized by API key picked from the pool, attempt
+        rejected due to revoked key or exhausted budget is retried with another key
+        :param kwargs: other arguments of the request, e.g. json or headers
+        :return: API response
+        :raise: CircuitOpenException in case the circuit breaker is open
+        """
+        attempt = 0
+        transient_attempt = 0
+        request_id = next(self.request_ids)
+        circuit_breaker = self.retry_policy.circuit_breaker
+        with tracer.span(f"{method.upper()} {urlsplit(url).path or '/'}", 'request', method=method.upper(),
+                         endpoint=url, **({'query': name} if name else {})) as span:
+            while True:
+                circuit_breaker.before_request()
+                self.scheduler.acquire(kind)
+                token = self.token_pool.acquire(kind)
+                if auth_scheme:
+                    kwargs['headers'] = {**kwargs.get('headers', {}), 'Authorization': f"{auth_scheme} {token}"}
+                try:
+                    started = perf_counter()
+                    http_response = getattr(self.session, method)(url, timeout=self.retry_policy.timeout, **kwargs,
+                                                                  **({'stream': True} if stream else {}))
+                    streamed = stream and http_response.status_code == 200
+                    if streamed:
+                        response = StreamedAPIResponse.from_response(http_response)
+                    else:
+                        with http_response:
+                            response = APIResponse.from_response(http_response)
+                    if tracer.enabled:
+                        span.set(status=http_response.status_code,
+                                 ttfb_ms=http_response.elapsed.total_seconds() * 1000,
+                                 request_bytes=len(http_response.request.body or b''),
+                                 retries=attempt + transient_attempt,
+                                 **({} if streamed else {'response_bytes': len(http_response.content)}))
+                    if logger.isEnabledFor(DEBUG):
+                        self.log_response(request_id, method, url, http_response, attempt + transient_attempt, started)
+                except self.TRANSIENT_ERRORS as e:
+                    circuit_breaker.record_failure()
+                    if not idempotent or not self.retry_policy.should_retry(transient_attempt):
+                        raise
+                    self.retry_policy.wait(transient_attempt, f"{type(e).__name__} on {method.upper()} {url}")
+                    transient_attempt += 1
+                    continue
+                if self.retry_policy.is_transient(response):
+                    circuit_breaker.record_failure()
+                    if not idempotent or not self.retry_policy.should_retry(transient_attempt):
+                        return response
+                    self.retry_policy.wait(transient_attempt, f"Status {response.status_code} on {method.upper()} "
+                                                              f"{url}")
+                    transient_attempt += 1
+                    continue
+                circuit_breaker.record_success()
+                self.token_pool.update(token, kind, response)
+                if response.status_code == 401 and auth_scheme and self.token_pool.revoke(token):
+                    continue
+                self.scheduler.update(kind, response,
+                                      self.token_pool.combined(kind) if len(self.token_pool) > 1 else None)
+                wait = self.scheduler.retry_after(response, attempt)
+                if wait is None:
+                    return response
+                if response.headers.get('X-RateLimit-Remaining') == '0' and self.token_pool.has_budget(kind):
+                    logger.warning("Rate limit of API key exceeded, retrying with another key")
+                    attempt += 1
+                    continue
+                logger.warning("Rate limit exceeded, retrying in %.0f s", wait)
+                self.scheduler.sleep(wait)
+                attempt += 1
+
+    @staticmethod
+    def log_response(request_id: int, method: str, url: str, http_response, attempt: int, started: float):
+        """
+        Logs response of request attempt, ids of the request and timings are passed as structured fields
+        :param request_id: id of the request, see request_ids
+        :param method: HTTP method
+        :param url: URL of the request
+        :param http_response: HTTP response
+        :param attempt: number of already retried attempts
+        :param started: perf_counter() of the attempt start
+        :return: None
+        """
+        duration_ms = (perf_counter() - started) * 1000
+        elapsed = getattr(http_response, 'elapsed', None)
+        logger.debug("Request %d: %s %s -> %s in %.1f ms", request_id, method.upper(), url, http_response.status_code,
+                     duration_ms, extra={'request_id': request_id,
+                                         'github_request_id': http_response.headers.get('X-GitHub-Request-Id'),
+                                         'method': method.upper(), 'url': url, 'status': http_response.status_code,
+                                         'attempt': attempt, 'duration_ms': round(duration_ms, 3),
+                                         'ttfb_ms': elapsed.total_seconds() * 1000 if elapsed else None})
+
+    def send_mutation(self, send, took_effect) -> APIResponse:
+        """
+        Sends mutation, i.e. request which must not be applied twice. Transient failure is retried only after
+        took_effect verifies that the mutation wasn't applied (e.g. response was lost after the repository had been
+        created).
+        :param send: function sending the mutation once, it returns API response
+        :param took_effect: function returning API response standing for applied mutation, or None if it wasn't applied
+        :return: API response
+        """
+        attempt = 0
+        while True:
+            try:
+                response = send()
+                if not self.retry_policy.is_transient(response):
+                    return response
+                failure = None
+            except self.TRANSIENT_ERRORS as e:
+                response, failure = None, e
+            if not self.retry_policy.should_retry(attempt):
+                if failure:
+                    raise failure
+                return response
+            self.retry_policy.wait(attempt, "Mutation failed")
+            applied = took_effect()
+            if applied is not None:
+                logger.info("Mutation took effect despite the failure, it's not retried")
+                return applied
+            attempt += 1
 
-    def send_graphql_request(self, json_data) -> Response:
+    def send_graphql_request(self, json_data, allow_partial: bool = False, took_effect=None,
+                             stream: bool = False, complete: bool = False, use_cache: bool = True) -> APIResponse:
         """
         Common method for repositories listing request
+
+        Responses to queries are fresh for '--cache_ttl' seconds, mutations invalidate cached queries
         :param json_data: json to be sent
+        :param allow_partial: return response containing both data and errors instead of raising, e.g. when some of
+        aliased blocks failed
+        :param took_effect: check of mutation, see send_mutation; mutation without check is never retried
+        :param stream: return successful response of query as StreamedAPIResponse, which isn't checked for errors, its
+        text is cached once it's read and StreamedAPIResponse.complete is called
+        :param complete: in dry run, all pages of the query are fetched, e.g. when following requests are planned from
+        them, otherwise only the first page is
+        :param use_cache: whether the response may be served from (and stored into) the cache, verification of
+        mutation must always see the current state
         :return: API response
         """
-        with post(self.graphql_api_endpoint, json=json_data,
-                  headers={"Authorization": f"bearer {self.api_key}"}) as response:
-            logger.debug(f"Response status code: {response.status_code}")
-            if check_qraphql_response(response)[0]:
+        query = json_data.get('query', '') if isinstance(json_data, dict) else ''
+        is_mutation = query.lstrip().startswith('mutation')
+        cache_key = None
+        if query and not is_mutation and use_cache:
+            cache_key = self.response_cache.key('graphql', self.api_key, dumps(json_data, sort_keys=True))
+            entry = self.response_cache.get(cache_key) if self.use_cache() else None
+            if self.response_cache.is_fresh(entry):
+                return self.response_cache.to_response(entry)
+        if self.planner:
+            return self.plan_graphql_request(json_data, is_mutation, allow_partial, complete)
+        send = partial(self.send_request, 'graphql', 'post', self.graphql_api_endpoint, name=operation_name(query),
+                       idempotent=not is_mutation, stream=stream and not is_mutation, json=json_data,
+                       auth_scheme='bearer')
+        response = self.send_mutation(send, took_effect) if is_mutation and took_effect else send()
+        if isinstance(response, StreamedAPIResponse):
+            response.cache_writer = self.response_cache.writer(cache_key, response) if cache_key else None
+            return response
+        response_ok, error_message = check_qraphql_response(response)
+        if not response_ok:
+            if allow_partial and response.ok and response.data:
+                logger.debug("Partial response: %s", error_message)
                 return response
-            else:
-                raise ValueError(f"{check_qraphql_response(response)[1]}")
+            raise ValueError(f"{error_message}")
+        if is_mutation:
+            self.response_cache.invalidate('graphql')
+        elif cache_key:
+            self.response_cache.store(cache_key, response)
+        return response
+
+    def plan_graphql_request(self, json_data, is_mutation: bool, allow_partial: bool = False,
+                             complete: bool = False) -> APIResponse:
+        """
+        Plans GraphQL request in dry run, see DryRunPlanner. Mutation isn't sent, cost of query is obtained by dry run
+        of the query and only its first page is fetched, number of pages is estimated from 'totalCount'.
+        :param json_data: json to be sent
+        :param is_mutation: whether the request is mutation
+        :param allow_partial: see send_graphql_request
+        :param complete: see send_graphql_request, every page is recorded on its own
+        :return: API response, first page of query without cursors or empty response of mutation
+        :raise: ValueError in case of error response
+        """
+        name = operation_name(json_data['query'])
+        if is_mutation:
+            self.planner.record('graphql', name, cost=DryRunPlanner.MUTATION_COST, estimated=True)
+            return DryRunPlanner.planned_response('graphql')
+        send = partial(self.send_request, 'graphql', 'post', self.graphql_api_endpoint, name=name,
+                       auth_scheme='bearer')
+        cost, estimated = self.planner.query_cost(json_data, lambda cost_query: send(json=cost_query))
+        response = send(json=json_data)
+        self.planner.record_sent()
+        response_ok, error_message = check_qraphql_response(response)
+        if not response_ok and not (allow_partial and response.ok and response.data):
+            raise ValueError(f"{error_message}")
+        pages, response = (1, response) if complete else self.planner.first_page(json_data, response)
+        self.planner.record('graphql', name, pages=pages, cost=cost, estimated=estimated)
+        return response
 
-    def send_restful_request(self, endpoint, json_data, method='GET') -> Response:
+    def send_restful_request(self, endpoint, json_data, method='GET', took_effect=None) -> APIResponse:
         """
         Method sends REST request of provided type to provided endpoint with provided data
+
+        GET responses are cached and revalidated using ETag/Last-Modified, '304 Not Modified' is served from cache
         :param endpoint: REST endpoint
         :param json_data: json to be sent
         :param method: GET, POST, PUT or DELETE
+        :param took_effect: check of POST/DELETE, see send_mutation; mutation without check is never retried
         :return: API response
         """
-        header = {"Authorization": f"token {self.api_key}"}
         if method == 'GET':
-            with get(endpoint, json=json_data, headers=header) as response:
-                logger.debug(f"Response status code: {response.status_code}")
-        elif method == 'POST':
-            with post(endpoint, json=json_data, headers=header) as response:
-                logger.debug(f"Response status code: {response.status_code}")
-        elif method == 'DELETE':
-            with delete(endpoint, headers=header) as response:
-                logger.debug(f"Response status code: {response.status_code}")
+            header = {}
+            cache_key = self.response_cache.key('rest', self.api_key, endpoint, dumps(json_data, sort_keys=True))
+            entry = self.response_cache.get(cache_key) if self.use_cache() else None
+            if entry and 'ETag' in entry['headers']:
+                header['If-None-Match'] = entry['headers']['ETag']
+            if entry and 'Last-Modified' in entry['headers']:
+                header['If-Modified-Since'] = entry['headers']['Last-Modified']
+            response = self.send_request('rest', 'get', endpoint, json=json_data, headers=header, auth_scheme='token')
+            if entry and response.status_code == 304:
+                self.response_cache.refresh(cache_key, entry)
+                return self.response_cache.to_response(entry)
+            if response.status_code == 200 and any(validator in response.headers
+                                                   for validator in ('ETag', 'Last-Modified')):
+                self.response_cache.store(cache_key, response)
+        elif method in ('POST', 'DELETE') and self.planner:
+            self.planner.record('rest', f"{method} {endpoint}")
+            response = DryRunPlanner.planned_response('rest')
+        elif method in ('POST', 'DELETE'):
+            send = partial(self.send_request, 'rest', method.lower(), endpoint, idempotent=False, auth_scheme='token',
+                           **({'json': json_data} if method == 'POST' else {}))
+            response = self.send_mutation(send, took_effect) if took_effect else send()
+            self.response_cache.invalidate('graphql')
         else:
             response = None
         return response
 
+    def obtain_viewer(self) -> dict:
+        """
+        Obtains login and id of viewer authenticated by API key, from cache if possible
+
+        :return: dictionary with 'login' and 'id' keys
+        """
+        viewer = self.viewer_cache.get(self.api_key) if self.use_cache() else None
+        if not viewer:
+            viewer = self.send_graphql_request(ViewerMutation.obtain_viewer_query()).data['viewer']
+            self.viewer_cache.store(self.api_key, viewer['login'], viewer.get('id'))
+        logger.debug("Viewer login is %s", viewer['login'])
+        return viewer
+
     @staticmethod
-    def verify_status(*, response: Response, expected_status: int, pass_message: str, fail_message: str) -> str:
+    def verify_status(*, response: APIResponse, expected_status: int, pass_message: str, fail_message: str) -> str:
         """
         Verifies whether REST response has desired status and return appropriate message
         :param response: REST response
@@ -139,57 +623,312 @@ class GithubController:
         """
         Methods lists repositories of current user authenticated by API key
 
-        :return: List of repositories or error response in case of error
+        :return: Iterator over all repositories, page by page, or error response in case of error
         """
-        list_repositories = ViewerQuery(('repositories', ['name', 'url', 'sshUrl']))
-        list_repositories.construct_query()
-        logger.debug(list_repositories.__dict__())
+        # Node IDs are recorded as a side effect, so they don't have to be resolved by 'create-project'
+        list_repositories = ViewerQuery(('repositories', query_fields(self.args) + ['id']))
         try:
-            response = self.send_graphql_request(list_repositories.__dict__())
-            logger.debug(response.text)
-            return self.repositories_output_list_packer(loads(response.text)['data']['viewer']['repositories']['edges'])
+            if self.args.offline:
+                return self.arrange_repositories(self.indexed_repositories())
+            return self.arrange_repositories(self.stream_repositories(list_repositories, 'viewer'))
         except ValueError as e:
             return str(e)
 
+    def users_repositories(self, usernames: [str]):
+        """
+        Generator listing repositories of many users using aliased queries, users are queried in batches of
+        MultiUserQuery.batch_size() and users with more repositories than one page are paginated within their batch
+        :param usernames: list of usernames
+        :return: tuples (username, packed repositories) or (username, error message) for each user, in provided order
+        """
+        batch_size = MultiUserQuery.batch_size()
+        for start in range(0, len(usernames), batch_size):
+            batch = usernames[start:start + batch_size]
+            results = {username: [] for username in batch}
+            fetched = {username: 0 for username in batch}
+            pending = [(username, None) for username in batch]
+            while pending:
+                query = MultiUserQuery(('repositories', query_fields(self.args)), users=pending)
+                query.construct_query()
+                data = self.send_graphql_request(query.__dict__(), allow_partial=True).data
+                next_pending = []
+                for i, (username, _) in enumerate(pending):
+                    user = data.get(MultiUserQuery.alias(i))
+                    if not user:
+                        results[username] = f"Could not resolve user {username}"
+                        continue
+                    repositories = user['repositories']
+                    results[username].extend(self.repositories_output_list_packer(repositories['edges']))
+                    fetched[username] += len(repositories['edges'])
+                    end_cursor = repositories.get('pageInfo', {}).get('endCursor')
+                    if repositories['edges'] and end_cursor and fetched[username] < repositories['totalCount']:
+                        next_pending.append((username, end_cursor))
+                pending = next_pending
+            for username in batch:
+                yield username, results[username]
+
+    def stream_users_repositories(self, usernames: [str]):
+        """
+        Lists repositories of many users, repository names are prefixed with the owner
+        :param usernames: list of usernames
+        :return: iterator over packed repositories and error messages of unresolved users
+        :raise: ValueError in case the first batch could not be obtained
+        """
+        def repositories():
+            for username, user_repositories in self.users_repositories(usernames):
+                if isinstance(user_repositories, str):
+                    yield user_repositories
+                    continue
+                for name, *fields in user_repositories:
+                    yield (f"{username}/{name}" if name else "", *fields)
+
+        items = repositories()
+        first_item = next(items, None)
+        return chain([first_item] if first_item else [], items)
+
     def list_user_repositories(self):
         """
-        Method lists repositories of user provided in argument
-        :return: List of user's repositories or error response in case of error (e.g. wrong username)
+        Method lists repositories of users provided in arguments and/or in file provided with '--users_file'
+        :return: Iterator over all user's repositories or error response in case of error (e.g. wrong username)
         """
+        usernames = list(self.args.parameters)
+        if self.args.users_file:
+            with open(self.args.users_file) as users_file:
+                usernames.extend(line.strip() for line in users_file if line.strip())
 
-        if not self.args.parameters:
-            raise InvalidNumberOfArgumentsException("Parameters required: username")
+        if not usernames:
+            raise InvalidNumberOfArgumentsException("Parameters required: username [username ...]")
 
-        list_user_repositories = UserQuery(('repositories', ['name', 'url', 'sshUrl']),
-                                           username=self.args.parameters[0])
-        list_user_repositories.construct_query()
         try:
-            response = self.send_graphql_request(list_user_repositories.__dict__())
-            return self.repositories_output_list_packer(loads(response.text)['data']['user']['repositories']['edges'])
+            if self.args.offline:
+                return self.arrange_repositories(self.indexed_repositories(usernames))
+            if len(usernames) > 1:
+                return self.arrange_repositories(self.stream_users_repositories(usernames))
+            list_user_repositories = UserQuery(('repositories', query_fields(self.args)), username=usernames[0])
+            return self.arrange_repositories(self.stream_repositories(list_user_repositories, 'user'))
         except ValueError as e:
             return str(e)
 
-    def create_new_project(self):
+    def indexed_repositories(self, owners: [str] = None) -> [tuple]:
         """
-        Creates new project under provided repository. Note: There can be multiple project with one name under one
-        repository
+        Lists repositories from local repository index, without any request
+        :param owners: logins of owners, viewer of API key if not provided
+        :return: packed repositories, names are prefixed with the owner if there are more owners
+        :raise: ValueError in case any of the owners was never synced
+        """
+        if not owners:
+            viewer_login = self.repository_index.viewer_login(api_key_hash(self.api_key))
+            if not viewer_login:
+                raise ValueError("Your repositories are not in local index, run 'github sync' first")
+            owners = [viewer_login]
+        repositories = []
+        for owner in owners:
+            nodes = self.repository_index.repositories(owner)
+            if not nodes:
+                raise ValueError(f"Repositories of {owner} are not in local index, run 'github sync {owner}' first")
+            for name, *fields in self.repositories_output_list_packer({'node': node} for node in nodes):
+                repositories.append((f"{owner}/{name}" if name and len(owners) > 1 else name, *fields))
+        return repositories
+
+    def sync_owner(self, owner: str = None) -> str:
+        """
+        Mirrors repositories of the owner into local repository index. Repositories are fetched from the most
+        recently updated one and sync stops at the first repository which wasn't updated since the last completed
+        sync, owner which was never completely synced is fetched fully. With '--refresh' all repositories are fetched
+        and deleted (or renamed) repositories are removed from the index.
+        :param owner: login of user or organization, viewer if not provided
+        :return: Message describing the result
+        :raise: ValueError in case the owner can't be resolved or the response is malformed
+        """
+        query = SyncQuery(('repositories', INDEXED_FIELDS), owner=owner)
+        full_sync = not self.use_cache()
+        latest_update, login, newest_update = None, None, None
+        fetched, updated, names, ids = 0, 0, [], {}
+        while True:
+            query.construct_query()
+            root = self.send_graphql_request(query.__dict__()).data.get(query.data_key)
+            if not root:
+                raise ValueError(f"Could not resolve owner {owner}")
+            if not isinstance(root.get('login'), str) or not isinstance(root.get('repositories'), dict):
+                raise ValueError("Malformed response, 'login' or 'repositories' of the owner is missing")
+            if not fetched:
+                login = root['login']
+                latest_update = None if full_sync else self.repository_index.watermark(login)
+            repositories = root['repositories']
+            nodes = [edge['node'] for edge in repositories['edges']]
+            changed = [node for node in nodes if not latest_update or node['updatedAt'] >= latest_update]
+            if self.planner:
+                # Dry run fetches only the first page, storing it would make the index look synced
+                return f"{login}: sync planned"
+            self.repository_index.store(login, changed)
+            newest_update = max(filter(None, [newest_update] + [node.get('updatedAt') for node in changed]),
+                                default=None)
+            ids.update((node['name'], node['id']) for node in nodes if node.get('id'))
+            names.extend(node['name'] for node in nodes)
+            fetched += len(nodes)
+            updated += len(changed)
+            end_cursor = repositories.get('pageInfo', {}).get('endCursor')
+            if len(changed) < len(nodes) or not nodes or not end_cursor or fetched >= repositories['totalCount']:
+                break
+            query.cursor = end_cursor
+        if not owner:
+            self.repository_index.store_ids(api_key_hash(self.api_key), ids)
+        removed = self.repository_index.prune(login, names) if full_sync else 0
+        self.repository_index.mark_synced(login, viewer_key=None if owner else api_key_hash(self.api_key),
+                                          watermark=newest_update)
+        return f"{login}: {updated} new or updated, {removed} removed, " \
+            f"{self.repository_index.count(login)} repositories in index"
+
+    def sync_repositories(self) -> [str]:
+        """
+        Mirrors repositories of viewer and of users/organizations provided as parameters into local repository index
+        :return: Message for each synced owner
+        """
+        results = []
+        for owner in [None] + list(self.args.parameters):
+            try:
+                results.append(self.sync_owner(owner))
+            except ValueError as e:
+                results.append(f"{owner or 'viewer'}: {str(e)}")
+        return results
+
+    def find_repository(self):
+        """
+        Finds repositories matching pattern in local repository index, without any request
+        :return: Packed repositories prefixed with the owner or message if nothing matches
+        """
+        if len(self.args.parameters) != 1:
+            raise InvalidNumberOfArgumentsException("Parameters required: pattern")
+        matches = self.repository_index.find(self.args.parameters[0])
+        if not matches:
+            return f"No repository matching {self.args.parameters[0]} in local index, run 'github sync' to update it"
+        packed = self.repositories_output_list_packer({'node': node} for _, node in matches)
+        return self.arrange_repositories([(f"{owner}/{name}" if name else "", *fields)
+                                          for (owner, _), (name, *fields) in zip(matches, packed)])
+
+    def repository_created(self, name: str):
+        """
+        Checks whether repository creation took effect
+        :param name: name of the repository
+        :return: API response standing for creation response or None if the repository doesn't exist
+        """
+        login = self.obtain_viewer()['login']
+        response = self.send_restful_request(f"{self.rest_api_endpoint}/repos/{login}/{name}", None)
+        return APIResponse(201, response.text, response.headers) if response.status_code == 200 else None
+
+    def repository_deleted(self, login: str, name: str):
+        """
+        Checks whether repository deletion took effect
+        :param login: login of the owner
+        :param name: name of the repository
+        :return: API response standing for deletion response or None if the repository still exists
+        """
+        response = self.send_restful_request(f"{self.rest_api_endpoint}/repos/{login}/{name}", None)
+        return APIResponse(204) if response.status_code == 404 else None
+
+    def pull_request_created(self, login: str, repository: str, head: str, base: str):
+        """
+        Checks whether pull request creation took effect, i.e. open pull request from head to base exists
+        :return: API response standing for creation response or None if there is no such pull request
+        """
+        response = self.send_restful_request(f"{self.rest_api_endpoint}/repos/{login}/{repository}/pulls"
+                                             f"?state=open&head={login}:{head}&base={base}", None)
+        if response.status_code == 200 and response.json:
+            return APIResponse(201, dumps(response.json[0]))
+        return None
+
+    def project_created(self, repository: str, project: str, since: float):
+        """
+        Checks whether project creation took effect, i.e. project of the name was created after the first attempt
+        :param repository: name of the repository
+        :param project: name of the project
+        :param since: epoch time of the first attempt
+        :return: API response standing for mutation response or None if no such project was created
+        """
+        data = self.send_graphql_request(ViewerMutation.obtain_repository_projects(repository, project),
+                                         use_cache=False).data
+        # Clock skew between local machine and Github is tolerated
+        for node in data['viewer']['repository']['projects']['nodes']:
+            if node['name'] == project and timegm(strptime(node['createdAt'], '%Y-%m-%dT%H:%M:%SZ')) >= since - 60:
+                return APIResponse(200, dumps({'data': {'createProject': {'clientMutationId': None}}}))
+        return None
+
+    def resolve_repository_ids(self, names: [str]) -> {str: str}:
+        """
+        Resolves node IDs of viewer's repositories from Github and stores them into repository index, many
+        repositories are resolved by single aliased query
+        :param names: names of the repositories
+        :return: dictionary of lowercase names and node IDs, repositories which don't exist are missing
+        """
+        ids = {}
+        if len(names) == 1:
+            data = self.send_graphql_request(ViewerMutation.obtain_repository_id(names[0]), allow_partial=True).data
+            if data['viewer']['repository']:
+                ids[names[0]] = data['viewer']['repository']['id']
+        for start in range(0, len(names) if len(names) > 1 else 0, self.REPOSITORY_IDS_BATCH):
+            batch = names[start:start + self.REPOSITORY_IDS_BATCH]
+            viewer = self.send_graphql_request(ViewerMutation.obtain_repository_ids(batch), allow_partial=True).data[
+                'viewer']
+            ids.update((repository['name'], repository['id']) for repository in (
+                viewer.get(ViewerMutation.repository_alias(i)) for i in range(len(batch))) if repository)
+        self.repository_index.store_ids(api_key_hash(self.api_key), ids)
+        return {name.lower(): node_id for name, node_id in ids.items()}
+
+    def repository_ids(self, names: [str]) -> {str: str}:
+        """
+        Obtains node IDs of viewer's repositories, IDs recorded by previous listings are taken from repository index
+        and only the rest is resolved from Github
+        :param names: names of the repositories
+        :return: dictionary of lowercase names and node IDs, repositories which don't exist are missing
+        """
+        ids = self.repository_index.repository_ids(api_key_hash(self.api_key), names) if self.use_cache() else {}
+        missing = list({name.lower(): name for name in names if name.lower() not in ids}.values())
+        if missing:
+            ids.update(self.resolve_repository_ids(missing))
+        logger.debug("IDs of repositories: %s", ids)
+        return ids
+
+    def create_project(self, repository: str, project: str, repo_id: str) -> str:
+        """
+        Creates project in single repository. If the mutation fails, ID of the repository is resolved again in case
+        the stored one is stale (repository was deleted or renamed in the meantime) and the mutation is retried.
+        :param repository: name of the repository
+        :param project: name of the project
+        :param repo_id: node ID of the repository, None if it doesn't exist
         :return: Message describing operation result
         """
-        if len(self.args.parameters) != 2:
-            raise InvalidNumberOfArgumentsException("Parameters required: repository_name project_name")
+        for attempt in range(2):
+            if not repo_id:
+                return f"Could not resolve repository {repository}"
+            create_new_project = ViewerMutation(('createProject', {'ownerId': repo_id, 'name': project}))
+            create_new_project.construct_query()
+            if logger.isEnabledFor(DEBUG):
+                logger.debug("Mutation: %s", create_new_project.__dict__())
+            try:
+                self.send_graphql_request(create_new_project.__dict__(), took_effect=partial(
+                    self.project_created, repository, project, time()))
+                return f"Project {project} created successfully in repository {repository}"
+            except ValueError as e:
+                # Resolved ID replaces the stored one, ID of repository which no longer exists is removed
+                previous_id, repo_id = repo_id, self.resolve_repository_ids([repository]).get(repository.lower())
+                if not repo_id:
+                    self.repository_index.remove_id(api_key_hash(self.api_key), repository)
+                if attempt or repo_id == previous_id:
+                    return str(e)
 
-        repo_id = loads(self.send_graphql_request(ViewerMutation.obtain_repository_id(self.args.parameters[0])).text)[
-            'data']['viewer']['repository']['id']
-        logger.debug(f"ID of repository {self.args.parameters[0]} is {repo_id}")
-        create_new_repository = ViewerMutation(
-            ('createProject', {'ownerId': repo_id, 'name': self.args.parameters[1]}))
-        create_new_repository.construct_query()
-        logger.debug(create_new_repository.__dict__())
-        try:
-            self.send_graphql_request(create_new_repository.__dict__())
-            return f"Project {self.args.parameters[1]} created successfully in repository {self.args.parameters[0]}"
-        except ValueError as e:
-            return str(e)
+    def create_new_project(self):
+        """
+        Creates new project under provided repositories. Note: There can be multiple project with one name under one
+        repository
+        :return: Message describing operation result, one for each repository if there are more of them
+        """
+        if len(self.args.parameters) < 2:
+            raise InvalidNumberOfArgumentsException("Parameters required: repository_name [repository_name ...] "
+                                                    "project_name")
+        *repositories, project = self.args.parameters
+        ids = self.repository_ids(repositories)
+        results = [self.create_project(repository, project, ids.get(repository.lower())) for repository in repositories]
+        return results[0] if len(results) == 1 else results
 
     def create_new_repository(self):
         """
@@ -203,11 +942,17 @@ class GithubController:
                 "description": self.args.description[0] if self.args.description else "",
                 "private": self.args.private if self.args.private else False}
         response = self.send_restful_request(endpoint=f"{self.rest_api_endpoint}/user/repos",
-                                             json_data=json, method="POST")
+                                             json_data=json, method="POST",
+                                             took_effect=partial(self.repository_created, self.args.parameters[0]))
         if response.status_code == 422:
             logger.debug("Repository already exists")
             return f"Repository with name {self.args.parameters[0]} already exists"
-        return [(loads(response.text)['name'], loads(response.text)['ssh_url'], loads(response.text)['git_url'])]
+        if not response.ok:
+            return f"Unable to create repository {self.args.parameters[0]}: {response.message}"
+        if response.json.get('node_id'):
+            self.repository_index.store_ids(api_key_hash(self.api_key),
+                                            {response.json['name']: response.json['node_id']})
+        return [(response.json['name'], response.json['ssh_url'], response.json['git_url'])]
 
     def delete_repository(self) -> str:
         """
@@ -217,25 +962,50 @@ class GithubController:
         if not self.args.parameters:
             raise InvalidNumberOfArgumentsException("Parameters required: repository_name")
 
-        viewer_login = loads(self.send_graphql_request(ViewerMutation.obtain_viewer_login_query()).text)['data'][
-            'viewer']['login']
+        viewer_login = self.obtain_viewer()['login']
         repo_to_delete = self.args.parameters[0]
-        if self.args.no_confirm or CLIHandler.confirm_action(
+        if self.args.no_confirm or self.planner or CLIHandler.confirm_action(
                 text_query=f"Are you sure you want to delete repository {repo_to_delete}? "
                 f"This action cannot be undone."):
             response = self.send_restful_request(endpoint=
                                                  f"{self.rest_api_endpoint}/repos/{viewer_login}/{repo_to_delete}",
-                                                 json_data=None, method='DELETE')
+                                                 json_data=None, method='DELETE',
+                                                 took_effect=partial(self.repository_deleted, viewer_login,
+                                                                     repo_to_delete))
+            if response.status_code == 204:
+                self.repository_index.remove(viewer_login, repo_to_delete, viewer_key=api_key_hash(self.api_key))
             return self.verify_status(response=response,
                                       expected_status=204,
                                       pass_message=f"Repository {self.args.parameters[0]} was deleted successfully",
                                       fail_message=f"Unable to delete repository"
-                                      f"{self.args.parameters[0]}: {loads(response.text)['message']}" if response.text
+                                      f"{self.args.parameters[0]}: {response.message}" if response.text
                                       else "")
 
         else:
             return "Aborted, no repo was deleted"
 
+    def send_pull_request(self, viewer_login: str, repo_name: str, json: dict) -> APIResponse:
+        """
+        Sends request creating pull request in viewer's repository
+        :param viewer_login: login of the viewer
+        :param repo_name: name of the repository
+        :param json: title, body, head and base of the pull request
+        :return: API response, 201 if the pull request was created
+        """
+        return self.send_restful_request(endpoint=f"{self.rest_api_endpoint}/repos/{viewer_login}/{repo_name}/pulls",
+                                         json_data=json, method='POST',
+                                         took_effect=partial(self.pull_request_created, viewer_login, repo_name,
+                                                             json['head'], json['base']))
+
+    @staticmethod
+    def pull_request_error(response: APIResponse) -> str:
+        """
+        :param response: failed response to pull request creation
+        :return: reason of the failure
+        """
+        error = response.errors[0]['message'] if response.errors else ''
+        return f"{response.message} - {error}"
+
     def create_pull_request(self) -> str:
         """
         Creates pull request for branch and given base
@@ -245,8 +1015,7 @@ class GithubController:
             raise InvalidNumberOfArgumentsException("Parameters required: repository_name title "
                                                     "head_branch base_branch [body]")
 
-        viewer_login = loads(self.send_graphql_request(ViewerMutation.obtain_viewer_login_query()).text)['data'][
-            'viewer']['login']
+        viewer_login = self.obtain_viewer()['login']
 
         repo_name = self.args.parameters[0]
         title = self.args.parameters[1]
@@ -259,13 +1028,140 @@ class GithubController:
                 "head": head,
                 "base": base}
 
-        response = self.send_restful_request(endpoint=
-                                             f"{self.rest_api_endpoint}/repos/{viewer_login}/{repo_name}/pulls",
-                                             json_data=json, method='POST')
+        response = self.send_pull_request(viewer_login, repo_name, json)
         if response.status_code == 201:
             return f"Pull request {title} created in repository {repo_name}.\nView pull request: " \
-                f"{loads(response.text)['url']}"
+                f"{response.json['url']}"
         else:
-            message = loads(response.text)['message']
-            error = loads(response.text)['errors'][0]['message']
-            return f"Unable to create pull request in {repo_name}: {message} - {error}"
+            return f"Unable to create pull request in {repo_name}: {self.pull_request_error(response)}"
+
+    def pull_request_repositories(self) -> [str]:
+        """
+        Collects repositories for 'create-pull-requests' from parameters and '--repositories_file'. Parameters with
+        wildcards (*, ?, [...]) are matched against names of viewer's repositories, which are listed only if needed.
+        :return: names of the repositories without duplicates, in provided order
+        """
+        from fnmatch import fnmatchcase
+        names = list(self.args.parameters)
+        if self.args.repositories_file:
+            with open(self.args.repositories_file) as repositories_file:
+                names.extend(line.strip() for line in repositories_file if line.strip())
+        patterns = [name for name in names if any(wildcard in name for wildcard in '*?[')]
+        existing = list(self.repositories_pages(ViewerQuery(('repositories', ['name', 'id'])), 'viewer',
+                                                pack=lambda edge: edge['node']['name'], complete=True)) \
+            if patterns else []
+        repositories = {}
+        for name in names:
+            if name in patterns:
+                repositories.update((match.lower(), match) for match in existing
+                                    if fnmatchcase(match.lower(), name.lower()))
+            else:
+                repositories.setdefault(name.lower(), name)
+        return list(repositories.values())
+
+    def create_pull_requests(self):
+        """
+        Creates the same pull request (title, body, head and base provided by options) in many repositories,
+        repositories are processed concurrently by '--workers' threads sharing connection pool
+        :return: Iterator over result of each repository (URL of the pull request or reason of failure), in provided
+        order, followed by summary
+        """
+        if not (self.args.parameters or self.args.repositories_file):
+            raise InvalidNumberOfArgumentsException("Parameters required: repository_name_or_pattern [...] "
+                                                    "--title TITLE --head HEAD_BRANCH --base BASE_BRANCH [--body BODY]")
+        if not (self.args.title and self.args.head and self.args.base):
+            raise InvalidNumberOfArgumentsException("Options required: --title TITLE --head HEAD_BRANCH "
+                                                    "--base BASE_BRANCH")
+        try:
+            repositories = self.pull_request_repositories()
+            viewer_login = self.obtain_viewer()['login']
+        except ValueError as e:
+            return str(e)
+        if not repositories:
+            return "No repository matches provided names"
+        json = {"title": self.args.title, "body": self.args.body or "", "head": self.args.head, "base": self.args.base}
+
+        def create(repo_name: str) -> (bool, str):
+            try:
+                response = self.send_pull_request(viewer_login, repo_name, json)
+            except Exception as e:
+                logger.debug("Pull request in %s failed: %s", repo_name, e)
+                return False, f"{repo_name}: {str(e)}"
+            if response.status_code == 201:
+                return True, f"{repo_name}: {response.json.get('html_url', response.json['url'])}"
+            return False, f"{repo_name}: {self.pull_request_error(response)}"
+
+        def results():
+            from concurrent.futures import ThreadPoolExecutor
+            workers = max(1, self.args.workers)
+            if workers > self.POOL_SIZE:
+                self.session = self.create_session(workers, traced=tracer.enabled)
+            created = 0
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for success, message in executor.map(create, repositories):
+                    created += success
+                    yield message
+            yield f"Pull request {self.args.title} created in {created} of {len(repositories)} repositories"
+        return results()
+
+    def execute_batch_item(self, item: dict) -> (bool, object):
+        """
+        Executes single manifest item using controller sharing API key and connection pool with this one
+        :param item: manifest item
+        :return: tuple (success, output of the action or error message)
+        """
+        from .batch import manifest_item_args
+        try:
+            item_args = manifest_item_args(item, self.args)
+            item_ctl = type(self)(item_args, self.api_key, session=self.session, scheduler=self.scheduler,
+                                  retry_policy=self.retry_policy, token_pool=self.token_pool, planner=self.planner)
+            func = item_ctl.actions_dict().get(item_args.action[0])
+            if not func:
+                raise ValueError(f"Unknown action {item_args.action[0]}")
+            output = func()
+            # Lazy outputs (e.g. paginated listings) have to be consumed inside the worker
+            return True, output if isinstance(output, (str, list)) else list(output)
+        except Exception as e:
+            logger.debug("Batch item %s failed: %s", item, e)
+            return False, str(e)
+
+    def run_batch(self) -> str:
+        """
+        Executes actions described in manifest file concurrently, results are printed in the order of the manifest
+        :return: Summary of batch execution
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from .batch import load_manifest, describe_item
+
+        if len(self.args.parameters) != 1:
+            raise InvalidNumberOfArgumentsException("Parameters required: manifest_file")
+
+        items = load_manifest(self.args.parameters[0])
+        destructive_items = sum(item['action'] == 'delete-repository' for item in items)
+        if destructive_items and not self.args.no_confirm and not self.planner and not CLIHandler.confirm_action(
+                text_query=f"Manifest contains {destructive_items} repository deletion(s). "
+                f"This action cannot be undone, continue?"):
+            return "Aborted, no action was executed"
+
+        workers = max(1, self.args.workers)
+        if workers > self.POOL_SIZE:
+            self.session = self.create_session(workers, traced=tracer.enabled)
+        failed = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for i, (item, (success, output)) in enumerate(zip(items, executor.map(self.execute_batch_item, items))):
+                failed += not success
+                status = ('PLANNED' if self.planner else 'OK') if success else 'FAILED'
+                CLIHandler.out(f"[{i + 1}/{len(items)}] {describe_item(item)}: {status}", None)
+                # Output of planned item is made up, only the plan is printed
+                if not (self.planner and success):
+                    CLIHandler.out(output, self.args)
+        return f"Batch finished: {len(items) - failed} succeeded, {failed} failed"
+
+    def run_daemon(self) -> str:
+        """
+        Keeps this controller (its connection pool, caches and API key) running and executes commands forwarded by
+        other 'github' invocations through Unix socket
+        :return: Message describing why the daemon ended
+        """
+        from .daemon import serve
+        return serve(self)
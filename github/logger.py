@@ -1,28 +1,109 @@
-from logging import getLogger, DEBUG, StreamHandler, Formatter, FileHandler
-from os.path import dirname
-from sys import stdout
-
-import github
-
-logger = getLogger('github')
-
-# Logging configuration
-logger.setLevel(DEBUG)
-
-# create console handler
-console_debug_handler = StreamHandler(stream=stdout)
-console_debug_handler.setLevel(DEBUG)
-# file_debug_handler = FileHandler(f'{dirname(github.__file__)}/../logs/debug.log')
-# file_debug_handler.setLevel(DEBUG)
-
-
-# create formatter and add it to the handlers
-console_debug_formatter = Formatter('>> %(message)s')
-file_debug_formatter = Formatter('%(asctime)s; %(name)s; %(levelname)s;\t{:<20%(filename)s;}\t %(message)s')
-
-console_debug_handler.setFormatter(console_debug_formatter)
-# file_debug_handler.setFormatter(file_debug_formatter)
-
-# add the handlers to the logger
-# logger.addHandler(console_debug_handler)
-# logger.addHandler(file_debug_handler)
+from atexit import register
+from json import dumps
+from logging import getLogger, getLevelName, DEBUG, WARNING, StreamHandler, FileHandler, Formatter
+from os import environ
+from sys import stdout
+
+logger = getLogger('github')
+
+# Logging configuration, records are dropped right away unless a sink is configured
+logger.setLevel(WARNING)
+
+# create console handler
+console_debug_handler = StreamHandler(stream=stdout)
+console_debug_handler.setLevel(DEBUG)
+
+# create formatter and add it to the handlers
+console_debug_formatter = Formatter('>> %(message)s')
+file_debug_formatter = Formatter('%(asctime)s; %(name)s; %(levelname)s;\t{:<20%(filename)s;}\t %(message)s')
+
+console_debug_handler.setFormatter(console_debug_formatter)
+
+# Attributes passed through 'extra' (e.g. by request logging) which are carried into JSON records
+STRUCTURED_FIELDS = ('request_id', 'github_request_id', 'method', 'url', 'status', 'attempt', 'ttfb_ms',
+                     'duration_ms')
+# Sinks attached by configure_logging, pairs (queue handler, listener)
+sinks = []
+
+
+class JsonFormatter(Formatter):
+    """
+    Formats record as single line JSON object, structured fields of the record are kept as separate keys
+    """
+
+    def format(self, record) -> str:
+        entry = {'time': self.formatTime(record), 'level': record.levelname, 'logger': record.name,
+                 'thread': record.threadName, 'message': record.getMessage()}
+        entry.update((field, getattr(record, field)) for field in STRUCTURED_FIELDS if hasattr(record, field))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return dumps(entry, default=str)
+
+
+def configure_logging(path: str, level=DEBUG, structured: bool = False):
+    """
+    Attaches file sink to the logger. Logging threads only put records into a queue, they are formatted and written
+    by background thread of QueueListener, so slow disk never blocks requests. Queue machinery is imported only here,
+    as logging is off by default.
+    :param path: path to log file, it's appended to
+    :param level: minimal level of logged records, e.g. DEBUG or 'INFO'
+    :param structured: write JSON records (with request ids and timings) instead of plain text
+    :return: started QueueListener, see stop_logging
+    """
+    from logging.handlers import QueueHandler, QueueListener
+    from queue import Queue
+
+    class DeferredQueueHandler(QueueHandler):
+        """
+        Queue handler passing records to the listener as they are, so even message formatting is done by the
+        listener's thread, not by the thread which logged it (arguments must not be mutated after they are logged)
+        """
+
+        def prepare(self, record):
+            return record
+
+    file_handler = FileHandler(path, encoding='utf-8')
+    file_handler.setFormatter(JsonFormatter() if structured else file_debug_formatter)
+    queue = Queue(-1)
+    listener = QueueListener(queue, file_handler)
+    queue_handler = DeferredQueueHandler(queue)
+    logger.addHandler(queue_handler)
+    logger.setLevel(level)
+    listener.start()
+    sinks.append((queue_handler, listener))
+    return listener
+
+
+@register
+def stop_logging():
+    """
+    Detaches sinks attached by configure_logging, records remaining in their queues are written first. It's called at
+    exit.
+    :return: None
+    """
+    while sinks:
+        queue_handler, listener = sinks.pop()
+        logger.removeHandler(queue_handler)
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+    logger.setLevel(WARNING)
+
+
+def configure_logging_from_environment():
+    """
+    Attaches file sink set by environmental variables 'GITHUB_CLI_LOG_FILE', 'GITHUB_CLI_LOG_LEVEL' (DEBUG by
+    default, invalid level is ignored) and 'GITHUB_CLI_LOG_FORMAT' ('json' for structured records), see
+    configure_logging. It's called by main, so importing the package never configures logging.
+    :return: started QueueListener or None if no log file is set
+    :raise: OSError in case the log file can't be opened
+    """
+    if not environ.get('GITHUB_CLI_LOG_FILE'):
+        return None
+    level = environ.get('GITHUB_CLI_LOG_LEVEL', 'DEBUG').upper()
+    valid_level = isinstance(getLevelName(level), int)
+    listener = configure_logging(environ['GITHUB_CLI_LOG_FILE'], level if valid_level else DEBUG,
+                                 environ.get('GITHUB_CLI_LOG_FORMAT', '').lower() == 'json')
+    if not valid_level:
+        logger.warning("Invalid log level %s in GITHUB_CLI_LOG_LEVEL, DEBUG is used", level)
+    return listener
@@ -0,0 +1,239 @@
+from csv import writer as csv_writer
+from json import dumps
+
+from .queries.repository_fields import BASE_FIELDS, output_fields
+
+FORMATS = ('text', 'json', 'ndjson', 'tsv', 'csv')
+
+
+def to_record(item, fields=BASE_FIELDS) -> dict:
+    """
+    Converts output item into dictionary of its fields, base fields excluded by output flags are omitted
+    :param item: packed repository tuple, dictionary or message
+    :param fields: names of the fields of packed repository tuple
+    :return: dictionary of fields
+    """
+    if isinstance(item, dict):
+        return item
+    if isinstance(item, (list, tuple)):
+        return {field: value for field, value in zip(fields, item) if value != ""}
+    return {'message': str(item)}
+
+
+class OutputWriter:
+    """
+    Base class of output formats, output is buffered and written to the stream in chunks of BUFFER_SIZE characters
+
+    Interactive streams (TTY) are flushed after every item, so output appears as soon as it's produced.
+    """
+    __slots__ = 'stream', 'args', 'fields', 'buffer', 'buffered', 'interactive'
+    BUFFER_SIZE = 64 * 1024
+
+    def __init__(self, stream, args=None):
+        self.stream = stream
+        self.args = args
+        self.fields = output_fields(args)
+        self.buffer = []
+        self.buffered = 0
+        self.interactive = stream.isatty() if hasattr(stream, 'isatty') else False
+
+    def write(self, text: str):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.stream.write(''.join(self.buffer))
+            self.buffer = []
+            self.buffered = 0
+        self.stream.flush()
+
+    def begin(self):
+        """
+        Called before the first item of a list
+        """
+
+    def item(self, index: int, item):
+        """
+        Writes one item of a list
+        :param index: zero based index of the item
+        :param item: item to be written
+        """
+        raise NotImplementedError
+
+    def end(self):
+        """
+        Called after the last item of a list
+        """
+
+    def message(self, message: str):
+        """
+        Writes standalone message, i.e. output which is not a list
+        :param message: message to be written
+        """
+        self.begin()
+        self.item(0, message)
+        self.end()
+
+    def write_list(self, items):
+        """
+        Writes all items of a list (or any iterable), items are written as they are produced
+        :param items: items to be written
+        """
+        self.begin()
+        for index, item in enumerate(items):
+            self.item(index, item)
+            if self.interactive:
+                self.flush()
+        self.end()
+
+    def row(self, index: int, fields: [str], values: tuple):
+        """
+        Writes one row of RepositoryTable
+        :param index: zero based index of the row
+        :param fields: output names of the fields
+        :param values: values aligned with fields
+        """
+        self.item(index, dict(zip(fields, values)))
+
+    def write_table(self, table):
+        """
+        Writes rows of RepositoryTable read straight from its columns, followed by its messages
+        :param table: RepositoryTable to be written
+        """
+        self.begin()
+        index = -1
+        for index, values in enumerate(table.rows()):
+            self.row(index, table.fields, values)
+            if self.interactive:
+                self.flush()
+        for index, message in enumerate(table.messages, index + 1):
+            self.item(index, message)
+        self.end()
+
+
+class TextWriter(OutputWriter):
+    """
+    Human readable output, list items are numbered and every field is written on its own line. Numbers are colored
+    only when writing to terminal.
+    """
+    __slots__ = 'number_format',
+
+    def __init__(self, stream, args=None):
+        super().__init__(stream, args)
+        if self.interactive:
+            from colorama import Fore
+            self.number_format = f"{Fore.GREEN}{{}}.{Fore.RESET}\n"
+        else:
+            self.number_format = "{}.\n"
+
+    def item(self, index: int, item):
+        if not (self.args and self.args.no_numbers):
+            self.write(self.number_format.format(index + 1))
+        if isinstance(item, (list, tuple)):
+            for i, sub_item in enumerate(item):
+                if i >= len(BASE_FIELDS) and i < len(self.fields):
+                    # Extra fields are labeled, as their values (e.g. numbers) are not self-explanatory
+                    self.write(f"{self.fields[i]}: {sub_item}\n")
+                elif sub_item:
+                    self.write(f"{sub_item}\n")
+        else:
+            self.write(f"{item}\n")
+
+    def row(self, index: int, fields: [str], values: tuple):
+        if not (self.args and self.args.no_numbers):
+            self.write(self.number_format.format(index + 1))
+        for field, value in zip(fields, values):
+            if field not in BASE_FIELDS:
+                self.write(f"{field}: {value}\n")
+            elif value:
+                self.write(f"{value}\n")
+
+    def message(self, message: str):
+        self.write(f"{message}\n")
+
+
+class JSONWriter(OutputWriter):
+    """
+    List is written as JSON array of objects, message as single object
+    """
+    __slots__ = ()
+
+    def begin(self):
+        self.write('[')
+
+    def item(self, index: int, item):
+        self.write(f"{',' if index else ''}\n  {dumps(to_record(item, self.fields))}")
+
+    def end(self):
+        self.write('\n]\n')
+
+    def message(self, message: str):
+        self.write(f"{dumps(to_record(message, self.fields))}\n")
+
+
+class NDJSONWriter(OutputWriter):
+    """
+    Every item is written as JSON object on its own line
+    """
+    __slots__ = ()
+
+    def item(self, index: int, item):
+        self.write(f"{dumps(to_record(item, self.fields))}\n")
+
+
+class DelimitedWriter(OutputWriter):
+    """
+    Every item is written as one row of CSV or TSV, fields are joined into row in the order of packed repository.
+    Repositories are preceded by header row of field names (in the same order as keys of JSON objects), messages
+    aren't.
+    """
+    __slots__ = 'rows', 'header_written'
+
+    def __init__(self, stream, args=None, delimiter: str = ','):
+        super().__init__(stream, args)
+        # csv writer writes into this writer's buffer
+        self.rows = csv_writer(self, delimiter=delimiter, lineterminator='\n')
+        self.header_written = False
+
+    def header(self, fields: [str]):
+        """
+        Writes header row before the first repository
+        :param fields: names of the fields of the row
+        """
+        if not self.header_written:
+            self.rows.writerow(fields)
+            self.header_written = True
+
+    def item(self, index: int, item):
+        if isinstance(item, (list, tuple)):
+            selected = [i for i, value in enumerate(item[:len(self.fields)]) if i >= len(BASE_FIELDS) or value != ""]
+            self.header([self.fields[i] for i in selected])
+            self.rows.writerow([item[i] for i in selected])
+        else:
+            self.rows.writerow(to_record(item, self.fields).values())
+
+    def row(self, index: int, fields: [str], values: tuple):
+        self.header(fields)
+        self.rows.writerow(values)
+
+
+def create_writer(output_format: str, stream, args=None) -> OutputWriter:
+    """
+    Creates writer of provided format
+    :param output_format: one of FORMATS
+    :param stream: stream to write to, e.g. sys.stdout
+    :param args: CLI arguments
+    :return: output writer
+    """
+    if output_format == 'json':
+        return JSONWriter(stream, args)
+    if output_format == 'ndjson':
+        return NDJSONWriter(stream, args)
+    if output_format == 'tsv':
+        return DelimitedWriter(stream, args, delimiter='\t')
+    if output_format == 'csv':
+        return DelimitedWriter(stream, args, delimiter=',')
+    return TextWriter(stream, args)
@@ -0,0 +1,55 @@
+from functools import lru_cache
+from hashlib import sha256
+from re import compile as compile_regex
+
+# Github does not accept persisted (hash only) queries yet, set to True for APIs supporting Apollo persisted queries
+PERSISTED_QUERIES = False
+
+# Operation type and first (possibly aliased) field of the document, e.g. 'query($first: Int!) { u0: user(...'
+OPERATION_PATTERN = compile_regex(r'^\s*(query|mutation)?[^{]*\{\s*(?:\w+\s*:\s*)?(\w+)')
+
+
+@lru_cache(maxsize=None)
+def compile_document(template: str, **fragments) -> (str, str):
+    """
+    Compiles GraphQL document from template, each distinct document is compiled only once per process
+    :param template: document template with named placeholders
+    :param fragments: values of placeholders, e.g. selected fields
+    :return: tuple (document, sha256 hash of the document)
+    """
+    document = template.format(**fragments)
+    return document, sha256(document.encode()).hexdigest()
+
+
+def request_payload(document: str, document_hash: str, variables: dict = None) -> dict:
+    """
+    Creates JSON payload of GraphQL request, values are always passed as variables and never spliced into document
+    :param document: compiled document
+    :param document_hash: sha256 hash of the document
+    :param variables: variables of the document
+    :return: payload dictionary
+    """
+    payload = {'query': document}
+    if variables:
+        payload['variables'] = variables
+    if PERSISTED_QUERIES:
+        payload['extensions'] = {'persistedQuery': {'version': 1, 'sha256Hash': document_hash}}
+    return payload
+
+
+@lru_cache(maxsize=256)
+def operation_name(document: str) -> str:
+    """
+    Derives human readable name of GraphQL operation, used to label requests in traces
+    :param document: GraphQL document
+    :return: name, e.g. 'query viewer' or 'mutation createProject'
+    """
+    match = OPERATION_PATTERN.match(document or '')
+    if not match:
+        return 'query'
+    operation, field = match.groups()
+    if field == 'viewer' and operation != 'mutation':
+        # Viewer query is named by the connection it lists, if any
+        connection = compile_regex(r'viewer\s*\{\s*(\w+)\s*\(').search(document)
+        field = f"viewer.{connection.group(1)}" if connection else field
+    return f"{operation or 'query'} {field}"
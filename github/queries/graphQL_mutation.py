@@ -1,10 +1,23 @@
+from .graphQL_document import compile_document, request_payload
+
+MUTATION_TEMPLATE = 'mutation($input: {input_type}!) {{ {action}(input: $input) {{ clientMutationId }} }}'
+VIEWER_ID_QUERY = compile_document('{{viewer {{id}}}}')
+VIEWER_LOGIN_QUERY = compile_document('{{viewer {{login}}}}')
+VIEWER_QUERY = compile_document('{{viewer {{login id}}}}')
+REPOSITORY_ID_QUERY = compile_document('query($name: String!) {{ viewer {{ repository(name: $name) {{ id }} }} }}')
+REPOSITORY_IDS_TEMPLATE = 'query({variables}) {{ viewer {{ {blocks} }} }}'
+REPOSITORY_PROJECTS_QUERY = compile_document('query($name: String!, $project: String!) {{ viewer {{ '
+                                             'repository(name: $name) {{ projects(search: $project, first: 20) {{ '
+                                             'nodes {{ name createdAt }} }} }} }} }}')
+
+
 class ViewerMutation:
-    __slots__ = 'payload', 'viewer_id', 'query'
+    __slots__ = 'payload', 'viewer_id', 'query', 'query_hash'
 
     """
     Query structure:
-    mutation ACTION {
-    addReaction(input:{INPUT}) {
+    mutation($input: ACTIONInput!) {
+    ACTION(input: $input) {
     clientMutationId
     }  }
 
@@ -16,24 +29,52 @@ class ViewerMutation:
         self.payload = payload
         self.viewer_id = None
         self.query = None
+        self.query_hash = None
 
     @staticmethod
     def obtain_viewer_id_query():
-        return {'query': '{viewer {id}}'}
+        return request_payload(*VIEWER_ID_QUERY)
 
     @staticmethod
     def obtain_viewer_login_query():
-        return {'query': '{viewer {login}}'}
+        return request_payload(*VIEWER_LOGIN_QUERY)
+
+    @staticmethod
+    def obtain_viewer_query():
+        return request_payload(*VIEWER_QUERY)
 
     @staticmethod
     def obtain_repository_id(repository_name: str):
-        return {'query': f'{{viewer {{repository (name: {repository_name}) {{ id }} }} }}'}
+        return request_payload(*REPOSITORY_ID_QUERY, variables={'name': repository_name})
+
+    @staticmethod
+    def repository_alias(index: int) -> str:
+        return f'r{index}'
+
+    @classmethod
+    def obtain_repository_ids(cls, repository_names: [str]):
+        """
+        Query of node IDs of many viewer's repositories at once, each repository is queried in its own aliased block:
+        query($name0: String!, ...) { viewer { r0: repository(name: $name0) { id name } r1: ... } }
+        :param repository_names: names of the repositories
+        :return: request payload
+        """
+        indexes = range(len(repository_names))
+        document = compile_document(REPOSITORY_IDS_TEMPLATE,
+                                    variables=", ".join(f'$name{i}: String!' for i in indexes),
+                                    blocks=" ".join(f'{cls.repository_alias(i)}: repository(name: $name{i}) '
+                                                    f'{{ id name }}' for i in indexes))
+        return request_payload(*document, variables={f'name{i}': name for i, name in enumerate(repository_names)})
+
+    @staticmethod
+    def obtain_repository_projects(repository_name: str, project_name: str):
+        return request_payload(*REPOSITORY_PROJECTS_QUERY, variables={'name': repository_name,
+                                                                      'project': project_name})
 
     def construct_query(self):
-        attributes_as_string = [f'{k}: "{v}"' for k, v in self.payload[1].items()]
-        self.query = f'mutation {{ {self.payload[0]}(input: ' \
-            f'{{ {", ".join(attr for attr in attributes_as_string) } }}) ' \
-            f'{{ clientMutationId }} }}'
+        action = self.payload[0]
+        self.query, self.query_hash = compile_document(MUTATION_TEMPLATE, action=action,
+                                                       input_type=f'{action[0].upper()}{action[1:]}Input')
 
     def __dict__(self):
-        return {'query': self.query}
+        return request_payload(self.query, self.query_hash, {'input': self.payload[1]})
@@ -1,15 +1,33 @@
 from abc import abstractmethod
 
+from .graphQL_document import compile_document, request_payload
+
+CONNECTION = '{connection}(first: $first, after: $after) {{ totalCount pageInfo {{ endCursor }} ' \
+             'edges {{ node {{ {fields} }} }} }}'
+# Cost of the query reported by Github, selected at the end of paginated queries and counted by RateLimitScheduler
+RATE_LIMIT = ' rateLimit {{ cost }}'
+VIEWER_CONNECTION_TEMPLATE = 'query($first: Int!, $after: String) {{ viewer {{ ' + CONNECTION + ' }}' + RATE_LIMIT + \
+                             ' }}'
+USER_CONNECTION_TEMPLATE = 'query($login: String!, $first: Int!, $after: String) {{ user(login: $login) {{ ' + \
+                           CONNECTION + ' }}' + RATE_LIMIT + ' }}'
+# Connection ordered from the most recently updated repository, used by incremental sync
+ORDERED_CONNECTION = CONNECTION.replace('after: $after)',
+                                        'after: $after, orderBy: {{field: UPDATED_AT, direction: DESC}})')
+VIEWER_SYNC_TEMPLATE = 'query($first: Int!, $after: String) {{ viewer {{ login ' + ORDERED_CONNECTION + ' }}' + \
+                       RATE_LIMIT + ' }}'
+OWNER_SYNC_TEMPLATE = 'query($login: String!, $first: Int!, $after: String) {{ repositoryOwner(login: $login) {{ ' \
+                      'login ' + ORDERED_CONNECTION + ' }}' + RATE_LIMIT + ' }}'
+
 
 class BaseQueryClass:
-    __slots__ = 'payload', 'query'
+    __slots__ = 'payload', 'query', 'query_hash', 'variables', 'cursor'
     MAX_RESULTS = 50
 
     """
     Query structure:
-    query {
-    user {
-    OBJECT (first: N) { totalCount pageInfo {endCursor} edges { node { ATTRIBUTES } } } } } 
+    query($first: Int!, $after: String) {
+    viewer {
+    OBJECT (first: $first, after: $after) { totalCount pageInfo {endCursor} edges { node { ATTRIBUTES } } } } } 
 
     Payload structure:
     ('OBJECT', [ATTRIBUTE1, ATTRIBUTE2, ATTRIBUTE3])
@@ -18,9 +36,22 @@ class BaseQueryClass:
     def __init__(self, payload: tuple):
         self.payload = payload
         self.query = None
+        self.query_hash = None
+        self.variables = None
+        self.cursor = None
+
+    def fields(self) -> str:
+        return " ".join(item for item in self.payload[1])
+
+    def page_variables(self) -> dict:
+        """
+        Returns pagination variables of the query, continuing after cursor if there is any
+        :return: variables dictionary
+        """
+        return {'first': self.MAX_RESULTS, 'after': self.cursor}
 
     def __dict__(self):
-        return {'query': self.query}
+        return request_payload(self.query, self.query_hash, self.variables)
 
     @abstractmethod
     def construct_query(self):
@@ -34,9 +65,9 @@ class ViewerQuery(BaseQueryClass):
         super().__init__(payload)
 
     def construct_query(self):
-        self.query = f'{{viewer {{ {self.payload[0]} (first: {self.MAX_RESULTS}) {{ totalCount pageInfo ' \
-            f'{{ endCursor }} edges {{ node {{ {" ".join(item for item in self.payload[1])} ' \
-            f'}} }} }} }} }}'
+        self.query, self.query_hash = compile_document(VIEWER_CONNECTION_TEMPLATE, connection=self.payload[0],
+                                                       fields=self.fields())
+        self.variables = self.page_variables()
 
 
 class UserQuery(BaseQueryClass):
@@ -57,7 +88,85 @@ class UserQuery(BaseQueryClass):
         self._username = value
 
     def construct_query(self):
-        self.query = f'{{ user(login: {self.username})  {{ {self.payload[0]} (first: {self.MAX_RESULTS}) ' \
-            f'{{ totalCount pageInfo ' \
-            f'{{ endCursor }} edges {{ node {{ {" ".join(item for item in self.payload[1])} ' \
-            f'}} }} }} }} }}'
+        self.query, self.query_hash = compile_document(USER_CONNECTION_TEMPLATE, connection=self.payload[0],
+                                                       fields=self.fields())
+        self.variables = dict(self.page_variables(), login=self.username)
+
+
+class MultiUserQuery(BaseQueryClass):
+    """
+    Query of many users at once, each user is queried in its own aliased block:
+    query($first: Int!, $login0: String!, $after0: String, ...) {
+    u0: user(login: $login0) { OBJECT (first: $first, after: $after0) {...} } u1: user(login: $login1) { ... } }
+    """
+    __slots__ = 'payload', 'users', 'query'
+    # Maximal number of nodes requested by single query, keeps cost of the query within Github's limits
+    MAX_NODES = 1000
+
+    def __init__(self, payload: tuple, users: [(str, str)] = None):
+        """
+        :param payload: ('OBJECT', [ATTRIBUTE1, ATTRIBUTE2])
+        :param users: list of tuples (username, cursor), cursor is None for the first page
+        """
+        super().__init__(payload)
+        self.users = users if users else []
+
+    @classmethod
+    def batch_size(cls) -> int:
+        """
+        Returns number of users which fit into one query
+        :return: number of users
+        """
+        return max(1, cls.MAX_NODES // cls.MAX_RESULTS)
+
+    @staticmethod
+    def alias(index: int) -> str:
+        return f'u{index}'
+
+    @classmethod
+    def template(cls, users_count: int) -> str:
+        """
+        Creates document template for provided number of users, so the document depends only on number of users
+        :param users_count: number of aliased blocks
+        :return: document template
+        """
+        variables = ", ".join(f'$login{i}: String!, $after{i}: String' for i in range(users_count))
+        blocks = " ".join(f'{cls.alias(i)}: user(login: $login{i}) {{{{ ' +
+                          CONNECTION.replace('$after', f'$after{i}') + ' }}' for i in range(users_count))
+        return f'query($first: Int!, {variables}) {{{{ {blocks}{RATE_LIMIT} }}}}'
+
+    def construct_query(self):
+        self.query, self.query_hash = compile_document(self.template(len(self.users)), connection=self.payload[0],
+                                                       fields=self.fields())
+        self.variables = {'first': self.MAX_RESULTS}
+        for i, (username, cursor) in enumerate(self.users):
+            self.variables[f'login{i}'] = username
+            self.variables[f'after{i}'] = cursor
+
+
+class SyncQuery(BaseQueryClass):
+    """
+    Query of repositories ordered from the most recently updated one, used by incremental sync of repository index.
+    Viewer's repositories are queried if no owner is provided, otherwise repositories of user or organization:
+    query($login: String!, $first: Int!, $after: String) {
+    repositoryOwner(login: $login) { login OBJECT (first: $first, after: $after, orderBy: {...}) {...} } }
+    """
+    __slots__ = 'owner',
+
+    def __init__(self, payload: tuple, owner: str = None):
+        super().__init__(payload)
+        self.owner = owner
+
+    @property
+    def data_key(self) -> str:
+        """
+        Key of queried owner in response data
+        """
+        return 'repositoryOwner' if self.owner else 'viewer'
+
+    def construct_query(self):
+        template = OWNER_SYNC_TEMPLATE if self.owner else VIEWER_SYNC_TEMPLATE
+        self.query, self.query_hash = compile_document(template, connection=self.payload[0], fields=self.fields())
+        self.variables = self.page_variables()
+        if self.owner:
+            self.variables['login'] = self.owner
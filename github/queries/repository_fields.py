@@ -0,0 +1,149 @@
+"""
+Projection of repository fields - only fields which will be printed are requested from Github
+
+Packed repository is tuple (name, ssh_url, url, EXTRA1, EXTRA2, ...), fields excluded by output flags are "".
+"""
+
+# Output names of always present fields of packed repository, in order
+BASE_FIELDS = ('name', 'ssh_url', 'url')
+
+# Extra fields which can be requested using '--fields', output name: GraphQL field of Repository object
+EXTRA_FIELDS = {
+    'stars': 'stargazerCount',
+    'forks': 'forkCount',
+    'updated_at': 'updatedAt',
+    'created_at': 'createdAt',
+    'pushed_at': 'pushedAt',
+    'disk_usage': 'diskUsage',
+    'visibility': 'visibility',
+    'description': 'description',
+    'private': 'isPrivate',
+    'archived': 'isArchived',
+    'fork': 'isFork',
+}
+GRAPHQL_TO_EXTRA_FIELDS = {graphql_field: field for field, graphql_field in EXTRA_FIELDS.items()}
+GRAPHQL_TO_BASE_FIELDS = {'name': 'name', 'sshUrl': 'ssh_url', 'url': 'url'}
+
+# GraphQL fields stored in local repository index, so offline listings can print any field
+INDEXED_FIELDS = ['id', 'name', 'sshUrl', 'url'] + list(EXTRA_FIELDS.values())
+
+
+def selected_base_fields(args) -> (bool, bool, bool):
+    """
+    Determines which of base fields are printed according to '--url_only', '--https' and '--both_urls' flags
+    :param args: CLI arguments
+    :return: tuple of booleans (name, ssh_url, url)
+    """
+    url_only = getattr(args, 'url_only', False)
+    https = getattr(args, 'https', False)
+    both_urls = getattr(args, 'both_urls', False)
+    return not url_only, not https or both_urls, https or both_urls
+
+
+def resolve_field(field: str) -> str:
+    """
+    Translates name of repository field to its output name, GraphQL names are accepted as well
+    :param field: output or GraphQL name, e.g. 'stars' or 'stargazerCount'
+    :return: output name
+    :raise: ValueError in case of unknown field
+    """
+    field = GRAPHQL_TO_BASE_FIELDS.get(field, GRAPHQL_TO_EXTRA_FIELDS.get(field, field))
+    if field not in BASE_FIELDS and field not in EXTRA_FIELDS:
+        raise ValueError(f"Unknown field {field}, available fields: {', '.join(BASE_FIELDS + tuple(EXTRA_FIELDS))}")
+    return field
+
+
+def sort_fields(args) -> [(str, bool)]:
+    """
+    Parses '--sort' option, e.g. '--sort=-stars,name', fields prefixed with '-' are sorted in descending order
+    :param args: CLI arguments
+    :return: list of tuples (output name, descending) from the most significant field
+    :raise: ValueError in case of unknown field
+    """
+    fields = []
+    for field in (getattr(args, 'sort', None) or '').split(','):
+        field = field.strip()
+        if field:
+            fields.append((resolve_field(field.lstrip('-')), field.startswith('-')))
+    return fields
+
+
+def filter_patterns(args) -> [(str, str)]:
+    """
+    Parses '--filter' options, e.g. '--filter visibility=PUBLIC --filter name=cli_*'
+    :param args: CLI arguments
+    :return: list of tuples (output name, pattern)
+    :raise: ValueError in case of unknown field or missing '='
+    """
+    patterns = []
+    for field_filter in getattr(args, 'filter', None) or []:
+        field, separator, pattern = field_filter.partition('=')
+        if not separator:
+            raise ValueError(f"Filter {field_filter} has to be in form FIELD=PATTERN")
+        patterns.append((resolve_field(field.strip()), pattern))
+    return patterns
+
+
+def unique_field(args) -> str:
+    """
+    Parses '--unique' option
+    :param args: CLI arguments
+    :return: output name of the field or None if the option wasn't provided
+    :raise: ValueError in case of unknown field
+    """
+    field = getattr(args, 'unique', None)
+    return resolve_field(field) if field else None
+
+
+def arranged_fields(args) -> [str]:
+    """
+    Returns fields used by '--sort', '--filter' and '--unique', these have to be requested even if not in '--fields'
+    :param args: CLI arguments
+    :return: list of output names
+    """
+    fields = [field for field, _ in sort_fields(args)] + [field for field, _ in filter_patterns(args)]
+    return fields + ([unique_field(args)] if unique_field(args) else [])
+
+
+def extra_fields(args) -> [str]:
+    """
+    Parses extra fields from '--fields' option, e.g. '--fields stars,updated_at'. GraphQL names are accepted as well.
+    Extra fields used for sorting, filtering or deduplication are appended, so they're requested and printed.
+    :param args: CLI arguments
+    :return: list of output names of extra fields
+    :raise: ValueError in case of unknown field
+    """
+    fields = []
+    for field in (getattr(args, 'fields', None) or '').split(','):
+        field = field.strip()
+        if not field:
+            continue
+        field = GRAPHQL_TO_EXTRA_FIELDS.get(field, field)
+        if field not in EXTRA_FIELDS:
+            raise ValueError(f"Unknown field {field}, available fields: {', '.join(EXTRA_FIELDS)}")
+        if field not in fields:
+            fields.append(field)
+    for field in arranged_fields(args):
+        if field in EXTRA_FIELDS and field not in fields:
+            fields.append(field)
+    return fields
+
+
+def query_fields(args) -> [str]:
+    """
+    Returns GraphQL fields of Repository object which have to be requested to print output selected by arguments
+    :param args: CLI arguments
+    :return: list of GraphQL fields
+    """
+    fields = [graphql_field for graphql_field, selected in zip(('name', 'sshUrl', 'url'), selected_base_fields(args))
+              if selected]
+    return fields + [EXTRA_FIELDS[field] for field in extra_fields(args)]
+
+
+def output_fields(args) -> [str]:
+    """
+    Returns output names of fields of packed repository
+    :param args: CLI arguments
+    :return: list of output names aligned with packed repository tuple
+    """
+    return list(BASE_FIELDS) + extra_fields(args)
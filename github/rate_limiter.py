@@ -0,0 +1,179 @@
+from threading import Lock
+from time import time, sleep, strftime, localtime
+
+from .common import StreamedAPIResponse
+from .logger import logger
+
+
+def rate_limit_headers(response) -> (int, int, float):
+    """
+    Reads rate limit budget reported by Github in response headers
+    :param response: APIResponse
+    :return: tuple (limit, remaining, reset) or None if the headers are missing
+    """
+    headers = response.headers
+    try:
+        return int(headers['X-RateLimit-Limit']), int(headers['X-RateLimit-Remaining']), \
+            float(headers['X-RateLimit-Reset'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def graphql_cost(document) -> int:
+    """
+    Reads cost of GraphQL query reported in 'rateLimit' object selected by the query
+    :param document: decoded GraphQL response
+    :return: cost or None if the query didn't select it
+    """
+    data = document.get('data') if isinstance(document, dict) else None
+    rate_limit = data.get('rateLimit') if isinstance(data, dict) else None
+    return rate_limit.get('cost') if isinstance(rate_limit, dict) else None
+
+
+class RateLimitBucket:
+    """
+    State of one rate limit budget (REST or GraphQL) as reported by Github
+    """
+    __slots__ = 'limit', 'remaining', 'reset', 'used', 'requests', 'next_request'
+
+    def __init__(self):
+        self.limit = None
+        self.remaining = None
+        self.reset = None
+        self.used = 0
+        self.requests = 0
+        self.next_request = 0
+
+    def observe(self, limit: int, remaining: int, reset: float, cost: int = None):
+        """
+        Updates the budget with values reported in response
+        :param limit: maximal budget of the window
+        :param remaining: budget remaining in the window
+        :param reset: epoch time when the window resets
+        :param cost: cost of the request if known, otherwise it's derived from change of remaining budget
+        :return: None
+        """
+        if cost is None:
+            if self.remaining is not None and reset == self.reset and remaining <= self.remaining:
+                cost = self.remaining - remaining
+            else:
+                cost = 1
+        self.used += cost
+        self.requests += 1
+        self.limit, self.remaining, self.reset = limit, remaining, reset
+
+
+class RateLimitScheduler:
+    """
+    Scheduler every request goes through, it paces requests according to remaining rate limit budget
+
+    REST and GraphQL budgets are tracked separately. Once remaining budget drops below PACING_THRESHOLD of the limit,
+    requests are spread evenly over the rest of the window. Exhausted budget waits for reset of the window and
+    secondary rate limits are backed off using 'Retry-After' header.
+    """
+    __slots__ = 'buckets', 'lock', 'pacing_threshold', 'max_retries', 'sleep'
+    PACING_THRESHOLD = 0.1
+    MAX_RETRIES = 3
+    SECONDARY_LIMIT_BACKOFF = 60
+
+    def __init__(self, pacing_threshold: float = PACING_THRESHOLD, max_retries: int = MAX_RETRIES, sleep=sleep):
+        self.buckets = {'rest': RateLimitBucket(), 'graphql': RateLimitBucket()}
+        self.lock = Lock()
+        self.pacing_threshold = pacing_threshold
+        self.max_retries = max_retries
+        self.sleep = sleep
+
+    def delay(self, kind: str) -> float:
+        """
+        Computes how long the next request of provided kind has to wait and reserves its time slot
+        :param kind: 'rest' or 'graphql'
+        :return: delay in seconds
+        """
+        bucket = self.buckets[kind]
+        with self.lock:
+            now = time()
+            if bucket.remaining is None or not bucket.limit or bucket.reset <= now:
+                wait = 0
+            elif bucket.remaining <= 0:
+                wait = bucket.reset - now
+            elif bucket.remaining < bucket.limit * self.pacing_threshold:
+                wait = max(0, bucket.next_request - now)
+                bucket.next_request = now + wait + (bucket.reset - now) / bucket.remaining
+            else:
+                wait = 0
+        return wait
+
+    def acquire(self, kind: str):
+        """
+        Blocks until request of provided kind may be sent
+        :param kind: 'rest' or 'graphql'
+        :return: None
+        """
+        wait = self.delay(kind)
+        if wait > 0:
+            logger.info("Rate limit budget is low, waiting %.1f s before next %s request", wait, kind)
+            self.sleep(wait)
+
+    def update(self, kind: str, response, budget: (int, int, float) = None):
+        """
+        Updates budget of provided kind from rate limit headers (and GraphQL 'rateLimit' object) of response, cost of
+        streamed GraphQL response is counted by count_cost once its body is read
+        :param kind: 'rest' or 'graphql'
+        :param response: APIResponse
+        :param budget: tuple (limit, remaining, reset) used instead of the headers, e.g. combined budget of TokenPool
+        :return: None
+        """
+        observed = rate_limit_headers(response)
+        if observed is None:
+            return
+        limit, remaining, reset = budget or observed
+        cost = None
+        if kind == 'graphql':
+            cost = 0 if isinstance(response, StreamedAPIResponse) else graphql_cost(response.json)
+        with self.lock:
+            self.buckets[kind].observe(limit, remaining, reset, cost)
+
+    def count_cost(self, kind: str, cost: int = None):
+        """
+        Counts cost of streamed response into used budget
+        :param kind: 'rest' or 'graphql'
+        :param cost: cost reported in the response body, single point if it's unknown
+        :return: None
+        """
+        with self.lock:
+            self.buckets[kind].used += cost if cost is not None else 1
+
+    def retry_after(self, response, attempt: int) -> float:
+        """
+        Checks whether request was rejected by primary or secondary rate limit and computes how long to wait
+        :param response: APIResponse
+        :param attempt: number of already retried attempts
+        :return: seconds to wait before retrying or None if the request should not be retried
+        """
+        if response.status_code not in (403, 429) or attempt >= self.max_retries:
+            return None
+        headers = response.headers
+        if 'Retry-After' in headers:
+            try:
+                return float(headers['Retry-After'])
+            except ValueError:
+                pass
+        if headers.get('X-RateLimit-Remaining') == '0' and 'X-RateLimit-Reset' in headers:
+            return max(0, float(headers['X-RateLimit-Reset']) - time())
+        if 'rate limit' in response.message.lower():
+            return self.SECONDARY_LIMIT_BACKOFF * 2 ** attempt
+        return None
+
+    def report(self) -> str:
+        """
+        Creates summary of budget used by requests sent through the scheduler
+        :return: human readable report
+        """
+        lines = []
+        for kind, bucket in self.buckets.items():
+            if not bucket.requests:
+                continue
+            lines.append(f"{'REST' if kind == 'rest' else 'GraphQL'} rate limit: {bucket.used} used by "
+                         f"{bucket.requests} request(s), {bucket.remaining} of {bucket.limit} remaining, "
+                         f"resets at {strftime('%H:%M:%S', localtime(bucket.reset))}")
+        return "\n".join(lines) if lines else "No rate limited request was sent"
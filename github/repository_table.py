@@ -0,0 +1,127 @@
+from fnmatch import fnmatchcase
+from sys import intern
+
+from .queries.repository_fields import BASE_FIELDS
+
+
+class RepositoryTable:
+    """
+    Column-oriented container of packed repositories, used when a listing is sorted, filtered or deduplicated
+
+    Every printed field is stored in its own list, fields excluded by output flags are not stored at all (no ""
+    placeholders) and strings are interned, so repeated values (e.g. visibility or timestamps) are stored once.
+    Sorting, filtering and deduplication only rearrange list of row indexes, values are never copied. Output writers
+    read rows straight from the columns, see OutputWriter.write_table. Messages (e.g. unresolved users) are kept
+    aside and written after the rows.
+    """
+    __slots__ = 'width', 'fields', 'positions', 'columns', 'order', 'messages'
+
+    def __init__(self, fields: [str], selected_base_fields: (bool, bool, bool) = (True, True, True)):
+        """
+        :param fields: output names of fields of packed repository, see output_fields
+        :param selected_base_fields: which of base fields are printed, see selected_base_fields
+        """
+        self.width = len(fields)
+        self.positions = [position for position in range(len(fields))
+                          if position >= len(BASE_FIELDS) or selected_base_fields[position]]
+        self.fields = [fields[position] for position in self.positions]
+        self.columns = [[] for _ in self.positions]
+        self.order = None
+        self.messages = []
+
+    def __len__(self):
+        return len(self.indexes())
+
+    def __iter__(self):
+        """
+        Iterates rows as packed repositories, i.e. tuples including "" of fields excluded by output flags, followed
+        by messages
+        """
+        for values in self.rows():
+            packed = [""] * self.width
+            for position, value in zip(self.positions, values):
+                packed[position] = value
+            yield tuple(packed)
+        yield from self.messages
+
+    def extend(self, items):
+        """
+        Appends packed repositories, other items are stored as messages
+        :param items: iterable of packed repositories and messages
+        :return: None
+        """
+        columns = list(zip(self.positions, self.columns))
+        for item in items:
+            if not isinstance(item, tuple):
+                self.messages.append(str(item))
+                continue
+            for position, column in columns:
+                value = item[position]
+                column.append(intern(value) if type(value) is str else value)
+
+    def indexes(self):
+        """
+        :return: indexes of rows in current order
+        """
+        return self.order if self.order is not None else range(len(self.columns[0]) if self.columns else 0)
+
+    def column(self, field: str) -> list:
+        """
+        :param field: output name of the field
+        :return: values of the field, indexed by row
+        :raise: ValueError in case the field is not printed
+        """
+        if field not in self.fields:
+            raise ValueError(f"Field {field} is not printed, it can't be used for sorting, filtering or deduplication")
+        return self.columns[self.fields.index(field)]
+
+    def sort(self, field: str, descending: bool = False):
+        """
+        Sorts rows by the field (strings case insensitive, missing values last), sort is stable, so sorting by less
+        significant field first and by more significant one afterwards sorts by both
+        :param field: output name of the field
+        :param descending: sort in descending order
+        :return: None
+        """
+        keys = [((value is None) != descending, value.lower() if isinstance(value, str) else value)
+                for value in self.column(field)]
+        order = list(self.indexes())
+        order.sort(key=keys.__getitem__, reverse=descending)
+        self.order = order
+
+    def filter(self, field: str, pattern: str):
+        """
+        Keeps rows whose value of the field matches the pattern, case insensitive. Pattern may contain shell wildcards
+        (*, ?, [...]), booleans match 'true' and 'false', missing values match empty pattern.
+        :param field: output name of the field
+        :param pattern: pattern, e.g. 'PUBLIC', 'cli_*' or 'true'
+        :return: None
+        """
+        column = self.column(field)
+        pattern = pattern.lower()
+        self.order = [index for index in self.indexes()
+                      if fnmatchcase('' if column[index] is None else str(column[index]).lower(), pattern)]
+
+    def unique(self, field: str):
+        """
+        Keeps only the first row (in current order) of every value of the field, strings are compared case insensitive
+        :param field: output name of the field
+        :return: None
+        """
+        column = self.column(field)
+        seen = set()
+        order = []
+        for index in self.indexes():
+            value = column[index]
+            key = value.lower() if isinstance(value, str) else value
+            if key not in seen:
+                seen.add(key)
+                order.append(index)
+        self.order = order
+
+    def rows(self):
+        """
+        :return: iterator over tuples of values of printed fields (aligned with 'fields'), in current order
+        """
+        indexes = self.indexes()
+        return zip(*(map(column.__getitem__, indexes) for column in self.columns))
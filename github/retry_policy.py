@@ -0,0 +1,119 @@
+from random import uniform
+from threading import Lock
+from time import time, sleep
+
+from .common import CircuitOpenException
+from .logger import logger
+
+
+class CircuitBreaker:
+    """
+    Fails fast when Github API is clearly down
+
+    After FAILURE_THRESHOLD consecutive transient failures the circuit opens and requests are rejected for
+    RESET_TIMEOUT seconds. Then a single trial request is let through (half-open state), its success closes the circuit
+    and its failure opens it again.
+    """
+    __slots__ = 'failure_threshold', 'reset_timeout', 'failures', 'opened_at', 'trial', 'lock'
+    FAILURE_THRESHOLD = 5
+    RESET_TIMEOUT = 30
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, reset_timeout: float = RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False
+        self.lock = Lock()
+
+    def before_request(self):
+        """
+        Checks whether request may be sent
+        :return: None
+        :raise: CircuitOpenException in case the circuit is open
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_timeout - time()
+            if remaining > 0 or self.trial:
+                raise CircuitOpenException(f"Github API seems to be unavailable ({self.failures} consecutive "
+                                           f"failures), try again in {max(remaining, 1):.0f} s")
+            self.trial = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self.trial:
+                    logger.warning("Github API failed %d times in a row, pausing requests for %s s",
+                                   self.failures, self.reset_timeout)
+                self.opened_at = time()
+                self.trial = False
+
+
+class RetryPolicy:
+    """
+    Retry policy of transient failures - connection errors, timeouts and 5xx responses
+
+    Idempotent requests (GET, GraphQL queries) are retried automatically, mutations only after it's verified that they
+    didn't take effect. Delay before retry grows exponentially and it's fully jittered, i.e. uniformly random between 0
+    and BASE_DELAY * 2 ** attempt (at most MAX_DELAY), so concurrent clients don't retry in lockstep. Every request is
+    sent with (connect, read) timeout, so stalled connection fails with Timeout and it's retried as well.
+    """
+    __slots__ = 'max_retries', 'base_delay', 'max_delay', 'timeout', 'circuit_breaker', 'sleep'
+    TRANSIENT_STATUS_CODES = (500, 502, 503, 504)
+    MAX_RETRIES = 3
+    BASE_DELAY = 0.5
+    MAX_DELAY = 20
+    CONNECT_TIMEOUT = 10
+    READ_TIMEOUT = 30
+
+    def __init__(self, max_retries: int = MAX_RETRIES, base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY,
+                 circuit_breaker: CircuitBreaker = None, sleep=sleep, timeout: tuple = (CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.circuit_breaker = circuit_breaker if circuit_breaker else CircuitBreaker()
+        self.sleep = sleep
+
+    def is_transient(self, response) -> bool:
+        """
+        Checks whether response is transient server failure
+        :param response: APIResponse
+        :return: True if the request may succeed when retried
+        """
+        return response is not None and response.status_code in self.TRANSIENT_STATUS_CODES
+
+    def should_retry(self, attempt: int) -> bool:
+        """
+        :param attempt: number of already retried attempts
+        :return: True if another retry is allowed
+        """
+        return attempt < self.max_retries
+
+    def delay(self, attempt: int) -> float:
+        """
+        Computes jittered exponential delay before retry
+        :param attempt: number of already retried attempts
+        :return: delay in seconds
+        """
+        return uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def wait(self, attempt: int, reason: str = "Transient failure"):
+        """
+        Sleeps before retry
+        :param attempt: number of already retried attempts
+        :param reason: description of the failure, logged
+        :return: None
+        """
+        delay = self.delay(attempt)
+        logger.warning("%s, retrying in %.1f s (retry %d of %d)", reason, delay, attempt + 1, self.max_retries)
+        self.sleep(delay)
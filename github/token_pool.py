@@ -0,0 +1,123 @@
+from threading import Lock
+from time import time
+
+from .logger import logger
+from .rate_limiter import RateLimitBucket, rate_limit_headers
+
+
+class TokenPool:
+    """
+    Pool of API keys requests are spread over, e.g. several tokens of service account
+
+    Every request is sent with the key having the most of remaining rate limit budget of its kind (REST or GraphQL),
+    so bulk jobs get combined budget of all keys. Keys whose budget isn't known yet are preferred, exhausted keys are
+    used only when all keys are exhausted (the one whose window resets first). Keys rejected by Github (revoked or
+    expired) are taken out of rotation, except for the last one, whose errors are reported as before.
+    """
+    __slots__ = 'tokens', 'buckets', 'revoked', 'lock'
+    KINDS = ('rest', 'graphql')
+
+    def __init__(self, tokens: [str]):
+        """
+        :param tokens: API keys, duplicates are ignored
+        """
+        self.tokens = list(dict.fromkeys(tokens))
+        self.buckets = {(token, kind): RateLimitBucket() for token in self.tokens for kind in self.KINDS}
+        self.revoked = 0
+        self.lock = Lock()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def budget(self, token: str, kind: str, now: float) -> float:
+        """
+        :param token: API key
+        :param kind: 'rest' or 'graphql'
+        :param now: current epoch time
+        :return: remaining budget of the key, infinity if it's unknown, time to reset (negative) if it's exhausted
+        """
+        bucket = self.buckets[token, kind]
+        if bucket.remaining is None:
+            return float('inf')
+        if bucket.reset <= now:
+            return bucket.limit
+        if bucket.remaining <= 0:
+            return now - bucket.reset
+        return bucket.remaining
+
+    def acquire(self, kind: str) -> str:
+        """
+        Picks key for the next request of provided kind, one request of its budget is reserved until response reports
+        the actual budget, so concurrent requests are spread over the keys as well
+        :param kind: 'rest' or 'graphql'
+        :return: API key
+        """
+        if len(self.tokens) == 1:
+            return self.tokens[0]
+        with self.lock:
+            now = time()
+            token = max(self.tokens, key=lambda candidate: self.budget(candidate, kind, now))
+            bucket = self.buckets[token, kind]
+            if bucket.remaining and bucket.reset > now:
+                bucket.remaining -= 1
+        return token
+
+    def update(self, token: str, kind: str, response):
+        """
+        Updates budget of the key from rate limit headers of response
+        :param token: API key the request was sent with
+        :param kind: 'rest' or 'graphql'
+        :param response: APIResponse
+        :return: None
+        """
+        observed = rate_limit_headers(response)
+        if observed is not None and (token, kind) in self.buckets:
+            with self.lock:
+                self.buckets[token, kind].observe(*observed, cost=1)
+
+    def revoke(self, token: str) -> bool:
+        """
+        Takes key rejected by Github out of rotation
+        :param token: API key
+        :return: True if the request may be retried with another key, False otherwise
+        """
+        with self.lock:
+            if token not in self.tokens or len(self.tokens) == 1:
+                return len(self.tokens) > 1
+            self.tokens.remove(token)
+            self.revoked += 1
+        logger.warning("API key ending with '%s' was rejected (revoked or expired), %d key(s) left in rotation",
+                       token[-4:], len(self.tokens))
+        return True
+
+    def has_budget(self, kind: str) -> bool:
+        """
+        :param kind: 'rest' or 'graphql'
+        :return: True if any of keys isn't exhausted
+        """
+        now = time()
+        with self.lock:
+            return any(self.budget(token, kind, now) > 0 for token in self.tokens)
+
+    def combined(self, kind: str) -> (int, int, float):
+        """
+        Combined budget of keys in rotation, keys whose budget isn't known yet count with full budget
+        :param kind: 'rest' or 'graphql'
+        :return: tuple (limit, remaining, reset) where reset is the earliest reset of the windows
+        """
+        now = time()
+        with self.lock:
+            buckets = [self.buckets[token, kind] for token in self.tokens]
+            known = [bucket for bucket in buckets if bucket.remaining is not None]
+            full = max(bucket.limit for bucket in known) if known else 0
+            resets = [bucket.reset for bucket in known if bucket.reset > now]
+            return (sum(bucket.limit if bucket.remaining is not None else full for bucket in buckets),
+                    sum(full if bucket.remaining is None else bucket.limit if bucket.reset <= now
+                        else max(bucket.remaining, 0) for bucket in buckets),
+                    min(resets) if resets else now)
+
+    def report(self) -> str:
+        """
+        :return: human readable description of the pool
+        """
+        return f"{len(self.tokens)} API key(s) in rotation" + (f", {self.revoked} revoked" if self.revoked else "")
@@ -0,0 +1,80 @@
+"""
+HTTP adapter recording connection set-up times (DNS, TCP, TLS) into the request span of the tracer
+
+It's mounted into session only when tracing is enabled, so regular commands use plain HTTPAdapter.
+"""
+from socket import getaddrinfo, SOCK_STREAM
+from time import perf_counter
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+from .tracing import tracer
+
+
+class ConnectTimingMixin:
+    """
+    Times new connections of urllib3 connection class, reused (keep-alive) connections record nothing. The host is
+    resolved by the mixin itself and connection is made to resolved address, so DNS and TCP phases are timed separately
+    without a second lookup.
+    """
+
+    def _new_conn(self):
+        span = tracer.current()
+        host = self._dns_host
+        start = perf_counter()
+        try:
+            addresses = [address[4][0] for address in getaddrinfo(host, self.port, allowed_gai_family(), SOCK_STREAM)]
+        except OSError:
+            # Resolution error is reported by urllib3 the usual way
+            return super()._new_conn()
+        resolved = perf_counter()
+        try:
+            # Connection is made to the resolved addresses in their order, so the host is resolved only once
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    connection = super()._new_conn()
+                    break
+                except ConnectTimeoutError:
+                    if address == addresses[-1]:
+                        raise
+        finally:
+            self._dns_host = host
+        span.set(dns_ms=(resolved - start) * 1000, tcp_ms=(perf_counter() - resolved) * 1000)
+        return connection
+
+    def connect(self):
+        span = tracer.current()
+        start = perf_counter()
+        super().connect()
+        connect_ms = (perf_counter() - start) * 1000
+        span.set(connect_ms=connect_ms)
+        if isinstance(self, HTTPSConnection) and 'tcp_ms' in getattr(span, 'args', {}):
+            span.set(tls_ms=max(0.0, connect_ms - span.args['dns_ms'] - span.args['tcp_ms']))
+
+
+class TracedHTTPConnection(ConnectTimingMixin, HTTPConnection):
+    pass
+
+
+class TracedHTTPSConnection(ConnectTimingMixin, HTTPSConnection):
+    pass
+
+
+class TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TracedHTTPConnection
+
+
+class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TracedHTTPSConnection
+
+
+class TracedHTTPAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TracedHTTPConnectionPool,
+                                                   'https': TracedHTTPSConnectionPool}
@@ -0,0 +1,167 @@
+from json import dump
+from threading import Lock, local, get_ident
+from time import perf_counter
+
+# Timed phases of request span, attribute: label
+REQUEST_PHASES = (('dns_ms', 'DNS'), ('tcp_ms', 'TCP'), ('tls_ms', 'TLS'), ('ttfb_ms', 'TTFB'))
+
+
+class Span:
+    """
+    Timed section of the command, e.g. HTTP request, JSON decoding or output rendering
+
+    Spans are used as context managers, attributes (status code, bytes, ...) may be added while the span is open.
+    """
+    __slots__ = 'tracer', 'name', 'category', 'args', 'start', 'end', 'thread'
+
+    def __init__(self, tracer, name: str, category: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.start = None
+        self.end = None
+        self.thread = get_ident()
+
+    def set(self, **args):
+        """
+        Adds attributes to the span
+        :param args: attributes, e.g. status=200
+        :return: None
+        """
+        self.args.update(args)
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) * 1000 if self.end is not None else 0.0
+
+    def __enter__(self):
+        self.tracer.push(self)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end = perf_counter()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.pop(self)
+        return False
+
+
+class NullSpan:
+    """
+    Span of disabled tracer, it records nothing and costs next to nothing
+    """
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    """
+    Collects spans of the command, enabled by '--profile' or '--trace_file'
+
+    Finished spans can be summarized per name or exported as Chrome trace-event file (chrome://tracing, Perfetto).
+    """
+    __slots__ = 'enabled', 'spans', 'lock', 'local', 'origin'
+
+    def __init__(self):
+        self.enabled = False
+        self.spans = []
+        self.lock = Lock()
+        self.local = local()
+        self.origin = perf_counter()
+
+    def enable(self):
+        if not self.enabled:
+            self.enabled = True
+            self.origin = perf_counter()
+
+    def disable(self):
+        self.enabled = False
+        self.spans = []
+
+    def span(self, name: str, category: str = 'action', **args):
+        """
+        Creates span, which is recorded once it's closed
+        :param name: name of the span, e.g. 'POST /graphql'
+        :param category: kind of the span - action, request, decode or render
+        :param args: attributes of the span
+        :return: Span, or NullSpan if tracing is disabled
+        """
+        return Span(self, name, category, args) if self.enabled else NULL_SPAN
+
+    def current(self):
+        """
+        Returns innermost open span of the calling thread
+        :return: Span, or NullSpan if there is none
+        """
+        stack = getattr(self.local, 'stack', None)
+        return stack[-1] if stack else NULL_SPAN
+
+    def push(self, span: Span):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        self.local.stack.append(span)
+
+    def pop(self, span: Span):
+        stack = self.local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        with self.lock:
+            self.spans.append(span)
+
+    def summary(self) -> str:
+        """
+        Creates human readable timing summary - every request on its own line, followed by totals per span name
+        :return: summary
+        """
+        spans = sorted(self.spans, key=lambda span: span.start)
+        lines = ["Requests:"]
+        for span in spans:
+            if span.category != 'request':
+                continue
+            args = span.args
+            details = [f"{args[key]:.1f} ms {label}" for key, label in REQUEST_PHASES if key in args]
+            lines.append(f"  {span.name}{' ' + args['query'] if 'query' in args else ''} -> {args.get('status', '-')}"
+                         f": {span.duration:.1f} ms total, {', '.join(details) + ', ' if details else ''}"
+                         f"{args.get('request_bytes', 0)} B sent, {args.get('response_bytes', 0)} B received"
+                         f"{', ' + str(args['retries']) + ' retries' if args.get('retries') else ''}")
+        if len(lines) == 1:
+            lines.append("  no request was sent")
+
+        totals = {}
+        for span in spans:
+            count, total, longest = totals.get((span.category, span.name), (0, 0.0, 0.0))
+            totals[(span.category, span.name)] = count + 1, total + span.duration, max(longest, span.duration)
+        lines.append(f"{'Span':<40} {'count':>6} {'total ms':>10} {'max ms':>10}")
+        for (category, name), (count, total, longest) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{category + ': ' + name:<40} {count:>6} {total:>10.1f} {longest:>10.1f}")
+        return "\n".join(lines)
+
+    def chrome_trace(self) -> dict:
+        """
+        Exports spans as Chrome trace-event format ('X' complete events, microseconds)
+        :return: trace dictionary
+        """
+        return {'traceEvents': [{'name': span.name, 'cat': span.category, 'ph': 'X', 'pid': 1, 'tid': span.thread,
+                                 'ts': round((span.start - self.origin) * 1e6), 'dur': round(span.duration * 1000),
+                                 'args': span.args} for span in self.spans],
+                'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path: str):
+        with open(path, 'w') as trace_file:
+            dump(self.chrome_trace(), trace_file, default=str)
+
+
+tracer = Tracer()
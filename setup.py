@@ -23,7 +23,7 @@ setup(
     platforms=['linux'],
     license="GPL",
     install_requires=requirements,
-    packages=['github', 'github.common', 'github.queries'],
+    packages=['github', 'github.cache', 'github.common', 'github.queries'],
     python_requires=">=3.6",
     entry_points={
         'console_scripts': [
@@ -0,0 +1,14 @@
+from pytest import fixture
+
+from github.tracing import tracer
+
+
+@fixture(autouse=True)
+def isolated_cache_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv('GITHUB_CLI_CACHE_DIR', str(tmp_path / 'cache'))
+
+
+@fixture(autouse=True)
+def disabled_tracer():
+    yield
+    tracer.disable()
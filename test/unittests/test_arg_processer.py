@@ -1,6 +1,10 @@
 from argparse import ArgumentParser
+from os.path import dirname
+from subprocess import run, PIPE
+from sys import executable
 from unittest import mock
 
+import github
 from github.authentication import load_api_key, register_api_key
 from github.github_controller import GithubController
 
@@ -68,3 +72,17 @@ def test_invalid_option(github_ctl, parser):
         assert not github_ctl.process_args()
         assert not mockingbird.called
 
+
+
+def test_help_does_not_import_network_dependencies():
+    # Start-up path of the CLI has to stay lightweight, network and output dependencies are imported lazily
+    code = "import sys\n" \
+           "sys.argv = ['github', '--help']\n" \
+           "from github.__main__ import main\n" \
+           "try:\n" \
+           "    main()\n" \
+           "except SystemExit:\n" \
+           "    pass\n" \
+           "print('loaded:', *(module for module in ('requests', 'colorama') if module in sys.modules))"
+    result = run([executable, '-c', code], cwd=f'{dirname(github.__file__)}/..', stdout=PIPE, universal_newlines=True)
+    assert result.stdout.splitlines()[-1] == "loaded:"
@@ -0,0 +1,102 @@
+from argparse import ArgumentParser
+from json import dumps
+from logging import disable as disable_logger, CRITICAL
+from unittest import mock
+
+from pytest import raises
+
+from github.argparser import actions
+from github.batch import load_manifest, manifest_item_args
+from github.common import InvalidNumberOfArgumentsException
+from github.github_controller import GithubController
+
+disable_logger(CRITICAL)
+
+MANIFEST = [{"action": "create-repository", "parameters": ["repo1"], "private": True, "description": "desc"},
+            {"action": "delete-repository", "parameters": "repo2"},
+            {"action": "create-repository", "parameters": ["repo3"]}]
+
+
+def setup_parser():
+    parser = ArgumentParser()
+    parser.add_argument("action", nargs=1)
+    parser.add_argument("parameters", nargs="*")
+    parser.add_argument("--both_urls", action="store_true")
+    parser.add_argument("--url_only", action="store_true")
+    parser.add_argument("--https", action="store_true")
+    parser.add_argument("--private", action="store_true")
+    parser.add_argument("--no_numbers", action="store_true")
+    parser.add_argument("--description")
+    parser.add_argument("--no_confirm", action="store_true")
+    parser.add_argument("--workers", type=int, default=4)
+    return parser
+
+
+def test_load_manifest(tmp_path):
+    json_manifest = tmp_path / "manifest.json"
+    json_manifest.write_text(dumps({"actions": MANIFEST}))
+    assert load_manifest(str(json_manifest)) == MANIFEST
+
+    ndjson_manifest = tmp_path / "manifest.ndjson"
+    ndjson_manifest.write_text("\n".join(dumps(item) for item in MANIFEST) + "\n\n")
+    assert load_manifest(str(ndjson_manifest)) == MANIFEST
+
+    yaml_manifest = tmp_path / "manifest.yaml"
+    yaml_manifest.write_text("- action: create-repository\n  parameters: [repo1]\n  private: true\n")
+    try:
+        assert load_manifest(str(yaml_manifest)) == [{"action": "create-repository", "parameters": ["repo1"],
+                                                      "private": True}]
+    except ImportError:
+        pass
+
+    invalid_manifest = tmp_path / "invalid.json"
+    invalid_manifest.write_text(dumps([{"parameters": ["repo1"]}]))
+    with raises(ValueError):
+        load_manifest(str(invalid_manifest))
+
+
+def test_manifest_item_args():
+    defaults = setup_parser().parse_args(["batch", "manifest.json", "--https"])
+    item_args = manifest_item_args(MANIFEST[0], defaults)
+    assert item_args.action == ["create-repository"]
+    assert item_args.parameters == ["repo1"]
+    assert item_args.description == ["desc"]
+    assert item_args.private
+    assert item_args.https
+    assert item_args.no_confirm
+
+    assert manifest_item_args(MANIFEST[1], defaults).parameters == ["repo2"]
+
+    with raises(ValueError):
+        manifest_item_args({"action": "batch", "parameters": ["manifest.json"]}, defaults)
+    with raises(ValueError):
+        manifest_item_args({"action": "daemon"}, defaults)
+    # Every action implemented by controller is classified
+    assert set(GithubController(None, "api_key").actions_dict()) <= set(actions)
+
+
+def test_run_batch(tmp_path, capsys):
+    manifest = tmp_path / "manifest.json"
+    manifest.write_text(dumps(MANIFEST))
+    github_ctl = GithubController(setup_parser().parse_args(["batch", str(manifest), "--workers", "2"]), "api_key")
+
+    with raises(InvalidNumberOfArgumentsException):
+        GithubController(setup_parser().parse_args(["batch"]), "api_key").run_batch()
+
+    with mock.patch('github.github_controller.CLIHandler.confirm_action', return_value=False):
+        assert "aborted" in github_ctl.run_batch().lower()
+
+    def create_repository(self):
+        if self.args.parameters[0] == "repo3":
+            raise ValueError("repo3 failed")
+        return f"{self.args.parameters[0]} created"
+
+    github_ctl.args.no_confirm = True
+    with mock.patch.object(GithubController, 'create_new_repository', create_repository):
+        with mock.patch.object(GithubController, 'delete_repository', lambda self: "repo2 deleted"):
+            assert github_ctl.run_batch() == "Batch finished: 2 succeeded, 1 failed"
+    out, err = capsys.readouterr()
+    assert not err
+    assert out == "[1/3] create-repository repo1: OK\nrepo1 created\n" \
+                  "[2/3] delete-repository repo2: OK\nrepo2 deleted\n" \
+                  "[3/3] create-repository repo3: FAILED\nrepo3 failed\n"
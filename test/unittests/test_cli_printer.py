@@ -1,4 +1,7 @@
+import sys
 from argparse import ArgumentParser
+from json import loads
+from unittest import mock
 
 from colorama import Fore
 
@@ -15,6 +18,8 @@ def setup_arg_parser():
     parser.add_argument("--https", action="store_true")
     parser.add_argument("--private", action="store_true")
     parser.add_argument("--description")
+    parser.add_argument("--format", default="text")
+    parser.add_argument("--fields")
 
     return parser
 
@@ -46,12 +51,19 @@ def test_composed_data(capsys):
     CLIHandler.out(composed_data, args)
     out, err = capsys.readouterr()
     assert not err
-    assert out == f"{Fore.GREEN}1.{Fore.RESET}\nname\nurl\nssh_url\n"
+    assert out == "1.\nname\nurl\nssh_url\n"
 
     composed_data = [('name', 'url', 'ssh_url'), ('name2', 'url2', 'ssh_url2')]
     CLIHandler.out(composed_data, args)
     out, err = capsys.readouterr()
     assert not err
+    assert out == "1.\nname\nurl\nssh_url\n2.\nname2\nurl2\nssh_url2\n"
+
+    # Numbers are colored only when writing to terminal
+    with mock.patch.object(sys.stdout, 'isatty', return_value=True):
+        CLIHandler.out(composed_data, args)
+    out, err = capsys.readouterr()
+    assert not err
     assert out == f"{Fore.GREEN}1.{Fore.RESET}\nname\nurl\nssh_url\n{Fore.GREEN}2.{Fore.RESET}\nname2\nurl2\nssh_url2\n"
 
     args = setup_arg_parser().parse_args(["dummy", "--no_numbers"])
@@ -59,3 +71,60 @@ def test_composed_data(capsys):
     out, err = capsys.readouterr()
     assert not err
     assert out == "name\nurl\nssh_url\nname2\nurl2\nssh_url2\n"
+
+
+def test_iterator_data(capsys):
+    args = setup_arg_parser().parse_args(["dummy", "--no_numbers"])
+    composed_data = iter([('name', 'url', ''), ('name2', 'url2', '')])
+    CLIHandler.out(composed_data, args)
+    out, err = capsys.readouterr()
+    assert not err
+    assert out == "name\nurl\nname2\nurl2\n"
+
+
+def test_machine_readable_formats(capsys):
+    composed_data = [('name', 'ssh_url', ''), ('name2', 'ssh_url2', '')]
+
+    CLIHandler.out(composed_data, setup_arg_parser().parse_args(["dummy", "--format", "json"]))
+    out, err = capsys.readouterr()
+    assert loads(out) == [{"name": "name", "ssh_url": "ssh_url"}, {"name": "name2", "ssh_url": "ssh_url2"}]
+
+    CLIHandler.out(iter(composed_data), setup_arg_parser().parse_args(["dummy", "--format", "ndjson"]))
+    out, err = capsys.readouterr()
+    assert out == '{"name": "name", "ssh_url": "ssh_url"}\n{"name": "name2", "ssh_url": "ssh_url2"}\n'
+
+    CLIHandler.out(composed_data, setup_arg_parser().parse_args(["dummy", "--format", "tsv"]))
+    out, err = capsys.readouterr()
+    assert out == "name\tssh_url\nname\tssh_url\nname2\tssh_url2\n"
+
+    CLIHandler.out([('name, with comma', 'ssh_url', '')], setup_arg_parser().parse_args(["dummy", "--format", "csv"]))
+    out, err = capsys.readouterr()
+    assert out == 'name,ssh_url\n"name, with comma",ssh_url\n'
+
+    CLIHandler.out("Repository deleted", setup_arg_parser().parse_args(["dummy", "--format", "csv"]))
+    out, err = capsys.readouterr()
+    assert out == "Repository deleted\n"
+
+    CLIHandler.out("Repository deleted", setup_arg_parser().parse_args(["dummy", "--format", "json"]))
+    out, err = capsys.readouterr()
+    assert loads(out) == {"message": "Repository deleted"}
+    assert not err
+
+
+def test_extra_fields(capsys):
+    composed_data = [('name', 'ssh_url', '', 0, '2019-01-01T00:00:00Z')]
+
+    CLIHandler.out(composed_data, setup_arg_parser().parse_args(["dummy", "--no_numbers", "--fields",
+                                                                 "stars,updated_at"]))
+    out, err = capsys.readouterr()
+    assert out == "name\nssh_url\nstars: 0\nupdated_at: 2019-01-01T00:00:00Z\n"
+
+    CLIHandler.out(composed_data, setup_arg_parser().parse_args(["dummy", "--format", "ndjson", "--fields",
+                                                                 "stars,updated_at"]))
+    out, err = capsys.readouterr()
+    assert loads(out) == {"name": "name", "ssh_url": "ssh_url", "stars": 0, "updated_at": "2019-01-01T00:00:00Z"}
+
+    CLIHandler.out(composed_data, setup_arg_parser().parse_args(["dummy", "--format", "csv", "--fields",
+                                                                 "stars,updated_at"]))
+    out, err = capsys.readouterr()
+    assert out == "name,ssh_url,stars,updated_at\nname,ssh_url,0,2019-01-01T00:00:00Z\n"
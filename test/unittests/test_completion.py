@@ -0,0 +1,62 @@
+from os import environ
+from os.path import dirname, join
+from shutil import which
+from subprocess import run, PIPE
+import sys
+
+from pytest import raises, mark
+
+import github
+from github.cache import RepositoryIndex
+from github.completion import completion_script, SHELLS
+
+
+def test_scripts_cover_actions_and_options():
+    for shell in SHELLS:
+        script = completion_script(shell)
+        for word in ('list-my-repositories', 'create-pull-requests', 'completion', 'no_confirm', 'repository_names'):
+            assert word in script
+    assert '--format)\n            COMPREPLY=( $(compgen -W "text json ndjson tsv csv"' in completion_script('bash')
+    assert "complete -c github -l format -x -a 'text json ndjson tsv csv'" in completion_script('fish')
+    with raises(ValueError):
+        completion_script('tcsh')
+
+
+def test_repository_names_are_exported():
+    index = RepositoryIndex()
+    index.store_ids('viewer', {'repo_b': 'R_b', 'repo_a': 'R_a'})
+    with open(index.names_path()) as names_file:
+        assert names_file.read() == "repo_a\nrepo_b\n"
+    index.remove_id('viewer', 'repo_b')
+    with open(index.names_path()) as names_file:
+        assert names_file.read() == "repo_a\n"
+
+
+@mark.skipif(not which('bash'), reason="bash is not available")
+def test_bash_completes_cached_repositories():
+    RepositoryIndex().store_ids('viewer', {'repo_b': 'R_b', 'repo_a': 'R_a', 'other': 'R_o'})
+
+    def complete(*words):
+        script = completion_script('bash') + f'COMP_WORDS=(github {" ".join(words)}); ' \
+            f'COMP_CWORD={len(words)}; _github; echo "${{COMPREPLY[@]}}"'
+        return run(['bash', '-c', script], stdout=PIPE, universal_newlines=True, env=environ).stdout.split()
+
+    assert complete('delete-repository', 'repo') == ['repo_a', 'repo_b']
+    assert complete('delete-repository', 'repo_a', 'repo') == []
+    assert complete('create-project', 'other', '--format', 'json', 'repo_') == ['repo_a', 'repo_b']
+    assert complete('--format', 'n') == ['ndjson']
+    assert complete('list-my-') == ['list-my-repositories']
+
+
+def test_completion_does_not_import_requests():
+    script = "import sys; import github.completion; print('requests' in sys.modules)"
+    assert run([sys.executable, '-c', script], stdout=PIPE, universal_newlines=True).stdout.strip() == "False"
+
+
+def test_committed_bash_completion_is_up_to_date():
+    project_root = dirname(dirname(github.__file__))
+    generated = run([sys.executable, '-m', 'github', 'completion', 'bash'], stdout=PIPE, universal_newlines=True,
+                    cwd=project_root, check=True).stdout
+    with open(join(project_root, 'github_bash_completition')) as committed:
+        # Regenerate with: python -m github completion bash > github_bash_completition
+        assert committed.read() == generated
@@ -0,0 +1,152 @@
+from json import dumps, loads
+from os import getcwd, chmod
+from socket import socket, AF_UNIX, SOCK_STREAM
+from socketserver import UnixStreamServer, StreamRequestHandler
+from threading import Thread
+from unittest import mock
+
+from pytest import raises
+
+from github.argparser import arg_parser
+from github.daemon import create_server, forward, requires_terminal, environment_fingerprint, private_directory
+from github.github_controller import GithubController
+
+
+def send_to_daemon(path, args, cwd=None) -> [dict]:
+    with socket(AF_UNIX, SOCK_STREAM) as connection:
+        connection.connect(str(path))
+        with connection.makefile('rwb') as stream:
+            request = {'args': vars(args), 'cwd': cwd, 'stdout_tty': False, 'environment': environment_fingerprint()}
+            stream.write(f"{dumps(request)}\n".encode())
+            stream.flush()
+            return [loads(line) for line in stream]
+
+
+def test_daemon_executes_forwarded_commands(tmp_path):
+    path = tmp_path / 'daemon.sock'
+    github_ctl = GithubController(arg_parser.parse_args(["daemon"]), "api_key")
+    server = create_server(str(path), github_ctl)
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with mock.patch.object(GithubController, 'create_new_repository', return_value="Repository created"):
+            assert send_to_daemon(path, arg_parser.parse_args(["create-repository", "repo"])) == \
+                [{'out': "Repository created\n"}, {'exit': 0}]
+        with mock.patch.object(GithubController, 'create_new_repository', side_effect=ValueError("Bad credentials")):
+            assert send_to_daemon(path, arg_parser.parse_args(["create-repository", "repo"])) == \
+                [{'out': "Bad credentials\n"}, {'exit': 1}]
+        # Daemon keeps its own arguments and working directory between commands
+        assert github_ctl.args.action == ["daemon"]
+        cwd = getcwd()
+        with mock.patch.object(GithubController, 'create_new_repository', side_effect=lambda: getcwd()):
+            assert send_to_daemon(path, arg_parser.parse_args(["create-repository", "repo"]), str(tmp_path)) == \
+                [{'out': f"{tmp_path}\n"}, {'exit': 0}]
+        assert getcwd() == cwd
+        with raises(ValueError):
+            create_server(str(path), github_ctl)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_forwarded_command_uses_its_own_retry_policy(tmp_path):
+    path = tmp_path / 'daemon.sock'
+    github_ctl = GithubController(arg_parser.parse_args(["daemon", "--retries", "3"]), "api_key")
+    daemon_policy = github_ctl.retry_policy
+    server = create_server(str(path), github_ctl)
+    Thread(target=server.serve_forever, daemon=True).start()
+    policies = []
+
+    def send_request():
+        policies.append(github_ctl.retry_policy)
+        return str(github_ctl.send_restful_request("https://api.github.com/user/repos", None).status_code)
+
+    failure = mock.Mock(status_code=502, headers={}, text='{}')
+    failure.__enter__ = mock.Mock(return_value=failure)
+    failure.__exit__ = mock.Mock(return_value=None)
+    try:
+        with mock.patch.object(GithubController, 'create_new_repository', side_effect=send_request), \
+                mock.patch.object(github_ctl.session, 'get', return_value=failure) as get_mock:
+            assert send_to_daemon(path, arg_parser.parse_args(["create-repository", "repo", "--retries", "0",
+                                                               "--timeout", "5"])) == [{'out': "502\n"}, {'exit': 0}]
+        # Profiled command is sent through traced connections
+        with mock.patch.object(GithubController, 'create_new_repository',
+                               side_effect=lambda: type(github_ctl.session.get_adapter('https://')).__name__):
+            assert send_to_daemon(path, arg_parser.parse_args(["create-repository", "repo", "--profile"]))[0] == \
+                {'out': "TracedHTTPAdapter\n"}
+    finally:
+        server.shutdown()
+        server.server_close()
+    # Transient failure isn't retried with client's '--retries 0', even though daemon retries 3 times
+    get_mock.assert_called_once()
+    assert get_mock.call_args[1]['timeout'] == (5, 5)
+    assert policies[0].circuit_breaker is daemon_policy.circuit_breaker
+    assert github_ctl.retry_policy is daemon_policy
+    assert type(github_ctl.session.get_adapter('https://')).__name__ == 'HTTPAdapter'
+
+
+def test_stale_socket_is_replaced(tmp_path):
+    path = tmp_path / 'daemon.sock'
+    stale_server = UnixStreamServer(str(path), StreamRequestHandler)
+    stale_server.server_close()
+    server = create_server(str(path), GithubController(None, "api_key"))
+    server.server_close()
+
+
+def test_forward(tmp_path, capsys):
+    path = tmp_path / 'daemon.sock'
+
+    class FakeDaemonHandler(StreamRequestHandler):
+        def handle(self):
+            request = loads(self.rfile.readline())
+            self.wfile.write(f"{dumps({'out': ' '.join(request['args']['parameters']) + chr(10)})}\n".encode())
+            self.wfile.write(f"{dumps({'err': 'warning' + chr(10)})}\n{dumps({'exit': 3})}\n".encode())
+
+    server = UnixStreamServer(str(path), FakeDaemonHandler)
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        assert forward(arg_parser.parse_args(["list-user-repositories", "a", "b"]), str(path)) == 3
+        captured = capsys.readouterr()
+        assert captured.out == "a b\n"
+        assert captured.err == "warning\n"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_forward_falls_back_to_in_process(tmp_path):
+    assert forward(arg_parser.parse_args(["list-my-repositories"]), str(tmp_path / 'missing.sock')) is None
+    assert requires_terminal(arg_parser.parse_args(["delete-repository", "repo"]))
+    assert not requires_terminal(arg_parser.parse_args(["delete-repository", "repo", "--no_confirm"]))
+    assert requires_terminal(arg_parser.parse_args(["daemon"]))
+
+
+def test_daemon_refuses_different_environment(tmp_path, monkeypatch, capsys):
+    path = tmp_path / 'daemon.sock'
+    server = create_server(str(path), GithubController(arg_parser.parse_args(["daemon"]), "api_key"))
+    Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with mock.patch.object(GithubController, 'create_new_repository') as mockingbird:
+            monkeypatch.setenv('GITHUB_API_KEY', 'another_key')
+            assert forward(arg_parser.parse_args(["create-repository", "repo"]), str(path)) is None
+            monkeypatch.delenv('GITHUB_API_KEY')
+            monkeypatch.setenv('GITHUB_CLI_CACHE_DIR', str(tmp_path / 'another_cache'))
+            assert forward(arg_parser.parse_args(["create-repository", "repo"]), str(path)) is None
+            mockingbird.assert_not_called()
+        assert capsys.readouterr().out == ""
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_private_directory(tmp_path):
+    directory = str(tmp_path / 'private')
+    assert private_directory(directory) == directory
+    assert private_directory(directory) == directory
+    chmod(directory, 0o755)
+    with raises(ValueError):
+        private_directory(directory)
+    # Symbolic link is rejected even if it points to private directory
+    chmod(directory, 0o700)
+    (tmp_path / 'link').symlink_to(directory)
+    with raises(ValueError):
+        private_directory(str(tmp_path / 'link'))
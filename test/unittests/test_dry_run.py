@@ -0,0 +1,97 @@
+from json import dumps
+from unittest import mock
+
+from github.argparser import arg_parser
+from github.common import APIResponse
+from github.dry_run import DryRunPlanner, DRY_RUN_FIELD
+from github.github_controller import GithubController
+
+
+class MockResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self.ok = True
+        self.headers = {}
+        self.text = dumps({'data': data})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def page(total_count, names):
+    return MockResponse({'viewer': {'repositories': {
+        'totalCount': total_count, 'pageInfo': {'endCursor': 'cursor'},
+        'edges': [{'node': {'name': name, 'sshUrl': f'ssh:{name}', 'id': f'R_{name}'}} for name in names]}}})
+
+
+def cost(points):
+    return MockResponse({'rateLimit': {'cost': points}})
+
+
+def test_cost_query_and_first_page():
+    payload = {'query': 'query($first: Int!) { viewer { repositories(first: $first) { totalCount } } }',
+               'variables': {'first': 50}}
+    assert DryRunPlanner.cost_query(payload)['query'] == \
+        f'query($first: Int!) {{ {DRY_RUN_FIELD}  viewer {{ repositories(first: $first) {{ totalCount }} }} }}'
+    # Cost selected by paginated query would conflict with the dry run
+    payload['query'] = payload['query'][:-1] + 'rateLimit { cost } }'
+    assert DryRunPlanner.cost_query(payload)['query'] == \
+        f'query($first: Int!) {{ {DRY_RUN_FIELD}  viewer {{ repositories(first: $first) {{ totalCount }} }} }}'
+
+    users = APIResponse(text=dumps({'data': {
+        'u0': {'repositories': {'totalCount': 120, 'pageInfo': {'endCursor': 'a'}, 'edges': []}},
+        'u1': {'repositories': {'totalCount': 30, 'pageInfo': {'endCursor': 'b'}, 'edges': []}}, 'u2': None}}))
+    pages, response = DryRunPlanner.first_page(payload, users)
+    assert pages == 3
+    assert response.data['u0']['repositories']['pageInfo'] == {'endCursor': None}
+    assert DryRunPlanner.first_page({'query': '{viewer {login}}'}, users)[0] == 1
+
+
+def test_listing_is_estimated_from_first_page(capsys):
+    github_ctl = GithubController(arg_parser.parse_args(["list-my-repositories", "--dry_run", "--refresh"]), "key")
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[cost(2), page(120, ['r1', 'r2'])]) as post:
+        assert github_ctl.process_args()
+    assert post.call_count == 2
+    assert DRY_RUN_FIELD in post.call_args_list[0][1]['json']['query']
+    assert DRY_RUN_FIELD not in post.call_args_list[1][1]['json']['query']
+    output = capsys.readouterr().out
+    assert "1. GraphQL query viewer.repositories: 3 pages x cost 2 = 6 points\n" in output
+    assert "Planned 3 request(s) using 6 GraphQL point(s) and 0 REST request(s)" in output
+    assert "the dry run itself sent 2 request(s)" in output
+    assert "ssh:r1" not in output
+    assert github_ctl.planner is None
+
+
+def test_changes_are_only_planned(capsys):
+    github_ctl = GithubController(None, "key")
+    github_ctl.viewer_cache.store("key", "mock_user", "viewer_id")
+    with mock.patch.object(github_ctl.session, 'post') as post, \
+            mock.patch.object(github_ctl.session, 'delete') as delete, \
+            mock.patch('github.cli_handler.CLIHandler.confirm_action') as confirm:
+        github_ctl.args = arg_parser.parse_args(["create-repository", "new_repo", "--dry_run"])
+        github_ctl.process_args()
+        github_ctl.args = arg_parser.parse_args(["delete-repository", "old_repo", "--dry_run"])
+        github_ctl.process_args()
+        github_ctl.args = arg_parser.parse_args(["daemon", "--dry_run"])
+        github_ctl.process_args()
+        post.assert_not_called()
+        delete.assert_not_called()
+        confirm.assert_not_called()
+    output = capsys.readouterr().out
+    assert "1. REST POST https://api.github.com/user/repos\n" in output
+    assert "1. REST DELETE https://api.github.com/repos/mock_user/old_repo\n" in output
+    assert "Action daemon sends no request" in output
+
+
+def test_sync_leaves_index_untouched(capsys):
+    github_ctl = GithubController(arg_parser.parse_args(["sync", "--dry_run"]), "key")
+    sync_page = MockResponse({'viewer': {'login': 'mock_user', 'repositories': {
+        'totalCount': 75, 'pageInfo': {'endCursor': 'cursor'},
+        'edges': [{'node': {'id': 'R_r1', 'name': 'r1', 'sshUrl': 's', 'url': 'u', 'updatedAt': 'now'}}]}}})
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[cost(1), sync_page]):
+        github_ctl.process_args()
+    assert "2 pages x cost 1 = 2 points" in capsys.readouterr().out
+    assert github_ctl.repository_index.count('mock_user') == 0
@@ -1,10 +1,19 @@
 from argparse import ArgumentParser
+from json import loads
+from os import getpid, listdir, stat, utime
+from threading import get_ident
 from unittest import mock
 
 from pytest import raises
+from requests import Response
 
-from github.common import InvalidAPIKeyException
+from github.cache import ResponseCache
+from github.cache.cache_utils import temporary_path
+from github.common import APIResponse, InvalidAPIKeyException, check_qraphql_response
 from github.github_controller import GithubController, CLIHandler
+from github.retry_policy import RetryPolicy
+
+TIMEOUT = (RetryPolicy.CONNECT_TIMEOUT, RetryPolicy.READ_TIMEOUT)
 
 
 class Namespace:
@@ -22,6 +31,9 @@ def setup_controller_and_parser(func):
     parser.add_argument("--private", action="store_true")
     parser.add_argument("--no_numbers", action="store_true")
     parser.add_argument("--description")
+    parser.add_argument("--rate_limit", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--trace_file")
     github_ctl = GithubController(None, None)
 
     def inner():
@@ -36,6 +48,7 @@ def mocked_request(*args, **kwargs):
         def __init__(self, json_data=None, status_code=200):
             self.json_data = json_data
             self.status_code = status_code
+            self.headers = {}
             self.ok = status_code == 200
             self.text = '{"data": "lot_of_data"}' if self.ok else '{"errors": "lot_of_errors"}'
 
@@ -57,79 +70,96 @@ def mocked_request(*args, **kwargs):
 @setup_controller_and_parser
 def test_obtain_api_key(github_ctl, parser):
     del parser
-    with mock.patch('github.github_controller.load_api_key') as mockingbird:
-        mockingbird.return_value = "1234567890123456789012345678901234567890"
+    with mock.patch('github.github_controller.load_api_keys') as mockingbird:
+        mockingbird.return_value = ["1234567890123456789012345678901234567890", "github_pat_0123456789"]
         assert github_ctl.obtain_api_key()
         mockingbird.assert_called_once()
-        assert github_ctl.api_key == mockingbird.return_value
+        assert github_ctl.api_key == mockingbird.return_value[0]
+        assert github_ctl.token_pool.tokens == mockingbird.return_value
 
-    with mock.patch('github.github_controller.load_api_key') as mockingbird:
+    with mock.patch('github.github_controller.load_api_keys') as mockingbird:
         mockingbird.side_effect = FileNotFoundError()
         assert not github_ctl.obtain_api_key()
         mockingbird.assert_called_once()
 
-    with mock.patch('github.github_controller.load_api_key') as mockingbird:
+    with mock.patch('github.github_controller.load_api_keys') as mockingbird:
         mockingbird.side_effect = InvalidAPIKeyException()
         assert not github_ctl.obtain_api_key()
         mockingbird.assert_called_once()
 
 
+@setup_controller_and_parser
+def test_session(github_ctl, parser):
+    del parser
+    adapter = github_ctl.session.get_adapter(github_ctl.graphql_api_endpoint)
+    assert adapter._pool_maxsize == GithubController.POOL_SIZE
+    assert github_ctl.session.headers['User-Agent'] == 'github_cli_app'
+
+    shared_ctl = GithubController(None, None, session=github_ctl.session)
+    assert shared_ctl.session is github_ctl.session
+
+    pool_ctl = GithubController(None, None, pool_size=32)
+    assert pool_ctl.session.get_adapter(pool_ctl.rest_api_endpoint)._pool_maxsize == 32
+
+
 @setup_controller_and_parser
 def test_graphql_request(github_ctl, parser):
     del parser
-    with mock.patch('github.github_controller.post', side_effect=mocked_request) as post_request_mock:
+    with mock.patch.object(github_ctl.session, 'post', side_effect=mocked_request) as post_request_mock:
         with raises(ValueError):
             github_ctl.send_graphql_request(json_data={})
         post_request_mock.assert_called_once()
         post_request_mock.assert_called_with('https://api.github.com/graphql',
-                                             headers={'Authorization': 'bearer None'}, json={})
+                                             headers={'Authorization': 'bearer None'}, json={}, timeout=TIMEOUT)
 
-    with mock.patch('github.github_controller.post', side_effect=mocked_request) as post_request_mock:
+    with mock.patch.object(github_ctl.session, 'post', side_effect=mocked_request) as post_request_mock:
 
         assert github_ctl.send_graphql_request(json_data={"data": "data"}).text == '{"data": "lot_of_data"}'
         post_request_mock.assert_called_once()
         post_request_mock.assert_called_with('https://api.github.com/graphql',
-                                             headers={'Authorization': 'bearer None'}, json={"data": "data"})
+                                             headers={'Authorization': 'bearer None'}, json={"data": "data"},
+                                             timeout=TIMEOUT)
 
 
 @setup_controller_and_parser
 def test_restful_request(github_ctl, parser):
     del parser
-    with mock.patch('github.github_controller.post', side_effect=mocked_request) as post_request_mock:
-        with mock.patch('github.github_controller.get', side_effect=mocked_request) as get_request_mock:
-            with mock.patch('github.github_controller.delete', side_effect=mocked_request) as delete_request_mock:
+    with mock.patch.object(github_ctl.session, 'post', side_effect=mocked_request) as post_request_mock:
+        with mock.patch.object(github_ctl.session, 'get', side_effect=mocked_request) as get_request_mock:
+            with mock.patch.object(github_ctl.session, 'delete', side_effect=mocked_request) as delete_request_mock:
                 response = github_ctl.send_restful_request(endpoint="/end", json_data={"data": "data"}, method="GET")
                 assert not post_request_mock.called
                 assert get_request_mock.called
                 assert not delete_request_mock.called
                 get_request_mock.assert_called_with('/end', headers={'Authorization': 'token None'},
-                                                    json={'data': 'data'})
+                                                    json={'data': 'data'}, timeout=TIMEOUT)
                 assert response
 
-    with mock.patch('github.github_controller.post', side_effect=mocked_request) as post_request_mock:
-        with mock.patch('github.github_controller.get', side_effect=mocked_request) as get_request_mock:
-            with mock.patch('github.github_controller.delete', side_effect=mocked_request) as delete_request_mock:
+    with mock.patch.object(github_ctl.session, 'post', side_effect=mocked_request) as post_request_mock:
+        with mock.patch.object(github_ctl.session, 'get', side_effect=mocked_request) as get_request_mock:
+            with mock.patch.object(github_ctl.session, 'delete', side_effect=mocked_request) as delete_request_mock:
                 response = github_ctl.send_restful_request(endpoint="/end", json_data={"data": "data"}, method="POST")
                 assert post_request_mock.called
                 assert not get_request_mock.called
                 assert not delete_request_mock.called
                 post_request_mock.assert_called_with('/end', headers={'Authorization': 'token None'},
-                                                     json={'data': 'data'})
+                                                     json={'data': 'data'}, timeout=TIMEOUT)
                 assert response
 
-    with mock.patch('github.github_controller.post', side_effect=mocked_request) as post_request_mock:
-        with mock.patch('github.github_controller.get', side_effect=mocked_request) as get_request_mock:
-            with mock.patch('github.github_controller.delete', side_effect=mocked_request) as delete_request_mock:
+    with mock.patch.object(github_ctl.session, 'post', side_effect=mocked_request) as post_request_mock:
+        with mock.patch.object(github_ctl.session, 'get', side_effect=mocked_request) as get_request_mock:
+            with mock.patch.object(github_ctl.session, 'delete', side_effect=mocked_request) as delete_request_mock:
                 response = github_ctl.send_restful_request(endpoint="/end", json_data=None, method="DELETE")
                 assert not post_request_mock.called
                 assert not get_request_mock.called
                 assert delete_request_mock.called
-                delete_request_mock.assert_called_with('/end', headers={'Authorization': 'token None'})
+                delete_request_mock.assert_called_with('/end', headers={'Authorization': 'token None'},
+                                                       timeout=TIMEOUT)
                 assert response
 
-    with mock.patch('github.github_controller.post', side_effect=mocked_request) as post_request_mock:
-        with mock.patch('github.github_controller.get', side_effect=mocked_request) as get_request_mock:
-            with mock.patch('github.github_controller.delete', side_effect=mocked_request) as delete_request_mock:
+    with mock.patch.object(github_ctl.session, 'post', side_effect=mocked_request) as post_request_mock:
+        with mock.patch.object(github_ctl.session, 'get', side_effect=mocked_request) as get_request_mock:
+            with mock.patch.object(github_ctl.session, 'delete', side_effect=mocked_request) as delete_request_mock:
                 response = github_ctl.send_restful_request(endpoint="/end", json_data={"data": "data"},
                                                            method="NONSENSE")
                 assert not post_request_mock.called
@@ -138,6 +168,49 @@ def test_restful_request(github_ctl, parser):
                 assert not response
 
 
+@setup_controller_and_parser
+def test_restful_request_cache(github_ctl, parser):
+    github_ctl.args = parser.parse_args(["dummy"])
+    github_ctl.args.refresh = False
+    cached_response = Response()
+    cached_response.status_code = 200
+    cached_response.headers['ETag'] = '"etag"'
+    cached_response._content = b'{"name": "cached_repo"}'
+    cached_response._content_consumed = True
+    not_modified_response = Response()
+    not_modified_response.status_code = 304
+    not_modified_response._content = b''
+    not_modified_response._content_consumed = True
+    with mock.patch.object(github_ctl.session, 'get',
+                           side_effect=[cached_response, not_modified_response]) as get_request_mock:
+        assert github_ctl.send_restful_request(endpoint="/end", json_data=None).text == '{"name": "cached_repo"}'
+        response = github_ctl.send_restful_request(endpoint="/end", json_data=None)
+        assert response.status_code == 200
+        assert response.text == '{"name": "cached_repo"}'
+        get_request_mock.assert_called_with('/end', json=None, timeout=TIMEOUT,
+                                            headers={'Authorization': 'token None', 'If-None-Match': '"etag"'})
+
+
+@setup_controller_and_parser
+def test_graphql_request_cache(github_ctl, parser):
+    github_ctl.args = parser.parse_args(["dummy"])
+    github_ctl.args.refresh = False
+    query = {'query': '{viewer {login}}'}
+    with mock.patch.object(github_ctl.session, 'post', side_effect=mocked_request) as post_request_mock:
+        github_ctl.send_graphql_request(json_data=query)
+        assert github_ctl.send_graphql_request(json_data=query).text == '{"data": "lot_of_data"}'
+        post_request_mock.assert_called_once()
+
+        github_ctl.args.refresh = True
+        github_ctl.send_graphql_request(json_data=query)
+        assert post_request_mock.call_count == 2
+
+        github_ctl.args.refresh = False
+        github_ctl.send_graphql_request(json_data={'query': 'mutation { createProject }'})
+        github_ctl.send_graphql_request(json_data=query)
+        assert post_request_mock.call_count == 4
+
+
 @setup_controller_and_parser
 def test_execute_args(github_ctl, parser):
     with mock.patch.object(CLIHandler, 'out') as mockingbird:
@@ -150,3 +223,57 @@ def test_execute_args(github_ctl, parser):
         github_ctl.execute_arg(test_func)
         mockingbird.assert_called_once()
         mockingbird.assert_called_with("output of test func", github_ctl.args)
+
+
+def test_response_cache_eviction(tmp_path):
+    response = Response()
+    response.status_code = 200
+    response._content = b'x' * 200
+    response_cache = ResponseCache(directory=str(tmp_path))
+    response_cache.store('rest-0', response)
+    # Cache fits three entries
+    response_cache.max_size = 3 * stat(tmp_path / 'rest-0.json').st_size + 10
+    for i in range(3):
+        response_cache.store(f'rest-{i}', response)
+        utime(tmp_path / f'rest-{i}.json', (i, i))
+    # Least recently used entry is evicted first
+    response_cache.get('rest-0')
+    # Temporary file of entry being written by another process isn't evicted
+    (tmp_path / 'rest-4.json.1.tmp').write_text('x' * 1000)
+    with mock.patch('github.cache.response_cache.listdir', wraps=listdir) as listdir_mock:
+        response_cache.store('rest-3', response)
+    # Entries are evicted until the cache fits 80 % of its limit
+    assert sorted(listdir(tmp_path)) == ['rest-0.json', 'rest-3.json', 'rest-4.json.1.tmp']
+    listdir_mock.assert_called_once()
+    # Directory isn't listed again until size of stored entries exceeds the limit
+    with mock.patch('github.cache.response_cache.listdir', wraps=listdir) as listdir_mock:
+        response_cache.store('rest-1', response)
+        response_cache.store('rest-1', response)
+    listdir_mock.assert_not_called()
+
+
+def test_temporary_cache_files_are_unique_per_process(tmp_path):
+    # Threads of different processes may share thread id
+    with mock.patch('github.cache.cache_utils.get_ident', return_value=1), \
+            mock.patch('github.cache.cache_utils.getpid', side_effect=[100, 200]):
+        assert temporary_path('entry.json') != temporary_path('entry.json')
+    writer = ResponseCache(directory=str(tmp_path)).writer('rest-0', APIResponse())
+    assert listdir(tmp_path) == [f'rest-0.json.{getpid()}.{get_ident()}.tmp']
+    writer.discard()
+    assert listdir(tmp_path) == []
+
+
+def test_api_response_decodes_once():
+    response = APIResponse(text='{"data": {"viewer": {"login": "mock_user"}}}')
+    with mock.patch('github.common.APIResponse.loads', wraps=loads) as loads_mock:
+        assert response.ok
+        assert response.data == {"viewer": {"login": "mock_user"}}
+        assert response.errors is None
+        assert check_qraphql_response(response) == (True, None)
+        loads_mock.assert_called_once()
+
+    response = APIResponse(status_code=422, text='{"message": "Validation Failed", "errors": [{"message": "exists"}]}')
+    assert not response.ok
+    assert response.message == "Validation Failed"
+    assert response.errors[0]['message'] == "exists"
+    assert APIResponse(status_code=204).json is None
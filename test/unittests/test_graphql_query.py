@@ -1,6 +1,7 @@
 from pytest import raises
 
-from github.queries.graphQL_query import ViewerQuery, UserQuery, BaseQueryClass
+from github.queries.graphQL_mutation import ViewerMutation
+from github.queries.graphQL_query import ViewerQuery, UserQuery, MultiUserQuery, BaseQueryClass
 
 MAX_RESULTS = 50
 
@@ -10,8 +11,11 @@ def test_viewer_query():
     assert isinstance(viewer_query, BaseQueryClass)
 
     viewer_query.construct_query()
-    assert viewer_query.query == f'{{viewer {{ repositories (first: {MAX_RESULTS}) {{ totalCount pageInfo ' \
-        f'{{ endCursor }} edges {{ node {{ name sshUrl url }} }} }} }} }}'
+    assert viewer_query.query == 'query($first: Int!, $after: String) { viewer { repositories(first: $first, ' \
+                                 'after: $after) { totalCount pageInfo { endCursor } edges { node { name sshUrl url ' \
+                                 '} } } } rateLimit { cost } }'
+    assert viewer_query.__dict__() == {'query': viewer_query.query,
+                                       'variables': {'first': MAX_RESULTS, 'after': None}}
 
 
 def test_user_query():
@@ -26,6 +30,53 @@ def test_user_query():
 
     user_query.construct_query() \
 
-    assert user_query.query == f'{{ user(login: dummy_user_2)  {{ repositories (first: {MAX_RESULTS}) ' \
-        f'{{ totalCount pageInfo ' \
-        f'{{ endCursor }} edges {{ node {{ name sshUrl url }} }} }} }} }}'
+    assert user_query.query == 'query($login: String!, $first: Int!, $after: String) { user(login: $login) { ' \
+                               'repositories(first: $first, after: $after) { totalCount pageInfo { endCursor } ' \
+                               'edges { node { name sshUrl url } } } } rateLimit { cost } }'
+    assert user_query.variables == {'login': 'dummy_user_2', 'first': MAX_RESULTS, 'after': None}
+
+
+def test_query_cursor():
+    viewer_query = ViewerQuery(payload=('repositories', ['name']))
+    viewer_query.construct_query()
+    first_page_query, first_page_hash = viewer_query.query, viewer_query.query_hash
+
+    viewer_query.cursor = "Y3Vyc29yOjUw"
+    viewer_query.construct_query()
+    # Document is compiled once, only variables differ between pages
+    assert viewer_query.query is first_page_query
+    assert viewer_query.query_hash == first_page_hash
+    assert viewer_query.variables == {'first': MAX_RESULTS, 'after': "Y3Vyc29yOjUw"}
+
+
+def test_values_are_not_spliced_into_query():
+    user_query = UserQuery(payload=('repositories', ['name']), username='my-"user"')
+    user_query.construct_query()
+    assert 'my-' not in user_query.query
+    assert user_query.variables['login'] == 'my-"user"'
+
+    assert ViewerMutation.obtain_repository_id('repo-"name"') == {
+        'query': 'query($name: String!) { viewer { repository(name: $name) { id } } }',
+        'variables': {'name': 'repo-"name"'}}
+
+    mutation = ViewerMutation(('createProject', {'ownerId': 'repo_id', 'name': 'project "name"'}))
+    mutation.construct_query()
+    assert mutation.__dict__() == {
+        'query': 'mutation($input: CreateProjectInput!) { createProject(input: $input) { clientMutationId } }',
+        'variables': {'input': {'ownerId': 'repo_id', 'name': 'project "name"'}}}
+
+
+def test_multi_user_query():
+    multi_user_query = MultiUserQuery(payload=('repositories', ['name']), users=[("user1", None), ("user2", "c2")])
+    assert isinstance(multi_user_query, BaseQueryClass)
+
+    multi_user_query.construct_query()
+    assert multi_user_query.query == \
+        'query($first: Int!, $login0: String!, $after0: String, $login1: String!, $after1: String) { ' \
+        'u0: user(login: $login0) { repositories(first: $first, after: $after0) { totalCount pageInfo ' \
+        '{ endCursor } edges { node { name } } } } ' \
+        'u1: user(login: $login1) { repositories(first: $first, after: $after1) { totalCount pageInfo ' \
+        '{ endCursor } edges { node { name } } } } rateLimit { cost } }'
+    assert multi_user_query.variables == {'first': MAX_RESULTS, 'login0': 'user1', 'after0': None,
+                                          'login1': 'user2', 'after1': 'c2'}
+    assert MultiUserQuery.batch_size() * MAX_RESULTS <= MultiUserQuery.MAX_NODES
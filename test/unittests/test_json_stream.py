@@ -0,0 +1,78 @@
+from argparse import ArgumentParser
+from io import BytesIO
+from json import dumps
+from unittest import mock
+
+from pytest import raises
+from requests import Response
+
+from github.common import EdgesStream, StreamedAPIResponse
+from github.github_controller import GithubController
+
+DOCUMENT = {'data': {'viewer': {'repositories': {
+    'totalCount': 3, 'pageInfo': {'endCursor': 'cé'},
+    'edges': [{'node': {'name': 'repo1', 'sshUrl': 's1', 'diskUsage': 12345}},
+              {'node': {'name': 'répo "2"\n', 'sshUrl': 's2', 'diskUsage': 0.5}},
+              {'node': {'name': 'repo\U0001f600', 'sshUrl': 's3', 'diskUsage': None}}]}}}}
+EDGES_PATH = ('data', None, 'repositories', 'edges')
+
+
+def chunked(text: str, size: int):
+    return (text[start:start + size] for start in range(0, len(text), size))
+
+
+def streamed_response(body: bytes) -> Response:
+    response = Response()
+    response.status_code = 200
+    response.raw = BytesIO(body)
+    return response
+
+
+def test_edges_are_decoded_regardless_of_chunk_boundaries():
+    text = dumps(DOCUMENT, indent=1, ensure_ascii=False)
+    for size in range(1, len(text) + 1):
+        edges = EdgesStream(chunked(text, size), EDGES_PATH)
+        assert list(edges) == DOCUMENT['data']['viewer']['repositories']['edges']
+        assert edges.count == 3
+        assert edges.document['data']['viewer']['repositories'] == {'totalCount': 3, 'pageInfo': {'endCursor': 'cé'},
+                                                                    'edges': []}
+        assert edges.errors is None
+
+
+def test_document_without_edges():
+    edges = EdgesStream(['{"data": {"viewer": null}, "errors": [{"message": "Bad"}]}'], EDGES_PATH)
+    assert list(edges) == []
+    assert edges.errors == [{'message': 'Bad'}]
+    assert list(EdgesStream(['{}'], EDGES_PATH)) == []
+    with raises(ValueError):
+        list(EdgesStream(['{"data": {"viewer": {"repositories": {"edges": [{}, '], EDGES_PATH))
+    with raises(ValueError):
+        list(EdgesStream(['{"data": {}} {}'], EDGES_PATH))
+
+
+def test_repositories_are_streamed_and_cached():
+    parser = ArgumentParser()
+    parser.add_argument("action", nargs=1)
+    for flag in ("--both_urls", "--url_only", "--https", "--refresh", "--offline"):
+        parser.add_argument(flag, action="store_true")
+    parser.add_argument("--fields")
+    github_ctl = GithubController(parser.parse_args(["list-my-repositories", "--fields", "diskUsage"]), "api_key")
+    body = dumps(DOCUMENT).encode()
+    expected = [('repo1', 's1', '', 12345), ('répo "2"\n', 's2', '', 0.5), ('repo\U0001f600', 's3', '', None)]
+    with mock.patch.object(StreamedAPIResponse, 'CHUNK_SIZE', 7), \
+            mock.patch.object(github_ctl.session, 'post', side_effect=lambda *a, **k: streamed_response(body)) as post:
+        assert list(github_ctl.list_my_repositories()) == expected
+        assert post.call_args[1]['stream']
+        # Response text was written into the cache while it was streamed
+        assert list(github_ctl.list_my_repositories()) == expected
+        post.assert_called_once()
+
+    github_ctl.args = parser.parse_args(["list-my-repositories", "--refresh"])
+    error = b'{"data": {"viewer": null}, "errors": [{"message": "Something went wrong"}]}'
+    with mock.patch.object(github_ctl.session, 'post', side_effect=lambda *a, **k: streamed_response(error)):
+        assert "Something went wrong" in github_ctl.list_my_repositories()
+    github_ctl.args = parser.parse_args(["list-my-repositories"])
+    with mock.patch.object(github_ctl.session, 'post', side_effect=lambda *a, **k: streamed_response(error)) as post:
+        assert "Something went wrong" in github_ctl.list_my_repositories()
+        # Error response is not cached
+        post.assert_called_once()
@@ -0,0 +1,84 @@
+from datetime import timedelta
+from json import loads
+from logging import DEBUG, INFO, NOTSET, disable, root
+from os import environ
+from subprocess import run
+from sys import executable
+from unittest import mock
+
+from pytest import fixture
+
+from github.github_controller import GithubController
+from github.logger import logger, configure_logging, configure_logging_from_environment, stop_logging
+
+
+class MockResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {'X-GitHub-Request-Id': f'GH{status_code}'}
+        self.text = '{"data": {}}'
+        self.elapsed = timedelta(milliseconds=12)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+@fixture(autouse=True)
+def enabled_logging():
+    # Other test modules disable logging altogether
+    disabled = root.manager.disable
+    disable(NOTSET)
+    yield
+    disable(disabled)
+
+
+def test_logging_is_disabled_without_sink():
+    assert not logger.isEnabledFor(DEBUG)
+    assert not logger.isEnabledFor(INFO)
+
+
+def test_structured_records(tmp_path):
+    configure_logging(str(tmp_path / 'debug.log'), structured=True)
+    try:
+        github_ctl = GithubController(None, 'api_key')
+        with mock.patch.object(github_ctl.session, 'get', side_effect=[MockResponse(502), MockResponse(200)]), \
+                mock.patch.object(github_ctl.retry_policy, 'sleep'):
+            assert github_ctl.send_restful_request(endpoint="/end", json_data=None).status_code == 200
+    finally:
+        stop_logging()
+    records = [loads(line) for line in (tmp_path / 'debug.log').read_text().splitlines()]
+    requests = [record for record in records if 'request_id' in record]
+    assert [(record['status'], record['attempt'], record['github_request_id']) for record in requests] == \
+        [(502, 0, 'GH502'), (200, 1, 'GH200')]
+    assert requests[0]['request_id'] == requests[1]['request_id']
+    assert requests[1]['ttfb_ms'] == 12
+    assert requests[1]['duration_ms'] >= 0
+    assert requests[1]['message'].startswith(f"Request {requests[1]['request_id']}: GET /end -> 200 in ")
+    assert any(record['level'] == 'WARNING' and 'retrying' in record['message'] for record in records)
+    assert not logger.isEnabledFor(DEBUG)
+
+
+def test_text_records(tmp_path):
+    configure_logging(str(tmp_path / 'info.log'), level='INFO')
+    logger.debug("Not written %s", "at all")
+    logger.info("Written %s", "lazily")
+    stop_logging()
+    log = (tmp_path / 'info.log').read_text()
+    assert "Written lazily" in log
+    assert "Not written" not in log
+
+
+def test_logging_configured_from_environment(tmp_path):
+    # Queue machinery isn't imported unless logging is configured
+    imported = run([executable, '-c', 'import sys, github.__main__; print("logging.handlers" in sys.modules)'],
+                   capture_output=True, text=True, check=True)
+    assert imported.stdout == "False\n"
+    with mock.patch.dict(environ, {'GITHUB_CLI_LOG_FILE': str(tmp_path / 'env.log'), 'GITHUB_CLI_LOG_LEVEL': 'LOUD'}):
+        assert configure_logging_from_environment()
+        stop_logging()
+    assert "Invalid log level LOUD in GITHUB_CLI_LOG_LEVEL, DEBUG is used" in (tmp_path / 'env.log').read_text()
+    with mock.patch.dict(environ, {'GITHUB_CLI_LOG_FILE': ''}):
+        assert configure_logging_from_environment() is None
@@ -0,0 +1,191 @@
+from io import BytesIO
+from json import dumps
+from time import time
+from unittest import mock
+
+from requests import Response
+
+from github.common import APIResponse
+from github.github_controller import GithubController
+from github.queries.graphQL_query import ViewerQuery, MultiUserQuery
+from github.rate_limiter import RateLimitScheduler
+from github.token_pool import TokenPool
+
+
+def rate_limited_response(remaining, limit=5000, reset=None, status_code=200, text='{}', **headers):
+    headers.update({'X-RateLimit-Limit': str(limit),
+                    'X-RateLimit-Remaining': str(remaining),
+                    'X-RateLimit-Reset': str(reset if reset is not None else int(time()) + 3600)})
+    return APIResponse(status_code=status_code, text=text, headers=headers)
+
+
+def test_budget_tracking():
+    scheduler = RateLimitScheduler()
+    reset = int(time()) + 3600
+    scheduler.update('rest', rate_limited_response(4999, reset=reset))
+    scheduler.update('rest', rate_limited_response(4998, reset=reset))
+    scheduler.update('graphql', rate_limited_response(4990, reset=reset,
+                                                      text='{"data": {"rateLimit": {"cost": 3}}}'))
+    assert scheduler.buckets['rest'].used == 2
+    assert scheduler.buckets['rest'].remaining == 4998
+    assert scheduler.buckets['graphql'].used == 3
+
+    report = scheduler.report()
+    assert "REST rate limit: 2 used by 2 request(s), 4998 of 5000 remaining" in report
+    assert "GraphQL rate limit: 3 used by 1 request(s)" in report
+
+    # Responses without rate limit headers (e.g. mocked ones) are ignored
+    scheduler.update('rest', APIResponse())
+    assert scheduler.buckets['rest'].requests == 2
+
+
+def test_cost_of_paginated_queries_is_counted():
+    github_ctl = GithubController(None, "api_key")
+    headers = rate_limited_response(4990).headers
+
+    def page(cursor, cost, streamed=True):
+        response = Response()
+        response.status_code = 200
+        response.headers.update(headers)
+        body = dumps({'data': {'viewer': {'repositories': {'totalCount': 2, 'pageInfo': {'endCursor': cursor},
+                                                           'edges': [{'node': {'name': cursor}}]}},
+                               'rateLimit': {'cost': cost}}}).encode()
+        if streamed:
+            response.raw = BytesIO(body)
+        else:
+            response._content = body
+            response._content_consumed = True
+        return response
+
+    # Cost of streamed page is counted once its body is read
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[page('a', 2), page('b', 3)]):
+        names = github_ctl.repositories_pages(ViewerQuery(('repositories', ['name'])), 'viewer',
+                                              pack=lambda edge: edge['node']['name'])
+        assert list(names) == ['a', 'b']
+    assert github_ctl.scheduler.buckets['graphql'].used == 5
+    assert github_ctl.scheduler.buckets['graphql'].requests == 2
+
+    query = MultiUserQuery(('repositories', ['name']), users=[('user', None)])
+    query.construct_query()
+    assert 'rateLimit { cost }' in query.query
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[page('c', 4, streamed=False)]):
+        github_ctl.send_graphql_request(query.__dict__())
+    assert github_ctl.scheduler.buckets['graphql'].used == 9
+
+
+def test_pacing():
+    scheduler = RateLimitScheduler()
+    assert scheduler.delay('rest') == 0
+
+    scheduler.update('rest', rate_limited_response(4000))
+    assert scheduler.delay('rest') == 0
+
+    # Below pacing threshold, remaining budget is spread over the rest of the window
+    scheduler.update('rest', rate_limited_response(100, reset=int(time()) + 100))
+    assert scheduler.delay('rest') == 0
+    assert 0.9 < scheduler.delay('rest') <= 1
+
+    scheduler.update('rest', rate_limited_response(0, reset=int(time()) + 30))
+    assert 29 < scheduler.delay('rest') <= 30
+
+
+def test_retry_after():
+    scheduler = RateLimitScheduler(max_retries=2)
+    assert scheduler.retry_after(rate_limited_response(100), 0) is None
+    assert scheduler.retry_after(APIResponse(status_code=403, text='{"message": "Must have admin rights"}'), 0) is None
+
+    secondary_limit = APIResponse(status_code=403, text='{"message": "You have exceeded a secondary rate limit"}',
+                                  headers={'Retry-After': '5'})
+    assert scheduler.retry_after(secondary_limit, 0) == 5
+    assert scheduler.retry_after(secondary_limit, 2) is None
+
+    secondary_limit.headers = {}
+    assert scheduler.retry_after(secondary_limit, 1) == 2 * RateLimitScheduler.SECONDARY_LIMIT_BACKOFF
+
+    exhausted = rate_limited_response(0, reset=int(time()) + 10, status_code=403)
+    assert 9 < scheduler.retry_after(exhausted, 0) <= 10
+
+
+def test_request_retried_after_rate_limit():
+    sleeps = []
+    github_ctl = GithubController(None, None, scheduler=RateLimitScheduler(sleep=sleeps.append))
+
+    class MockResponse:
+        def __init__(self, status_code, headers):
+            self.status_code = status_code
+            self.headers = headers
+            self.text = '{"message": "secondary rate limit"}' if status_code == 403 else '{"data": {}}'
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            pass
+
+    with mock.patch.object(github_ctl.session, 'get', side_effect=[MockResponse(403, {'Retry-After': '7'}),
+                                                                   MockResponse(200, {})]) as get_mock:
+        assert github_ctl.send_restful_request(endpoint="/end", json_data=None).status_code == 200
+        assert get_mock.call_count == 2
+        assert sleeps == [7]
+
+
+def test_token_pool():
+    pool = TokenPool(['a', 'b', 'c', 'a'])
+    assert len(pool) == 3
+    reset = int(time()) + 3600
+    # Keys with unknown budget are tried first
+    for token, remaining in zip(('a', 'b', 'c'), (100, 4000, 0)):
+        assert pool.acquire('rest') == token
+        pool.update(token, 'rest', rate_limited_response(remaining, reset=reset))
+    assert pool.combined('rest') == (15000, 4100, reset)
+    assert [pool.acquire('rest') for _ in range(3)] == ['b', 'b', 'b']
+    assert pool.buckets['b', 'rest'].remaining == 3997
+    # GraphQL budget is tracked separately
+    assert pool.acquire('graphql') == 'a'
+
+    assert pool.revoke('b')
+    assert pool.acquire('rest') == 'a'
+    pool.update('a', 'rest', rate_limited_response(0, reset=reset - 10))
+    # All keys are exhausted, the one whose window resets first is used
+    assert not pool.has_budget('rest')
+    assert pool.acquire('rest') == 'a'
+    assert pool.revoke('a')
+    assert not pool.revoke('c')
+    assert pool.tokens == ['c']
+    assert pool.report() == "1 API key(s) in rotation, 2 revoked"
+
+
+def test_requests_rotate_keys():
+    sleeps = []
+    github_ctl = GithubController(None, 'key_a', scheduler=RateLimitScheduler(sleep=sleeps.append),
+                                  token_pool=TokenPool(['key_a', 'key_b']))
+    reset = int(time()) + 3600
+
+    class MockResponse:
+        def __init__(self, status_code, remaining):
+            self.status_code = status_code
+            self.headers = rate_limited_response(remaining, reset=reset).headers
+            self.text = '{"message": "Bad credentials"}' if status_code == 401 else '{"data": {}}'
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, exc_type, exc_val, exc_tb):
+            pass
+
+    with mock.patch.object(github_ctl.session, 'get', side_effect=[MockResponse(200, 3000), MockResponse(200, 4000),
+                                                                   MockResponse(200, 3999)]) as get_mock:
+        for _ in range(3):
+            assert github_ctl.send_restful_request(endpoint="/end", json_data=None).status_code == 200
+        assert [call[1]['headers']['Authorization'] for call in get_mock.call_args_list] == \
+            ['token key_a', 'token key_b', 'token key_b']
+    assert github_ctl.scheduler.buckets['rest'].remaining == 6999
+
+    # Exhausted key is replaced by another one without waiting, revoked key is taken out of rotation
+    with mock.patch.object(github_ctl.session, 'get', side_effect=[MockResponse(403, 0), MockResponse(401, 0),
+                                                                   MockResponse(200, 9)]) as get_mock:
+        assert github_ctl.send_restful_request(endpoint="/end", json_data=None).status_code == 200
+        assert [call[1]['headers']['Authorization'] for call in get_mock.call_args_list] == \
+            ['token key_b', 'token key_a', 'token key_b']
+    assert sleeps == []
+    assert github_ctl.token_pool.tokens == ['key_b']
@@ -1,11 +1,13 @@
 from argparse import ArgumentParser
 from logging import disable as disable_logger, CRITICAL
+from os import remove
+from tempfile import NamedTemporaryFile
 from unittest import mock
 
 from pytest import raises
 
 from github.authentication import load_api_key
-from github.common import InvalidNumberOfArgumentsException
+from github.common import APIResponse, InvalidNumberOfArgumentsException
 from github.github_controller import GithubController
 
 disable_logger(CRITICAL)
@@ -26,6 +28,16 @@ def setup_controller_and_parser(func):
     parser.add_argument("--private", action="store_true")
     parser.add_argument("--description")
     parser.add_argument("--no_confirm", action="store_true")
+    parser.add_argument("--refresh", action="store_true")
+    parser.add_argument("--users_file")
+    parser.add_argument("--fields")
+    parser.add_argument("--offline", action="store_true")
+    parser.add_argument("--repositories_file")
+    parser.add_argument("--title")
+    parser.add_argument("--head")
+    parser.add_argument("--base")
+    parser.add_argument("--body")
+    parser.add_argument("--workers", type=int, default=4)
     try:
         api_key = load_api_key()
     except FileNotFoundError:
@@ -40,31 +52,31 @@ def setup_controller_and_parser(func):
 @setup_controller_and_parser
 def test_list_my_repositories(github_ctl, parser):
     with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
-        mockingbird.return_value = Namespace(text='{"data":{"viewer":{"repositories":{"totalCount":2,"edges":[{'
-                                                  '"node":{"name":"test_repo1","url":"https://repo1",'
-                                                  '"sshUrl":"ssh:repo1"}},{"node":{"name":"test_repo2",'
-                                                  '"url":"https://repo2","sshUrl":"ssh:repo2"}}]}}}}')
+        mockingbird.return_value = APIResponse(text='{"data":{"viewer":{"repositories":{"totalCount":2,"edges":[{'
+                                                    '"node":{"name":"test_repo1","url":"https://repo1",'
+                                                    '"sshUrl":"ssh:repo1"}},{"node":{"name":"test_repo2",'
+                                                    '"url":"https://repo2","sshUrl":"ssh:repo2"}}]}}}}')
         github_ctl.args = parser.parse_args(["dummy", "--both_urls"])
-        assert github_ctl.list_my_repositories() == [("test_repo1", "ssh:repo1", "https://repo1"),
-                                                     ("test_repo2", "ssh:repo2", "https://repo2")]
+        assert list(github_ctl.list_my_repositories()) == [("test_repo1", "ssh:repo1", "https://repo1"),
+                                                           ("test_repo2", "ssh:repo2", "https://repo2")]
         github_ctl.args = parser.parse_args(["dummy", "--https"])
-        assert github_ctl.list_my_repositories() == [("test_repo1", "", "https://repo1"),
-                                                     ("test_repo2", "", "https://repo2")]
+        assert list(github_ctl.list_my_repositories()) == [("test_repo1", "", "https://repo1"),
+                                                           ("test_repo2", "", "https://repo2")]
         github_ctl.args = parser.parse_args(["dummy", "--url_only"])
-        assert github_ctl.list_my_repositories() == [("", "ssh:repo1", ""),
-                                                     ("", "ssh:repo2", "")]
+        assert list(github_ctl.list_my_repositories()) == [("", "ssh:repo1", ""),
+                                                           ("", "ssh:repo2", "")]
         github_ctl.args = parser.parse_args(["dummy", "--url_only", "--both_urls"])
-        assert github_ctl.list_my_repositories() == [("", "ssh:repo1", "https://repo1"),
-                                                     ("", "ssh:repo2", "https://repo2")]
+        assert list(github_ctl.list_my_repositories()) == [("", "ssh:repo1", "https://repo1"),
+                                                           ("", "ssh:repo2", "https://repo2")]
 
 
 @setup_controller_and_parser
 def test_user_repositories(github_ctl, parser):
     with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
-        mockingbird.return_value = Namespace(text='{"data":{"user":{"repositories":{"totalCount":2,"edges":[{'
-                                                  '"node":{"name":"test_user_repo1","url":"https://user_repo1",'
-                                                  '"sshUrl":"ssh:user_repo1"}},{"node":{"name":"test_user_repo2",'
-                                                  '"url":"https://user_repo2","sshUrl":"ssh:user_repo2"}}]}}}}')
+        mockingbird.return_value = APIResponse(text='{"data":{"user":{"repositories":{"totalCount":2,"edges":[{'
+                                                    '"node":{"name":"test_user_repo1","url":"https://user_repo1",'
+                                                    '"sshUrl":"ssh:user_repo1"}},{"node":{"name":"test_user_repo2",'
+                                                    '"url":"https://user_repo2","sshUrl":"ssh:user_repo2"}}]}}}}')
         github_ctl.args = parser.parse_args([""])
         with raises(InvalidNumberOfArgumentsException):
             github_ctl.list_user_repositories()
@@ -74,27 +86,97 @@ def test_user_repositories(github_ctl, parser):
             github_ctl.list_user_repositories()
 
         github_ctl.args = parser.parse_args(["action", "user", "--both_urls"])
-        assert github_ctl.list_user_repositories() == [("test_user_repo1", "ssh:user_repo1", "https://user_repo1"),
-                                                       ("test_user_repo2", "ssh:user_repo2", "https://user_repo2")]
+        assert list(github_ctl.list_user_repositories()) == [("test_user_repo1", "ssh:user_repo1",
+                                                              "https://user_repo1"),
+                                                             ("test_user_repo2", "ssh:user_repo2",
+                                                              "https://user_repo2")]
         github_ctl.args = parser.parse_args(["action", "user", "--https"])
-        assert github_ctl.list_user_repositories() == [("test_user_repo1", "", "https://user_repo1"),
-                                                       ("test_user_repo2", "", "https://user_repo2")]
+        assert list(github_ctl.list_user_repositories()) == [("test_user_repo1", "", "https://user_repo1"),
+                                                             ("test_user_repo2", "", "https://user_repo2")]
         github_ctl.args = parser.parse_args(["action", "user", "--url_only"])
-        assert github_ctl.list_user_repositories() == [("", "ssh:user_repo1", ""),
-                                                       ("", "ssh:user_repo2", "")]
+        assert list(github_ctl.list_user_repositories()) == [("", "ssh:user_repo1", ""),
+                                                             ("", "ssh:user_repo2", "")]
         github_ctl.args = parser.parse_args(["action", "user", "--url_only", "--both_urls"])
-        assert github_ctl.list_user_repositories() == [("", "ssh:user_repo1", "https://user_repo1"),
-                                                       ("", "ssh:user_repo2", "https://user_repo2")]
+        assert list(github_ctl.list_user_repositories()) == [("", "ssh:user_repo1", "https://user_repo1"),
+                                                             ("", "ssh:user_repo2", "https://user_repo2")]
+
+
+@setup_controller_and_parser
+def test_repositories_field_projection(github_ctl, parser):
+    with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
+        mockingbird.return_value = APIResponse(text='{"data":{"viewer":{"repositories":{"totalCount":1,"edges":[{'
+                                                    '"node":{"name":"repo1","sshUrl":"ssh:repo1","url":"https://repo1",'
+                                                    '"stargazerCount":0,"diskUsage":42}}]}}}}')
+        github_ctl.args = parser.parse_args(["dummy"])
+        list(github_ctl.list_my_repositories())
+        assert "node { name sshUrl id }" in mockingbird.call_args[0][0]['query']
+
+        github_ctl.args = parser.parse_args(["dummy", "--url_only", "--https"])
+        list(github_ctl.list_my_repositories())
+        assert "node { url id }" in mockingbird.call_args[0][0]['query']
+
+        github_ctl.args = parser.parse_args(["dummy", "--fields", "stars,diskUsage"])
+        assert list(github_ctl.list_my_repositories()) == [("repo1", "ssh:repo1", "", 0, 42)]
+        assert "node { name sshUrl stargazerCount diskUsage id }" in mockingbird.call_args[0][0]['query']
+
+        github_ctl.args = parser.parse_args(["dummy", "--fields", "unknown"])
+        with raises(ValueError):
+            github_ctl.list_my_repositories()
+
+
+@setup_controller_and_parser
+def test_multiple_users_repositories(github_ctl, parser):
+    with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
+        mockingbird.side_effect = [
+            APIResponse(text='{"data":{"u0":{"repositories":{"totalCount":2,"pageInfo":{"endCursor":"cursor1"},'
+                             '"edges":[{"node":{"name":"repo1","url":"https://repo1","sshUrl":"ssh:repo1"}}]}},'
+                             '"u1":null,'
+                             '"u2":{"repositories":{"totalCount":1,"pageInfo":{"endCursor":"cursor2"},'
+                             '"edges":[{"node":{"name":"repo3","url":"https://repo3","sshUrl":"ssh:repo3"}}]}}},'
+                             '"errors":[{"message":"Could not resolve to a User"}]}'),
+            APIResponse(text='{"data":{"u0":{"repositories":{"totalCount":2,"pageInfo":{"endCursor":"cursor3"},'
+                             '"edges":[{"node":{"name":"repo2","url":"https://repo2","sshUrl":"ssh:repo2"}}]}}}}')
+        ]
+        github_ctl.args = parser.parse_args(["action", "user1", "unknown", "user3"])
+        assert list(github_ctl.list_user_repositories()) == [("user1/repo1", "ssh:repo1", ""),
+                                                             ("user1/repo2", "ssh:repo2", ""),
+                                                             "Could not resolve user unknown",
+                                                             ("user3/repo3", "ssh:repo3", "")]
+        assert mockingbird.call_count == 2
+        first_query = mockingbird.call_args_list[0][0][0]['variables']
+        assert [first_query[f'login{i}'] for i in range(3)] == ["user1", "unknown", "user3"]
+        second_query = mockingbird.call_args_list[1][0][0]['variables']
+        assert second_query == {'first': 50, 'login0': 'user1', 'after0': 'cursor1'}
+
+
+@setup_controller_and_parser
+def test_list_repositories_pagination(github_ctl, parser):
+    with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
+        mockingbird.side_effect = [
+            APIResponse(text='{"data":{"viewer":{"repositories":{"totalCount":3,"pageInfo":{"endCursor":"cursor1"},'
+                             '"edges":[{"node":{"name":"repo1","url":"https://repo1","sshUrl":"ssh:repo1"}},'
+                             '{"node":{"name":"repo2","url":"https://repo2","sshUrl":"ssh:repo2"}}]}}}}'),
+            APIResponse(text='{"data":{"viewer":{"repositories":{"totalCount":3,"pageInfo":{"endCursor":"cursor2"},'
+                             '"edges":[{"node":{"name":"repo3","url":"https://repo3","sshUrl":"ssh:repo3"}}]}}}}')
+        ]
+        github_ctl.args = parser.parse_args(["dummy"])
+        repositories = github_ctl.list_my_repositories()
+        # First page is fetched eagerly, next one only when iterated
+        assert mockingbird.call_count == 1
+        assert list(repositories) == [("repo1", "ssh:repo1", ""), ("repo2", "ssh:repo2", ""),
+                                      ("repo3", "ssh:repo3", "")]
+        assert mockingbird.call_count == 2
+        assert mockingbird.call_args[0][0]['variables']['after'] == "cursor1"
 
 
 @setup_controller_and_parser
 def test_create_repo(github_ctl, parser):
     with mock.patch.object(GithubController, 'send_restful_request') as restful_mockingbird:
         # https://tinyurl.com/resting-mockingbird
-        restful_mockingbird.return_value = Namespace(text='{"name": "new_repo",'
-                                                          '"ssh_url": "ssh:new_repo",'
-                                                          '"git_url": "git:http_repo"}',
-                                                     status_code=200)
+        restful_mockingbird.return_value = APIResponse(text='{"name": "new_repo",'
+                                                            '"ssh_url": "ssh:new_repo",'
+                                                            '"git_url": "git:http_repo"}',
+                                                       status_code=200)
         github_ctl.args = parser.parse_args([""])
         with raises(InvalidNumberOfArgumentsException):
             github_ctl.create_new_repository()
@@ -110,12 +192,12 @@ def test_create_repo(github_ctl, parser):
                 "description": "",
                 "private": False}
         restful_mockingbird.assert_called_with(endpoint="https://api.github.com/user/repos",
-                                               json_data=json, method='POST')
+                                               json_data=json, method='POST', took_effect=mock.ANY)
 
-        restful_mockingbird.return_value = Namespace(text='{"name": "new_repo",'
-                                                          '"ssh_url": "ssh:new_repo",'
-                                                          '"git_url": "git:http_repo"}',
-                                                     status_code=422)
+        restful_mockingbird.return_value = APIResponse(text='{"name": "new_repo",'
+                                                            '"ssh_url": "ssh:new_repo",'
+                                                            '"git_url": "git:http_repo"}',
+                                                       status_code=422)
         assert github_ctl.create_new_repository() != [("new_repo", "ssh:new_repo", "git:http_repo")]
         assert all(x in github_ctl.create_new_repository().lower() for x in ["new_repo", "exists"])
 
@@ -124,8 +206,8 @@ def test_create_repo(github_ctl, parser):
 def test_delete_repository(github_ctl, parser):
     with mock.patch.object(GithubController, 'send_restful_request') as restful_mockingbird:
         with mock.patch.object(GithubController, 'send_graphql_request') as username_mock:
-            username_mock.return_value = Namespace(text='{"data": {"viewer": {"login": "mock_user"}}}')
-            restful_mockingbird.return_value = Namespace(status_code=204, text='{"message": "very_random"}')
+            username_mock.return_value = APIResponse(text='{"data": {"viewer": {"login": "mock_user"}}}')
+            restful_mockingbird.return_value = APIResponse(status_code=204, text='{"message": "very_random"}')
             github_ctl.args = parser.parse_args([""])
             with raises(InvalidNumberOfArgumentsException):
                 github_ctl.delete_repository()
@@ -137,19 +219,25 @@ def test_delete_repository(github_ctl, parser):
             github_ctl.args = parser.parse_args(["action", "deleted_repo", "--no_confirm"])
             assert all(x in github_ctl.delete_repository().lower() for x in ["deleted_repo", "deleted"])
 
-            restful_mockingbird.return_value = Namespace(status_code=404, text='{"message": "Not found"}')
+            restful_mockingbird.return_value = APIResponse(status_code=404, text='{"message": "Not found"}')
             assert all(x in github_ctl.delete_repository().lower() for x in ["deleted_repo", "unable"])
 
             restful_mockingbird.assert_called_with(endpoint="https://api.github.com/repos/mock_user/deleted_repo",
-                                                   json_data=None, method='DELETE')
+                                                   json_data=None, method='DELETE', took_effect=mock.ANY)
+
+            # Viewer login is obtained only once, afterwards it's served from cache unless refresh is requested
+            username_mock.assert_called_once()
+            github_ctl.args = parser.parse_args(["action", "deleted_repo", "--no_confirm", "--refresh"])
+            github_ctl.delete_repository()
+            assert username_mock.call_count == 2
 
 
 @setup_controller_and_parser
 def test_create_project(github_ctl, parser):
     with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
-        mockingbird.return_value = Namespace(text='{"data": {"createProject": {"clientMutationId": "null","project": '
-                                                  '{"id": "new_project_id"}}, "viewer":{"repository": {"id": "repo_id"'
-                                                  '}}}}')
+        mockingbird.return_value = APIResponse(text='{"data": {"createProject": {"clientMutationId": "null",'
+                                                    '"project": {"id": "new_project_id"}}, "viewer":{"repository": '
+                                                    '{"id": "repo_id"}}}}')
         github_ctl.args = parser.parse_args([""])
         with raises(InvalidNumberOfArgumentsException):
             github_ctl.create_new_project()
@@ -162,3 +250,35 @@ def test_create_project(github_ctl, parser):
         response = github_ctl.create_new_project().lower()
         assert all(x in response for x in ["successfully", "test_repo", "test_project"])
         assert mockingbird.call_count == 2
+
+
+@setup_controller_and_parser
+def test_create_pull_requests(github_ctl, parser):
+    repositories_file = NamedTemporaryFile('w', suffix='.txt', delete=False)
+    with repositories_file:
+        repositories_file.write("other\nrepo1\n")
+    listing = APIResponse(text='{"data":{"viewer":{"repositories":{"totalCount":3,"edges":[{"node":{"name":"repo1"}},'
+                               '{"node":{"name":"repo2"}},{"node":{"name":"tools"}}]}}}}')
+
+    def create(endpoint, json_data, method, took_effect):
+        assert json_data == {"title": "Bump", "body": "", "head": "bump", "base": "master"}
+        if "/other/" in endpoint:
+            return APIResponse(422, '{"message": "Validation Failed", "errors": [{"message": "No commits"}]}')
+        return APIResponse(201, f'{{"url": "{endpoint}/1", "html_url": "https://github.com/pr/1"}}')
+
+    github_ctl.args = parser.parse_args(["create-pull-requests", "repo1"])
+    with raises(InvalidNumberOfArgumentsException):
+        github_ctl.create_pull_requests()
+    github_ctl.args = parser.parse_args(["create-pull-requests", "repo*", "--repositories_file", repositories_file.name,
+                                         "--title", "Bump", "--head", "bump", "--base", "master"])
+    with mock.patch.object(GithubController, 'send_graphql_request', return_value=listing) as graphql_mock, \
+            mock.patch.object(GithubController, 'obtain_viewer', return_value={'login': 'mock_user'}) as viewer_mock, \
+            mock.patch.object(GithubController, 'send_restful_request', side_effect=create) as restful_mock:
+        assert list(github_ctl.create_pull_requests()) == [
+            "repo1: https://github.com/pr/1", "repo2: https://github.com/pr/1",
+            "other: Validation Failed - No commits", "Pull request Bump created in 2 of 3 repositories"]
+        graphql_mock.assert_called_once()
+        viewer_mock.assert_called_once()
+        assert restful_mock.call_count == 3
+        assert restful_mock.call_args_list[0][1]['endpoint'] == "https://api.github.com/repos/mock_user/repo1/pulls"
+    remove(repositories_file.name)
@@ -0,0 +1,201 @@
+from argparse import ArgumentParser
+from contextlib import closing
+from json import dumps
+from sqlite3 import connect
+from unittest import mock
+
+from github.cache import RepositoryIndex
+from github.common import APIResponse
+from github.github_controller import GithubController
+
+
+def setup_parser():
+    parser = ArgumentParser()
+    parser.add_argument("action", nargs=1)
+    parser.add_argument("parameters", nargs="*")
+    parser.add_argument("--both_urls", action="store_true")
+    parser.add_argument("--url_only", action="store_true")
+    parser.add_argument("--https", action="store_true")
+    parser.add_argument("--refresh", action="store_true")
+    parser.add_argument("--users_file")
+    parser.add_argument("--fields")
+    parser.add_argument("--offline", action="store_true")
+    return parser
+
+
+def repository(name, updated_at):
+    return {'id': f'R_{name}', 'name': name, 'sshUrl': f'ssh:{name}', 'url': f'https://{name}',
+            'updatedAt': updated_at, 'stargazerCount': 1}
+
+
+def sync_response(repositories, total_count, end_cursor='cursor'):
+    return APIResponse(text=dumps({'data': {'viewer': {'login': 'mock_user', 'repositories': {
+        'totalCount': total_count, 'pageInfo': {'endCursor': end_cursor},
+        'edges': [{'node': node} for node in repositories]}}}}))
+
+
+def test_repository_index(tmp_path):
+    index = RepositoryIndex(str(tmp_path / 'index.sqlite'))
+    index.store('owner', [repository('github_cli_app', '2019-02-01T00:00:00Z'),
+                          repository('dotfiles', '2019-01-01T00:00:00Z')])
+    index.store('other', [repository('cli_tools', '2019-03-01T00:00:00Z')])
+    assert [node['name'] for node in index.repositories('OWNER')] == ['dotfiles', 'github_cli_app']
+    assert [(owner, node['name']) for owner, node in index.find('CLI')] == [('other', 'cli_tools'),
+                                                                          ('owner', 'github_cli_app')]
+    assert [node['name'] for _, node in index.find('github_*')] == ['github_cli_app']
+    assert [node['name'] for _, node in index.find('other/*')] == ['cli_tools']
+    assert index.prune('owner', ['github_cli_app']) == 1
+    index.remove('other', 'cli_tools')
+    assert index.count('owner') == 1 and index.count('other') == 0
+
+    assert index.watermark('owner') is None
+    index.mark_synced('owner', viewer_key='key', watermark='2019-02-01T00:00:00Z')
+    index.mark_synced('owner')
+    assert index.viewer_login('key') == 'owner'
+    assert index.watermark('owner') == '2019-02-01T00:00:00Z'
+    assert index.watermark('nobody') is None
+    assert index.viewer_login('other_key') is None
+
+
+def test_index_without_watermark_is_migrated(tmp_path):
+    path = str(tmp_path / 'index.sqlite')
+    with closing(connect(path)) as connection, connection:
+        connection.execute("CREATE TABLE owners (login TEXT PRIMARY KEY, viewer_key TEXT, synced_at REAL)")
+        connection.execute("INSERT INTO owners VALUES ('owner', 'key', 0)")
+    index = RepositoryIndex(path)
+    assert index.watermark('owner') is None
+    index.mark_synced('owner', watermark='2019-01-01T00:00:00Z')
+    assert index.watermark('owner') == '2019-01-01T00:00:00Z'
+    assert index.viewer_login('key') == 'owner'
+
+
+def test_incremental_sync_and_offline_listing():
+    github_ctl = GithubController(setup_parser().parse_args(["sync"]), "api_key")
+    first_sync = [sync_response([repository('repo3', '2019-03-01T00:00:00Z'),
+                                 repository('repo2', '2019-02-01T00:00:00Z')], 3),
+                  sync_response([repository('repo1', '2019-01-01T00:00:00Z')], 3)]
+    with mock.patch.object(GithubController, 'send_graphql_request', side_effect=first_sync) as mockingbird:
+        assert github_ctl.sync_repositories() == ["mock_user: 3 new or updated, 0 removed, 3 repositories in index"]
+        assert "orderBy: {field: UPDATED_AT, direction: DESC}" in mockingbird.call_args[0][0]['query']
+        assert mockingbird.call_args[0][0]['variables']['after'] == 'cursor'
+
+    # Only repositories updated since the last sync are fetched, sync stops on the first unchanged one
+    second_sync = [sync_response([repository('repo4', '2019-04-01T00:00:00Z'),
+                                  repository('repo3', '2019-03-01T00:00:00Z'),
+                                  repository('repo2', '2019-02-01T00:00:00Z')], 4)]
+    with mock.patch.object(GithubController, 'send_graphql_request', side_effect=second_sync) as mockingbird:
+        assert github_ctl.sync_repositories() == ["mock_user: 2 new or updated, 0 removed, 4 repositories in index"]
+        mockingbird.assert_called_once()
+
+    with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
+        github_ctl.args = setup_parser().parse_args(["list-my-repositories", "--offline", "--fields", "stars"])
+        assert github_ctl.list_my_repositories() == [('repo1', 'ssh:repo1', '', 1), ('repo2', 'ssh:repo2', '', 1),
+                                                     ('repo3', 'ssh:repo3', '', 1), ('repo4', 'ssh:repo4', '', 1)]
+        github_ctl.args = setup_parser().parse_args(["list-user-repositories", "unknown", "--offline"])
+        assert "not in local index" in github_ctl.list_user_repositories()
+        github_ctl.args = setup_parser().parse_args(["find-repository", "repo[12]", "--https"])
+        assert github_ctl.find_repository() == [('mock_user/repo1', '', 'https://repo1'),
+                                                ('mock_user/repo2', '', 'https://repo2')]
+        mockingbird.assert_not_called()
+
+    # Full sync removes repositories which no longer exist
+    github_ctl.args = setup_parser().parse_args(["sync", "--refresh"])
+    full_sync = [sync_response([repository('repo4', '2019-04-01T00:00:00Z')], 1)]
+    with mock.patch.object(GithubController, 'send_graphql_request', side_effect=full_sync):
+        assert github_ctl.sync_repositories() == ["mock_user: 1 new or updated, 3 removed, 1 repositories in index"]
+
+    # Malformed response is reported for the owner instead of failing the whole sync
+    malformed = [APIResponse(text='{"data": {"viewer": {"repositories": {"edges": []}}}}')]
+    with mock.patch.object(GithubController, 'send_graphql_request', side_effect=malformed):
+        assert github_ctl.sync_repositories() == \
+            ["viewer: Malformed response, 'login' or 'repositories' of the owner is missing"]
+
+
+def test_interrupted_sync_is_not_incremental():
+    github_ctl = GithubController(setup_parser().parse_args(["sync"]), "api_key")
+    first_page = sync_response([repository('repo3', '2019-03-01T00:00:00Z')], 3)
+    with mock.patch.object(GithubController, 'send_graphql_request',
+                           side_effect=[first_page, ValueError("Connection lost")]):
+        assert github_ctl.sync_repositories() == ["viewer: Connection lost"]
+    # Repositories stored by interrupted sync don't make the next sync stop at its first page
+    resumed = [sync_response([repository('repo3', '2019-03-01T00:00:00Z')], 3),
+               sync_response([repository('repo2', '2019-02-01T00:00:00Z'),
+                              repository('repo1', '2019-01-01T00:00:00Z')], 3)]
+    with mock.patch.object(GithubController, 'send_graphql_request', side_effect=resumed) as mockingbird:
+        assert github_ctl.sync_repositories() == ["mock_user: 3 new or updated, 0 removed, 3 repositories in index"]
+        assert mockingbird.call_count == 2
+
+
+def test_offline_listing_without_sync():
+    github_ctl = GithubController(setup_parser().parse_args(["list-my-repositories", "--offline"]), "api_key")
+    assert github_ctl.list_my_repositories() == "Your repositories are not in local index, run 'github sync' first"
+
+
+def test_repository_ids(tmp_path):
+    index = RepositoryIndex(str(tmp_path / 'index.sqlite'))
+    index.store_ids('key', {'repo1': 'R_1', 'repo2': 'R_2'})
+    index.store_ids('other_key', {'repo1': 'R_other'})
+    assert index.repository_ids('key', ['REPO1', 'repo2', 'repo3']) == {'repo1': 'R_1', 'repo2': 'R_2'}
+    # Renamed repository keeps its ID, the old name is dropped
+    index.store_ids('key', {'renamed': 'R_2'})
+    assert index.repository_ids('key', ['repo2', 'renamed']) == {'renamed': 'R_2'}
+    index.remove_id('key', 'repo1')
+    assert index.repository_ids('key', ['repo1']) == {}
+    assert index.repository_ids('other_key', ['repo1']) == {'repo1': 'R_other'}
+    # Names are exported only if the map changed
+    with mock.patch.object(RepositoryIndex, '_export_names') as export:
+        assert not index.store_ids('key', {'renamed': 'R_2'})
+        index.remove_id('key', 'repo1')
+        export.assert_not_called()
+        assert index.store_ids('key', {'Renamed': 'R_2'})
+        export.assert_called_once()
+
+
+def test_listing_stores_ids_once():
+    github_ctl = GithubController(setup_parser().parse_args(["list-my-repositories"]), "api_key")
+    pages = [APIResponse(text=dumps({'data': {'viewer': {'repositories': {
+        'totalCount': 2, 'pageInfo': {'endCursor': 'cursor'}, 'edges': [{'node': repository(name, None)}]}}}}))
+        for name in ('repo1', 'repo2')]
+    with mock.patch.object(GithubController, 'send_graphql_request', side_effect=pages), \
+            mock.patch.object(RepositoryIndex, 'store_ids') as store_ids:
+        assert len(list(github_ctl.list_my_repositories())) == 2
+    store_ids.assert_called_once()
+    assert store_ids.call_args[0][1] == {'repo1': 'R_repo1', 'repo2': 'R_repo2'}
+
+
+def test_create_project_uses_stored_ids():
+    parser = setup_parser()
+    github_ctl = GithubController(parser.parse_args(["list-my-repositories"]), "api_key")
+    listing = APIResponse(text=dumps({'data': {'viewer': {'repositories': {'totalCount': 2, 'edges': [
+        {'node': repository('repo1', None)}, {'node': repository('repo2', None)}]}}}}))
+    with mock.patch.object(GithubController, 'send_graphql_request', return_value=listing):
+        list(github_ctl.list_my_repositories())
+
+    created = APIResponse(text='{"data": {"createProject": {"clientMutationId": null}}}')
+    github_ctl.args = parser.parse_args(["create-project", "repo1", "repo2", "project"])
+    with mock.patch.object(GithubController, 'send_graphql_request', return_value=created) as mockingbird:
+        assert github_ctl.create_new_project() == ["Project project created successfully in repository repo1",
+                                                   "Project project created successfully in repository repo2"]
+        # Only the mutations are sent, IDs are known from the listing
+        assert [call[0][0]['variables']['input']['ownerId'] for call in mockingbird.call_args_list] == \
+            ['R_repo1', 'R_repo2']
+
+    resolved = APIResponse(text='{"data": {"viewer": {"r0": {"id": "R_repo3", "name": "repo3"}, "r1": null}}, '
+                                '"errors": [{"message": "Could not resolve to a Repository"}]}')
+    github_ctl.args = parser.parse_args(["create-project", "repo1", "repo3", "missing", "project"])
+    with mock.patch.object(GithubController, 'send_graphql_request', side_effect=[resolved, created, created]) \
+            as mockingbird:
+        assert github_ctl.create_new_project() == ["Project project created successfully in repository repo1",
+                                                   "Project project created successfully in repository repo3",
+                                                   "Could not resolve repository missing"]
+        # Unknown repositories are resolved by single aliased query
+        assert mockingbird.call_args_list[0][0][0]['variables'] == {'name0': 'repo3', 'name1': 'missing'}
+        assert mockingbird.call_count == 3
+
+    # Stale ID (repository was recreated in the meantime) is resolved again and the mutation is retried
+    recreated = APIResponse(text='{"data": {"viewer": {"repository": {"id": "R_new"}}}}')
+    github_ctl.args = parser.parse_args(["create-project", "repo1", "project"])
+    with mock.patch.object(GithubController, 'send_graphql_request',
+                           side_effect=[ValueError("NOT_FOUND"), recreated, created]) as mockingbird:
+        assert github_ctl.create_new_project() == "Project project created successfully in repository repo1"
+        assert mockingbird.call_args[0][0]['variables']['input']['ownerId'] == 'R_new'
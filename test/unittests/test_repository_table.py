@@ -0,0 +1,99 @@
+from argparse import ArgumentParser
+from io import StringIO
+from unittest import mock
+
+from pytest import raises
+
+from github.common import APIResponse
+from github.github_controller import GithubController
+from github.output_writer import create_writer
+from github.repository_table import RepositoryTable
+
+
+def setup_parser():
+    parser = ArgumentParser()
+    parser.add_argument("action", nargs=1)
+    parser.add_argument("parameters", nargs="*")
+    for flag in ("--both_urls", "--url_only", "--https", "--refresh", "--offline", "--no_numbers"):
+        parser.add_argument(flag, action="store_true")
+    parser.add_argument("--fields")
+    parser.add_argument("--sort")
+    parser.add_argument("--filter", action="append")
+    parser.add_argument("--unique")
+    return parser
+
+
+def table() -> RepositoryTable:
+    repositories = RepositoryTable(['name', 'ssh_url', 'url', 'stars', 'description'], (True, True, False))
+    repositories.extend([("b", "ssh:b", "", 3, None), ("A", "ssh:a", "", 5, "fork of c"), ("c", "ssh:c", "", 3, "c"),
+                         "Could not resolve user unknown"])
+    return repositories
+
+
+def test_table_stores_only_printed_fields():
+    repositories = table()
+    assert repositories.fields == ['name', 'ssh_url', 'stars', 'description']
+    assert len(repositories) == 3
+    assert list(repositories) == [("b", "ssh:b", "", 3, None), ("A", "ssh:a", "", 5, "fork of c"),
+                                  ("c", "ssh:c", "", 3, "c"), "Could not resolve user unknown"]
+    with raises(ValueError):
+        repositories.sort('url')
+
+
+def test_sort_filter_and_unique():
+    repositories = table()
+    repositories.sort('name')
+    assert [values[0] for values in repositories.rows()] == ["A", "b", "c"]
+    repositories.sort('description', descending=True)
+    assert [values[0] for values in repositories.rows()] == ["A", "c", "b"]
+    # Stable sort - rows with equal stars keep order by description
+    repositories.sort('stars')
+    assert [values[0] for values in repositories.rows()] == ["c", "b", "A"]
+    repositories.unique('stars')
+    assert [values[0] for values in repositories.rows()] == ["c", "A"]
+    repositories.filter('description', '*c')
+    assert [values[0] for values in repositories.rows()] == ["c", "A"]
+    repositories.filter('name', 'a')
+    assert list(repositories.rows()) == [("A", "ssh:a", 5, "fork of c")]
+
+
+def test_table_output():
+    parser = setup_parser()
+    outputs = {}
+    for output_format in ('text', 'json', 'csv'):
+        stream = StringIO()
+        writer = create_writer(output_format, stream, parser.parse_args(["dummy", "--fields", "stars,description"]))
+        writer.write_table(table())
+        writer.flush()
+        outputs[output_format] = stream.getvalue()
+    assert outputs['text'].startswith("1.\nb\nssh:b\nstars: 3\ndescription: None\n2.\nA\n")
+    assert outputs['text'].endswith("4.\nCould not resolve user unknown\n")
+    assert '{"name": "A", "ssh_url": "ssh:a", "stars": 5, "description": "fork of c"}' in outputs['json']
+    assert outputs['csv'] == "name,ssh_url,stars,description\nb,ssh:b,3,\nA,ssh:a,5,fork of c\nc,ssh:c,3,c\n" \
+                             "Could not resolve user unknown\n"
+
+
+def test_listing_is_arranged():
+    parser = setup_parser()
+    github_ctl = GithubController(None, "api_key")
+    with mock.patch.object(GithubController, 'send_graphql_request') as mockingbird:
+        mockingbird.return_value = APIResponse(text='{"data":{"viewer":{"repositories":{"totalCount":3,"edges":['
+                                                    '{"node":{"name":"r1","sshUrl":"s1","stargazerCount":1}},'
+                                                    '{"node":{"name":"r2","sshUrl":"s2","stargazerCount":7}},'
+                                                    '{"node":{"name":"r3","sshUrl":"s3","stargazerCount":7}}]}}}}')
+        github_ctl.args = parser.parse_args(["dummy", "--sort=-stars,name"])
+        repositories = github_ctl.list_my_repositories()
+        assert isinstance(repositories, RepositoryTable)
+        assert list(repositories) == [("r2", "s2", "", 7), ("r3", "s3", "", 7), ("r1", "s1", "", 1)]
+        # Fields used for sorting are requested even if not selected by '--fields'
+        assert "node { name sshUrl stargazerCount id }" in mockingbird.call_args[0][0]['query']
+
+        github_ctl.args = parser.parse_args(["dummy", "--unique", "stars", "--filter", "name=r[23]"])
+        assert list(github_ctl.list_my_repositories()) == [("r2", "s2", "", 7)]
+
+        github_ctl.args = parser.parse_args(["dummy", "--filter", "url=*"])
+        assert github_ctl.list_my_repositories() == \
+            "Field url is not printed, it can't be used for sorting, filtering or deduplication"
+        github_ctl.args = parser.parse_args(["dummy", "--filter", "stars"])
+        with raises(ValueError):
+            github_ctl.list_my_repositories()
@@ -0,0 +1,148 @@
+from argparse import Namespace
+from functools import partial
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Event, Thread
+from time import gmtime, strftime, time
+from unittest import mock
+
+from pytest import raises
+from requests import Response
+from requests.exceptions import ConnectionError
+
+from github.common import APIResponse, CircuitOpenException
+from github.github_controller import GithubController
+from github.retry_policy import RetryPolicy, CircuitBreaker
+
+
+def http_response(status_code=200, content=b'{}'):
+    response = Response()
+    response.status_code = status_code
+    response._content = content
+    response._content_consumed = True
+    return response
+
+
+def controller(circuit_breaker=None) -> GithubController:
+    return GithubController(None, "api_key", retry_policy=RetryPolicy(circuit_breaker=circuit_breaker,
+                                                                      sleep=lambda delay: None))
+
+
+def test_delay_is_jittered_and_bounded():
+    policy = RetryPolicy(base_delay=1, max_delay=5)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= min(5, 2 ** attempt)
+    assert policy.should_retry(2) and not policy.should_retry(3)
+
+
+def test_circuit_breaker():
+    circuit_breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    circuit_breaker.record_failure()
+    circuit_breaker.before_request()
+    circuit_breaker.record_failure()
+    with raises(CircuitOpenException):
+        circuit_breaker.before_request()
+    # After reset timeout single trial request is let through
+    circuit_breaker.opened_at -= 31
+    circuit_breaker.before_request()
+    with raises(CircuitOpenException):
+        circuit_breaker.before_request()
+    circuit_breaker.record_success()
+    circuit_breaker.before_request()
+
+
+def test_idempotent_requests_are_retried():
+    github_ctl = controller()
+    with mock.patch.object(github_ctl.session, 'get',
+                           side_effect=[http_response(502), ConnectionError(), http_response(200, b'{"a": 1}')]):
+        assert github_ctl.send_restful_request("/end", None).json == {"a": 1}
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[http_response(503), http_response(
+            200, b'{"data": {"viewer": {"login": "mock_user"}}}')]) as post_mock:
+        assert github_ctl.send_graphql_request({'query': '{viewer {login}}'}).data['viewer']['login'] == 'mock_user'
+        assert post_mock.call_count == 2
+    with mock.patch.object(github_ctl.session, 'get', side_effect=[http_response(502)] * 4) as get_mock:
+        assert github_ctl.send_restful_request("/end", None).status_code == 502
+        assert get_mock.call_count == 4
+
+
+def test_stalled_request_is_retried():
+    released = Event()
+
+    class Handler(BaseHTTPRequestHandler):
+        requests = 0
+
+        def do_GET(self):
+            Handler.requests += 1
+            if Handler.requests == 1:
+                # The first connection stalls until the test finishes
+                released.wait(5)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{"a": 1}')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    github_ctl = GithubController(None, "api_key", retry_policy=RetryPolicy(sleep=lambda delay: None,
+                                                                            timeout=(1, 0.2)))
+    try:
+        assert github_ctl.send_restful_request(f'http://127.0.0.1:{server.server_port}/end', None).json == {"a": 1}
+    finally:
+        released.set()
+        server.shutdown()
+        server.server_close()
+    assert Handler.requests == 2
+
+
+def test_timeout_is_configurable():
+    args = Namespace(action=None, retries=5, timeout=60)
+    assert GithubController.create_retry_policy(args).timeout == (RetryPolicy.CONNECT_TIMEOUT, 60)
+    assert GithubController(args, "api_key").retry_policy.max_retries == 5
+    assert GithubController.create_retry_policy(None).timeout == (RetryPolicy.CONNECT_TIMEOUT,
+                                                                  RetryPolicy.READ_TIMEOUT)
+
+
+def test_mutation_is_retried_only_if_it_did_not_take_effect():
+    github_ctl = controller()
+    applied = APIResponse(201, '{"name": "repo"}')
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[ConnectionError(), http_response(201)]) as post:
+        assert github_ctl.send_restful_request("/user/repos", {}, 'POST', took_effect=lambda: applied) is applied
+        post.assert_called_once()
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[http_response(502), http_response(201)]) as post:
+        assert github_ctl.send_restful_request("/user/repos", {}, 'POST', took_effect=lambda: None).status_code == 201
+        assert post.call_count == 2
+    # Mutation without check is never retried
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[http_response(502), http_response(201)]) as post:
+        assert github_ctl.send_restful_request("/user/repos", {}, 'POST').status_code == 502
+        post.assert_called_once()
+
+
+def test_mutation_verification_bypasses_cache():
+    github_ctl = controller()
+    lookup = b'{"data": {"viewer": {"repository": {"projects": {"nodes": %s}}}}}'
+    created = lookup % b'[{"name": "project", "createdAt": "%s"}]' % strftime('%Y-%m-%dT%H:%M:%SZ', gmtime()).encode()
+    mutation = {'query': 'mutation($input: CreateProjectInput!) { createProject(input: $input) { clientMutationId } }'}
+    took_effect = partial(github_ctl.project_created, "repo", "project", time())
+    # The project isn't there yet, the answer must not be reused by verification of the failed mutation
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[http_response(200, lookup % b'[]')]):
+        assert took_effect() is None
+    with mock.patch.object(github_ctl.session, 'post', side_effect=[http_response(502), http_response(200, created)]) \
+            as post:
+        assert github_ctl.send_graphql_request(mutation, took_effect=took_effect).data == \
+            {'createProject': {'clientMutationId': None}}
+        assert [call[1]['json'] for call in post.call_args_list].count(mutation) == 1
+
+
+def test_open_circuit_fails_fast():
+    github_ctl = controller(CircuitBreaker(failure_threshold=3))
+    with mock.patch.object(github_ctl.session, 'get', side_effect=ConnectionError()) as get_mock:
+        with raises(CircuitOpenException):
+            github_ctl.send_restful_request("/end", None)
+        assert get_mock.call_count == 3
+        with raises(CircuitOpenException):
+            github_ctl.send_restful_request("/end", None)
+        assert get_mock.call_count == 3
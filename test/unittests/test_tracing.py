@@ -0,0 +1,113 @@
+from argparse import ArgumentParser
+from datetime import timedelta
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from json import load
+from socket import getaddrinfo
+from threading import Thread
+from unittest import mock
+
+from requests import Response, PreparedRequest, Session
+
+from github.github_controller import GithubController
+from github.queries.graphQL_document import operation_name
+from github.traced_adapter import TracedHTTPAdapter
+from github.tracing import tracer, Tracer, NULL_SPAN
+
+
+def setup_parser():
+    parser = ArgumentParser()
+    parser.add_argument("action", nargs=1)
+    parser.add_argument("parameters", nargs="*")
+    parser.add_argument("--refresh", action="store_true")
+    parser.add_argument("--rate_limit", action="store_true")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--trace_file")
+    return parser
+
+
+def graphql_response(*args, **kwargs):
+    del args, kwargs
+    response = Response()
+    response.status_code = 200
+    response._content = b'{"data": {"viewer": {"login": "mock_user", "id": "U_1"}}}'
+    response._content_consumed = True
+    response.elapsed = timedelta(milliseconds=12)
+    response.request = PreparedRequest()
+    response.request.body = b'{"query": "{viewer {login id}}"}'
+    return response
+
+
+def test_operation_name():
+    assert operation_name('query($first: Int!, $after: String) { viewer { repositories(first: $first) { x } } }') \
+        == 'query viewer.repositories'
+    assert operation_name('query($login0: String!) { u0: user(login: $login0) { x } }') == 'query user'
+    assert operation_name('mutation($input: CreateProjectInput!) { createProject(input: $input) { x } }') \
+        == 'mutation createProject'
+    assert operation_name('{viewer {login id}}') == 'query viewer'
+
+
+def test_disabled_tracer_records_nothing():
+    local_tracer = Tracer()
+    with local_tracer.span('request') as span:
+        span.set(status=200)
+    assert span is NULL_SPAN
+    assert local_tracer.spans == []
+
+
+def test_tracer_spans():
+    local_tracer = Tracer()
+    local_tracer.enable()
+    with local_tracer.span('action'):
+        with local_tracer.span('POST /graphql', 'request', query='query viewer') as request_span:
+            assert local_tracer.current() is request_span
+            request_span.set(status=200, ttfb_ms=1.5, request_bytes=10, response_bytes=20)
+    assert local_tracer.current() is NULL_SPAN
+    assert [span.name for span in local_tracer.spans] == ['POST /graphql', 'action']
+    summary = local_tracer.summary()
+    assert "POST /graphql query viewer -> 200" in summary
+    assert "1.5 ms TTFB, 10 B sent, 20 B received" in summary
+    events = local_tracer.chrome_trace()['traceEvents']
+    assert {event['ph'] for event in events} == {'X'}
+    assert events[0]['args']['query'] == 'query viewer'
+
+
+def test_profile_summary_and_trace_file(tmp_path, capsys):
+    trace_file = tmp_path / 'trace.json'
+    args = setup_parser().parse_args(["dummy", "--profile", "--trace_file", str(trace_file)])
+    github_ctl = GithubController(args, "api_key")
+    assert tracer.enabled
+    with mock.patch.object(github_ctl.session, 'post', side_effect=graphql_response):
+        github_ctl.execute_arg(lambda: github_ctl.obtain_viewer()['login'])
+    captured = capsys.readouterr()
+    assert captured.out == "mock_user\n"
+    assert "POST /graphql query viewer -> 200" in captured.err
+    assert "12.0 ms TTFB" in captured.err
+    with open(trace_file) as trace:
+        names = {event['name'] for event in load(trace)['traceEvents']}
+    assert {'dummy', 'POST /graphql', 'json decode', 'render'} <= names
+
+
+def test_connection_resolves_host_once():
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    Thread(target=server.handle_request, daemon=True).start()
+    lookup = mock.Mock(wraps=getaddrinfo)
+    session = Session()
+    session.mount('http://', TracedHTTPAdapter())
+    local_tracer = Tracer()
+    local_tracer.enable()
+    try:
+        with mock.patch('socket.getaddrinfo', lookup), mock.patch('github.traced_adapter.getaddrinfo', lookup), \
+                mock.patch('github.traced_adapter.tracer', local_tracer), local_tracer.span('GET /') as span:
+            assert session.get(f'http://localhost:{server.server_port}/').status_code == 204
+    finally:
+        server.server_close()
+    assert [call[0][0] for call in lookup.call_args_list].count('localhost') == 1
+    assert {'dns_ms', 'tcp_ms'} <= set(span.args)